@@ -0,0 +1,98 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Server settings read from environment variables.
+
+Every setting is read from an environment variable named
+`ANALYTICS_MCP_<NAME>`, so settings can be provided in the `env` object of an
+MCP client's server configuration.
+"""
+
+import os
+
+# Prefix shared by the environment variables for all settings.
+_ENV_PREFIX = "ANALYTICS_MCP_"
+
+
+def _get_raw(name: str) -> str | None:
+    """Returns the stripped value of the setting, or None if it's not set."""
+    value = os.environ.get(f"{_ENV_PREFIX}{name}")
+    if value is None or not value.strip():
+        return None
+    return value.strip()
+
+
+def get_str(name: str, default: str) -> str:
+    """Returns the string value of a setting."""
+    value = _get_raw(name)
+    return default if value is None else value
+
+
+def get_int(name: str, default: int) -> int:
+    """Returns the integer value of a setting.
+
+    Raises:
+        ValueError: If the setting is not a valid integer.
+    """
+    value = _get_raw(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid value for {_ENV_PREFIX}{name}: {value!r}. "
+            "Expected an integer."
+        ) from None
+
+
+def get_float(name: str, default: float) -> float:
+    """Returns the float value of a setting.
+
+    Raises:
+        ValueError: If the setting is not a valid number.
+    """
+    value = _get_raw(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid value for {_ENV_PREFIX}{name}: {value!r}. "
+            "Expected a number."
+        ) from None
+
+
+def get_bool(name: str, default: bool) -> bool:
+    """Returns the boolean value of a setting.
+
+    Accepts `1`, `true`, `yes` and `on` as true, and `0`, `false`, `no` and
+    `off` as false, ignoring case.
+
+    Raises:
+        ValueError: If the setting is not a valid boolean.
+    """
+    value = _get_raw(name)
+    if value is None:
+        return default
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes", "on"):
+        return True
+    if lowered in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(
+        f"Invalid value for {_ENV_PREFIX}{name}: {value!r}. "
+        "Expected a boolean."
+    )
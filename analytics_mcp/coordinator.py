@@ -17,8 +17,44 @@
 The singleton allows other modules to register their tools with the same MCP
 server using `@mcp.tool` annotations, thereby 'coordinating' the bootstrapping
 of the server.
+
+Modules that hold long-lived resources, such as API clients, register cleanup
+callbacks with `on_shutdown`. The server runs these callbacks when it stops.
 """
+
+import logging
+from typing import Awaitable, Callable, List
+
 from mcp.server.fastmcp import FastMCP
 
 # Creates the singleton.
 mcp = FastMCP("Google Analytics Server")
+
+_logger = logging.getLogger(__name__)
+
+_shutdown_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+
+def on_shutdown(
+    callback: Callable[[], Awaitable[None]],
+) -> Callable[[], Awaitable[None]]:
+    """Registers an async callback to run when the server shuts down.
+
+    Can be used as a decorator. Callbacks run in the reverse order of their
+    registration.
+    """
+    _shutdown_callbacks.append(callback)
+    return callback
+
+
+async def shutdown() -> None:
+    """Runs all registered shutdown callbacks.
+
+    A failing callback is logged and doesn't prevent the remaining callbacks
+    from running.
+    """
+    for callback in reversed(_shutdown_callbacks):
+        try:
+            await callback()
+        except Exception:
+            _logger.exception("Shutdown callback %r failed", callback)
@@ -16,15 +16,33 @@
 
 """Entry point for the Google Analytics MCP server."""
 
-from analytics_mcp.coordinator import mcp
+import asyncio
+
+from analytics_mcp.coordinator import mcp, shutdown
+from analytics_mcp.tools.utils import resolve_credentials
 
 # The following imports are necessary to register the tools with the `mcp`
 # object, even though they are not directly used in this file.
 # The `# noqa: F401` comment tells the linter to ignore the "unused import"
 # warning.
+from analytics_mcp.tools import diagnostics  # noqa: F401
 from analytics_mcp.tools.admin import info  # noqa: F401
 from analytics_mcp.tools.reporting import realtime  # noqa: F401
 from analytics_mcp.tools.reporting import core  # noqa: F401
+from analytics_mcp.tools.reporting import analysis  # noqa: F401
+from analytics_mcp.tools.reporting import export  # noqa: F401
+
+
+async def _run_stdio_server() -> None:
+    """Runs the server over stdio, then releases long-lived resources."""
+    # Resolves the credentials while the client connects, so that the first
+    # tool call doesn't block the event loop on them.
+    credentials = asyncio.create_task(resolve_credentials())
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        await shutdown()
+        await credentials
 
 
 def run_server() -> None:
@@ -32,7 +50,7 @@ def run_server() -> None:
 
     Serves as the entrypoint for the 'runmcp' command.
     """
-    mcp.run()
+    asyncio.run(_run_stdio_server())
 
 
 if __name__ == "__main__":
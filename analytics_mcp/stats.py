@@ -0,0 +1,39 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Registry of runtime statistics reported by the server's components.
+
+Components register a provider function under a unique name, and the
+`get_server_stats` tool returns a snapshot of every provider's output.
+"""
+
+from typing import Any, Callable, Dict
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_stats_provider(
+    name: str, provider: Callable[[], Dict[str, Any]]
+) -> None:
+    """Registers a function that returns the current stats of a component.
+
+    Registering a provider under an existing name replaces the previous
+    provider.
+    """
+    _providers[name] = provider
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Returns the current stats of every registered component."""
+    return {name: provider() for name, provider in sorted(_providers.items())}
@@ -0,0 +1,358 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cached directory of the user's accounts and properties.
+
+The directory is built from the Admin API's account summaries and indexes
+accounts and properties by ID, by normalized display name and by parent
+account. It's refreshed in the background, so lookups don't page through the
+account summaries again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import difflib
+import functools
+import inspect
+import logging
+import re
+import time
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from analytics_mcp import config, stats
+from analytics_mcp.coordinator import on_shutdown
+from analytics_mcp.tools import utils
+from analytics_mcp.tools.calls import call_api
+from analytics_mcp.tools.utils import create_admin_api_client, proto_to_dict
+
+_logger = logging.getLogger(__name__)
+
+# How often the directory is rebuilt from the account summaries.
+REFRESH_SECONDS = config.get_float("DIRECTORY_REFRESH_SECONDS", 900.0)
+
+# Delay before retrying a failed background refresh.
+_RETRY_DELAY_SECONDS = 60.0
+
+# The minimum similarity of a fuzzy display name match, between 0 and 1.
+_FUZZY_CUTOFF = 0.6
+
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+# Kinds of display name matches, from best to worst.
+EXACT = "exact"
+PREFIX = "prefix"
+FUZZY = "fuzzy"
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a display name to ignore case, accents and punctuation."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALPHANUMERIC.sub(" ", stripped).strip()
+
+
+def _resource_id(resource_name: str) -> str:
+    """Returns the ID at the end of a resource name like `properties/123`."""
+    return resource_name.rsplit("/", 1)[-1]
+
+
+class Directory:
+    """An immutable index of accounts and properties.
+
+    Each account and property is represented by a dictionary with its `id`,
+    resource `name` and `display_name`. Properties also have their `account`
+    resource name, `account_display_name`, `parent` and `property_type`.
+    """
+
+    def __init__(self, summaries: List[Dict[str, Any]]) -> None:
+        """Builds the indexes from the dictionary form of account summaries."""
+        self.summaries = summaries
+        self.accounts: Dict[str, Dict[str, Any]] = {}
+        self.properties: Dict[str, Dict[str, Any]] = {}
+        self._properties_by_account: Dict[str, List[Dict[str, Any]]] = {}
+        self._properties_by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for summary in summaries:
+            account = {
+                "id": _resource_id(summary["account"]),
+                "name": summary["account"],
+                "display_name": summary["display_name"],
+            }
+            self.accounts[account["id"]] = account
+            account_properties = self._properties_by_account.setdefault(
+                account["name"], []
+            )
+            for property_summary in summary["property_summaries"]:
+                entry = {
+                    "id": _resource_id(property_summary["property"]),
+                    "name": property_summary["property"],
+                    "display_name": property_summary["display_name"],
+                    "property_type": property_summary["property_type"],
+                    "parent": property_summary["parent"],
+                    "account": account["name"],
+                    "account_display_name": account["display_name"],
+                }
+                self.properties[entry["id"]] = entry
+                account_properties.append(entry)
+                self._properties_by_name.setdefault(
+                    normalize_name(entry["display_name"]), []
+                ).append(entry)
+        # Sorted normalized display names, used for prefix search.
+        self._sorted_names = sorted(self._properties_by_name)
+
+    def properties_of_account(self, account_id: str) -> List[Dict[str, Any]]:
+        """Returns the properties of an account, given its ID or name."""
+        account_rn = f"accounts/{_resource_id(str(account_id))}"
+        return self._properties_by_account.get(account_rn, [])
+
+    def find_properties(
+        self, query: str, limit: int = 10
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns the properties whose display names match a query.
+
+        Returns exact matches, then prefix matches, then fuzzy matches, each
+        with the kind of match.
+
+        Args:
+            query: The display name or the start of it. Case, accents and
+              punctuation are ignored.
+            limit: The maximum number of properties to return.
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        matches = [
+            (EXACT, entry)
+            for entry in self._properties_by_name.get(normalized, [])
+        ]
+        start = bisect.bisect_left(self._sorted_names, normalized)
+        for name in self._sorted_names[start:]:
+            if len(matches) >= limit or not name.startswith(normalized):
+                break
+            if name != normalized:
+                matches.extend(
+                    (PREFIX, entry) for entry in self._properties_by_name[name]
+                )
+        if len(matches) < limit:
+            matched = {entry["id"] for _, entry in matches}
+            for name in difflib.get_close_matches(
+                normalized, self._sorted_names, n=limit, cutoff=_FUZZY_CUTOFF
+            ):
+                matches.extend(
+                    (FUZZY, entry)
+                    for entry in self._properties_by_name[name]
+                    if entry["id"] not in matched
+                )
+        return matches[:limit]
+
+    def resolve_property(self, display_name: str) -> str:
+        """Returns the resource name of the property with a display name.
+
+        Raises:
+            ValueError: If no property, or more than one property, has the
+              display name.
+        """
+        exact = self._properties_by_name.get(normalize_name(display_name), [])
+        if len(exact) == 1:
+            return exact[0]["name"]
+        candidates = exact or [
+            entry for _, entry in self.find_properties(display_name, limit=5)
+        ]
+        described = ", ".join(
+            f"{entry['display_name']!r} ({entry['name']}, in account "
+            f"{entry['account_display_name']!r})"
+            for entry in candidates[:5]
+        )
+        if exact:
+            raise ValueError(
+                f"More than one property is named {display_name!r}: "
+                f"{described}. Use the property ID instead."
+            )
+        raise ValueError(
+            f"No property is named {display_name!r}."
+            + (f" Similar properties: {described}." if described else "")
+        )
+
+
+async def _list_account_summaries() -> List[Dict[str, Any]]:
+    """Returns the dictionary form of every account summary."""
+
+    async def list_all_pages(timeout: float | None) -> List[Dict[str, Any]]:
+        # Uses an async list comprehension so the pager returned by
+        # list_account_summaries retrieves all pages.
+        summary_pager = await create_admin_api_client().list_account_summaries(
+            timeout=timeout, retry=None
+        )
+        return [
+            proto_to_dict(summary_page) async for summary_page in summary_pager
+        ]
+
+    return await call_api("list_account_summaries", list_all_pages)
+
+
+class PropertyDirectory:
+    """Keeps a `Directory` of the user's accounts and properties up to date.
+
+    The directory is loaded on first use. Once loaded, it's rebuilt in the
+    background every `refresh_seconds`. Concurrent loads share a single
+    load.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float,
+        list_summaries: Callable[
+            [], Awaitable[List[Dict[str, Any]]]
+        ] = _list_account_summaries,
+    ) -> None:
+        """Initializes the directory.
+
+        Args:
+            refresh_seconds: How often to rebuild the directory.
+            list_summaries: Async function that returns the dictionary form
+              of every account summary.
+        """
+        self._refresh_seconds = refresh_seconds
+        self._list_summaries = list_summaries
+        self._directory: Directory | None = None
+        self._loaded_at = 0.0
+        self._load_task: asyncio.Task | None = None
+        self._background_task: asyncio.Task | None = None
+        self._loads = 0
+        self._load_failures = 0
+        self._lookups = 0
+
+    @property
+    def current(self) -> Directory | None:
+        """The directory as last loaded, or None if it hasn't loaded yet."""
+        return self._directory
+
+    async def _load(self) -> Directory:
+        try:
+            directory = Directory(await self._list_summaries())
+        except Exception:
+            self._load_failures += 1
+            raise
+        self._directory = directory
+        self._loaded_at = time.monotonic()
+        self._loads += 1
+        self._start_background_refresh()
+        return directory
+
+    async def refresh(self) -> Directory:
+        """Rebuilds the directory, or waits for a rebuild in progress."""
+        if self._load_task is None or self._load_task.done():
+            self._load_task = asyncio.create_task(self._load())
+        return await asyncio.shield(self._load_task)
+
+    async def get(self) -> Directory:
+        """Returns the directory, loading it if it hasn't loaded yet."""
+        self._lookups += 1
+        if self._directory is None:
+            return await self.refresh()
+        return self._directory
+
+    async def _refresh_periodically(self) -> None:
+        """Rebuilds the directory every `refresh_seconds` until cancelled."""
+        while True:
+            delay = self._refresh_seconds - (time.monotonic() - self._loaded_at)
+            await asyncio.sleep(max(0.0, delay))
+            try:
+                await self.refresh()
+            except Exception:
+                _logger.warning(
+                    "Background directory refresh failed. Retrying in %s "
+                    "seconds.",
+                    _RETRY_DELAY_SECONDS,
+                    exc_info=True,
+                )
+                await asyncio.sleep(_RETRY_DELAY_SECONDS)
+
+    def _start_background_refresh(self) -> None:
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.create_task(
+                self._refresh_periodically()
+            )
+
+    async def stop(self) -> None:
+        """Stops the background refresh task."""
+        task = self._background_task
+        self._background_task = None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the directory's size, age and load counters."""
+        directory = self._directory
+        return {
+            "accounts": len(directory.accounts) if directory else 0,
+            "properties": len(directory.properties) if directory else 0,
+            "age_seconds": (
+                round(time.monotonic() - self._loaded_at, 1)
+                if directory
+                else None
+            ),
+            "loads": self._loads,
+            "load_failures": self._load_failures,
+            "lookups": self._lookups,
+        }
+
+
+property_directory = PropertyDirectory(REFRESH_SECONDS)
+stats.register_stats_provider("property_directory", property_directory.stats)
+on_shutdown(property_directory.stop)
+
+
+def _resolve_display_name(display_name: str) -> str:
+    """Resolves a property display name using the loaded directory."""
+    directory = property_directory.current
+    if directory is None:
+        raise ValueError(
+            f"Invalid property ID: {display_name}. Property names can only "
+            "be used once the account directory has loaded. Use the "
+            "`search_properties` tool to find the property ID."
+        )
+    return directory.resolve_property(display_name)
+
+
+utils.register_property_name_resolver(_resolve_display_name)
+
+
+def accepts_property_names(function):
+    """Decorates a tool so that its `property_id` may be a display name.
+
+    Loads the directory before the tool runs if `property_id` isn't a
+    property ID, so that `construct_property_rn` can resolve the name.
+    """
+
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+        property_id = arguments.get("property_id")
+        if isinstance(property_id, str) and not utils.is_property_id(
+            property_id
+        ):
+            await property_directory.get()
+        return await function(*args, **kwargs)
+
+    return wrapper
@@ -14,31 +14,92 @@
 
 """Tools for gathering Google Analytics account and property information."""
 
+from __future__ import annotations
+
 from typing import Any, Dict, List
 
 from analytics_mcp.coordinator import mcp
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.admin.directory import (
+    accepts_property_names,
+    property_directory,
+)
+from analytics_mcp.tools.calls import call_api, with_deadline
 from analytics_mcp.tools.utils import (
     construct_property_rn,
     create_admin_api_client,
     proto_to_dict,
 )
-from google.analytics import admin_v1beta
+
+admin_v1beta = lazy_import("google.analytics.admin_v1beta")
 
 
 @mcp.tool()
-async def get_account_summaries() -> List[Dict[str, Any]]:
-    """Retrieves information about the user's Google Analytics accounts and properties."""
+@with_deadline()
+async def get_account_summaries(refresh: bool = False) -> List[Dict[str, Any]]:
+    """Retrieves information about the user's Google Analytics accounts and properties.
+
+    The summaries are cached and refreshed in the background every few
+    minutes. To find a property by name, use `search_properties` instead.
+
+    Args:
+        refresh: Whether to reload the summaries from the Admin API instead
+          of returning the cached summaries.
+    """
+    if refresh:
+        return (await property_directory.refresh()).summaries
+    return (await property_directory.get()).summaries
+
 
-    # Uses an async list comprehension so the pager returned by
-    # list_account_summaries retrieves all pages.
-    summary_pager = await create_admin_api_client().list_account_summaries()
-    all_pages = [
-        proto_to_dict(summary_page) async for summary_page in summary_pager
-    ]
-    return all_pages
+@mcp.tool(title="Finds Google Analytics properties by name or account")
+@with_deadline()
+async def search_properties(
+    query: str = None, account_id: int | str = None, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """Finds the user's properties by display name or by parent account.
+
+    Matching ignores case, accents and punctuation. Exact matches are
+    returned first, followed by properties whose names start with the query,
+    followed by properties with similar names.
+
+    Args:
+        query: The property's display name or the start of it. If omitted,
+          returns the properties of `account_id`.
+        account_id: The ID of an account, as a number or a string starting
+          with 'accounts/'. If given, only its properties are returned.
+        limit: The maximum number of properties to return.
+
+    Returns:
+        A list of properties. Each property has its `id`, resource `name`,
+        `display_name`, `property_type`, `parent`, the resource name and
+        display name of its `account`, and, if `query` was given, the kind
+        of `match`: "exact", "prefix" or "fuzzy".
+    """
+    if query is None and account_id is None:
+        raise ValueError("Provide a query, an account_id, or both.")
+    directory = await property_directory.get()
+    if query is None:
+        return directory.properties_of_account(account_id)[:limit]
+    account_rn = (
+        None
+        if account_id is None
+        else f"accounts/{str(account_id).split('/')[-1]}"
+    )
+    # Searches without a limit when filtering by account, so that matches in
+    # other accounts don't crowd out the account's properties.
+    matches = directory.find_properties(
+        query, limit=len(directory.properties) if account_rn else limit
+    )
+    return [
+        {**entry, "match": kind}
+        for kind, entry in matches
+        if account_rn is None or entry["account"] == account_rn
+    ][:limit]
 
 
 @mcp.tool(title="List links to Google Ads accounts")
+@with_deadline()
+@accepts_property_names
 async def list_google_ads_links(property_id: int | str) -> List[Dict[str, Any]]:
     """Returns a list of links to Google Ads accounts for a property.
 
@@ -46,30 +107,41 @@ async def list_google_ads_links(property_id: int | str) -> List[Dict[str, Any]]:
         property_id: The Google Analytics property ID. Accepted formats are:
           - A number
           - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
     """
     request = admin_v1beta.ListGoogleAdsLinksRequest(
         parent=construct_property_rn(property_id)
     )
-    # Uses an async list comprehension so the pager returned by
-    # list_google_ads_links retrieves all pages.
-    links_pager = await create_admin_api_client().list_google_ads_links(
-        request=request
-    )
-    all_pages = [proto_to_dict(link_page) async for link_page in links_pager]
-    return all_pages
+
+    async def list_all_pages(timeout: float | None) -> List[Dict[str, Any]]:
+        # Uses an async list comprehension so the pager returned by
+        # list_google_ads_links retrieves all pages.
+        links_pager = await create_admin_api_client().list_google_ads_links(
+            request=request, timeout=timeout, retry=None
+        )
+        return [proto_to_dict(link_page) async for link_page in links_pager]
+
+    return await call_api("list_google_ads_links", list_all_pages)
 
 
 @mcp.tool(title="Gets details about a property")
+@with_deadline()
+@accepts_property_names
 async def get_property_details(property_id: int | str) -> Dict[str, Any]:
     """Returns details about a property.
     Args:
         property_id: The Google Analytics property ID. Accepted formats are:
           - A number
           - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
     """
-    client = create_admin_api_client()
     request = admin_v1beta.GetPropertyRequest(
         name=construct_property_rn(property_id)
     )
-    response = await client.get_property(request=request)
+    response = await call_api(
+        "get_property",
+        lambda timeout: create_admin_api_client().get_property(
+            request=request, timeout=timeout, retry=None
+        ),
+    )
     return proto_to_dict(response)
@@ -0,0 +1,312 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Retries, deadlines and hedging shared by every Google Analytics API call.
+
+Each tool runs under a deadline, and every API call made by the tool receives
+the time left before the deadline as its gRPC timeout. Calls that fail with a
+retryable error are retried with jittered exponential backoff while time
+remains. If hedging is enabled, a read that takes longer than the method's
+95th percentile latency is sent a second time, and the first response wins.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import functools
+import logging
+import random
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    TypeVar,
+)
+
+from analytics_mcp import config, stats
+from analytics_mcp.lazy import lazy_import
+
+exceptions = lazy_import("google.api_core.exceptions")
+
+_logger = logging.getLogger(__name__)
+
+
+# The deadline for tools that don't set their own.
+DEFAULT_DEADLINE_SECONDS = config.get_float("CALL_DEADLINE_SECONDS", 60.0)
+
+# The number of latency samples kept for each method.
+_LATENCY_SAMPLES = 200
+
+# The deadline of the current tool call, as a `time.monotonic()` value.
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "analytics_mcp_deadline", default=None
+)
+
+_T = TypeVar("_T")
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Sets the deadline for API calls made in the block.
+
+    A deadline can't extend the deadline of an enclosing block.
+    """
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(new_deadline, current)
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> float | None:
+    """Returns the time left before the current deadline, if there is one."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def with_deadline(seconds: float | None = None):
+    """Decorates a tool so that it runs under a deadline.
+
+    The deadline can be overridden with the
+    `ANALYTICS_MCP_<TOOL NAME>_DEADLINE_SECONDS` setting, such as
+    `ANALYTICS_MCP_RUN_REPORT_DEADLINE_SECONDS`.
+
+    Args:
+        seconds: The tool's default deadline. Defaults to
+          `ANALYTICS_MCP_CALL_DEADLINE_SECONDS`.
+    """
+
+    def decorator(function: Callable[..., Awaitable[_T]]):
+        name = function.__name__
+        tool_seconds = config.get_float(
+            f"{name.upper()}_DEADLINE_SECONDS",
+            DEFAULT_DEADLINE_SECONDS if seconds is None else seconds,
+        )
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs) -> _T:
+            with deadline(tool_seconds):
+                try:
+                    return await asyncio.wait_for(
+                        function(*args, **kwargs), tool_seconds
+                    )
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"{name} didn't finish within {tool_seconds:g} "
+                        "seconds."
+                    ) from None
+
+        return wrapper
+
+    return decorator
+
+
+class ApiCaller:
+    """Makes API calls with retries, deadlines and optional hedging."""
+
+    def __init__(
+        self,
+        max_attempts: int,
+        initial_backoff_seconds: float,
+        max_backoff_seconds: float,
+        backoff_multiplier: float = 2.0,
+        hedging: bool = False,
+        hedge_min_samples: int = 20,
+    ) -> None:
+        """Initializes the caller.
+
+        Args:
+            max_attempts: The maximum number of attempts for a call,
+              including the first.
+            initial_backoff_seconds: The upper bound of the delay before the
+              first retry.
+            max_backoff_seconds: The upper bound of the delay before any
+              retry.
+            backoff_multiplier: How much the upper bound of the delay grows
+              after each retry.
+            hedging: Whether to hedge idempotent calls.
+            hedge_min_samples: The number of latency samples a method needs
+              before its calls are hedged.
+        """
+        self._max_attempts = max_attempts
+        self._initial_backoff_seconds = initial_backoff_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self._backoff_multiplier = backoff_multiplier
+        self._hedging = hedging
+        self._hedge_min_samples = hedge_min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._calls = 0
+        self._retries = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._failures = 0
+
+    def _backoff(self, retry: int) -> float:
+        """Returns the delay before a retry, with full jitter."""
+        ceiling = min(
+            self._max_backoff_seconds,
+            self._initial_backoff_seconds
+            * self._backoff_multiplier ** (retry - 1),
+        )
+        return random.uniform(0, ceiling)
+
+    def _hedge_delay(self, method: str) -> float | None:
+        """Returns the method's 95th percentile latency, if it's known."""
+        samples = self._latencies.get(method)
+        if not samples or len(samples) < self._hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def _attempt(
+        self, method: str, call: Callable[[float | None], Awaitable[_T]]
+    ) -> _T:
+        """Makes a single attempt and records its latency."""
+        timeout = remaining_seconds()
+        if timeout is not None and timeout <= 0:
+            raise exceptions.DeadlineExceeded(
+                f"The deadline passed before calling {method}."
+            )
+        start = time.monotonic()
+        result = await call(timeout)
+        samples = self._latencies.setdefault(
+            method, collections.deque(maxlen=_LATENCY_SAMPLES)
+        )
+        samples.append(time.monotonic() - start)
+        return result
+
+    async def _hedged_attempt(
+        self, method: str, call: Callable[[float | None], Awaitable[_T]]
+    ) -> _T:
+        """Makes an attempt, and a second one if the first is slow."""
+        hedge_delay = self._hedge_delay(method)
+        primary = asyncio.ensure_future(self._attempt(method, call))
+        tasks = [primary]
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self._hedges += 1
+                    tasks.append(
+                        asyncio.ensure_future(self._attempt(method, call))
+                    )
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._hedge_wins += 1
+                        return task.result()
+                if not pending:
+                    # Every attempt failed.
+                    return done.pop().result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(
+        self,
+        method: str,
+        call: Callable[[float | None], Awaitable[_T]],
+        idempotent: bool = True,
+    ) -> _T:
+        """Makes an API call with retries.
+
+        Args:
+            method: The name of the API method, used to track its latency.
+            call: Async function that makes the call. It receives the gRPC
+              timeout in seconds, or None if there's no deadline.
+            idempotent: Whether the call can be hedged.
+
+        Raises:
+            Any error raised by the last attempt.
+        """
+        self._calls += 1
+        if self._hedging and idempotent:
+            attempt = self._hedged_attempt
+        else:
+            attempt = self._attempt
+        retry = 0
+        while True:
+            try:
+                return await attempt(method, call)
+            # Retries UNAVAILABLE and RESOURCE_EXHAUSTED errors.
+            except (
+                exceptions.ServiceUnavailable,
+                exceptions.ResourceExhausted,
+            ) as e:
+                retry += 1
+                delay = self._backoff(retry)
+                remaining = remaining_seconds()
+                if retry >= self._max_attempts or (
+                    remaining is not None and delay >= remaining
+                ):
+                    self._failures += 1
+                    raise
+                self._retries += 1
+                _logger.info("Retrying %s in %.2fs after %s", method, delay, e)
+                await asyncio.sleep(delay)
+            except exceptions.GoogleAPICallError:
+                self._failures += 1
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of calls, retries, hedges and failures."""
+        return {
+            "calls": self._calls,
+            "retries": self._retries,
+            "hedges": self._hedges,
+            "hedge_wins": self._hedge_wins,
+            "failures": self._failures,
+            "p95_latency_ms": {
+                method: round(delay * 1000, 1)
+                for method in sorted(self._latencies)
+                if (delay := self._hedge_delay(method)) is not None
+            },
+        }
+
+
+api_caller = ApiCaller(
+    max_attempts=config.get_int("RETRY_MAX_ATTEMPTS", 4),
+    initial_backoff_seconds=config.get_float(
+        "RETRY_INITIAL_BACKOFF_SECONDS", 0.25
+    ),
+    max_backoff_seconds=config.get_float("RETRY_MAX_BACKOFF_SECONDS", 8.0),
+    hedging=config.get_bool("HEDGE_REQUESTS", False),
+)
+stats.register_stats_provider("api_calls", api_caller.stats)
+
+
+async def call_api(
+    method: str,
+    call: Callable[[float | None], Awaitable[_T]],
+    idempotent: bool = True,
+) -> _T:
+    """Makes an API call with the shared caller. See `ApiCaller.call`."""
+    return await api_caller.call(method, call, idempotent=idempotent)
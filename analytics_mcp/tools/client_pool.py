@@ -0,0 +1,197 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A pool of long-lived API clients shared across tool calls."""
+
+import asyncio
+import inspect
+import logging
+import threading
+from typing import Any, Callable, Dict, Generic, List, Set, TypeVar
+
+ClientT = TypeVar("ClientT")
+
+_logger = logging.getLogger(__name__)
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    """Returns the running event loop, or None if there isn't one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+async def _close_clients(clients: List[Any]) -> None:
+    """Closes the transports of clients, logging any failure."""
+    for client in clients:
+        try:
+            result = client.transport.close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            _logger.debug("Failed to close a pooled client", exc_info=True)
+
+
+class ClientPool(Generic[ClientT]):
+    """A fixed-size pool of API clients that hands out clients round-robin.
+
+    Each client owns a gRPC channel, so sharing clients across tool calls
+    avoids a new channel, TLS handshake and credentials lookup per call.
+    Clients are created lazily until the pool is full, after which existing
+    clients are reused.
+
+    Async gRPC channels are bound to the event loop that created them, so the
+    pool closes and discards its clients if it's used from a different event
+    loop.
+
+    The pool is safe to use from concurrent asyncio tasks and from multiple
+    threads. Clients are created outside the pool's lock, so a slow factory
+    doesn't block other callers that reuse existing clients.
+    """
+
+    def __init__(
+        self, name: str, factory: Callable[[], ClientT], size: int
+    ) -> None:
+        """Initializes the pool.
+
+        Args:
+            name: The name of the pool, used in stats and error messages.
+            factory: A function that returns a new client.
+            size: The maximum number of clients in the pool.
+
+        Raises:
+            ValueError: If size is not a positive integer.
+        """
+        if size < 1:
+            raise ValueError(
+                f"Invalid size for client pool {name}: {size}. "
+                "Size must be a positive integer."
+            )
+        self._name = name
+        self._factory = factory
+        self._size = size
+        self._lock = threading.Lock()
+        # Notified when a client created outside the lock is added.
+        self._created_client = threading.Condition(self._lock)
+        self._clients: List[ClientT] = []
+        # The number of clients being created outside the lock.
+        self._creating = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._next_index = 0
+        self._created = 0
+        self._reused = 0
+        # Tasks closing discarded clients, kept so they aren't collected.
+        self._closing: Set[asyncio.Future] = set()
+
+    @property
+    def name(self) -> str:
+        """The name of the pool."""
+        return self._name
+
+    def get(self) -> ClientT:
+        """Returns a client, creating one if the pool isn't full yet."""
+        loop = _running_loop()
+        discarded: List[ClientT] = []
+        with self._lock:
+            if self._clients and self._loop is not loop:
+                # The clients' channels belong to another event loop and can't
+                # be used from this one.
+                discarded, old_loop = self._clients, self._loop
+                self._clients = []
+                self._next_index = 0
+            self._loop = loop
+            while not self._clients and self._creating >= self._size:
+                # Every slot is taken by a client another thread is creating.
+                self._created_client.wait()
+            create = len(self._clients) + self._creating < self._size
+            if create:
+                self._creating += 1
+            else:
+                client = self._clients[self._next_index % len(self._clients)]
+                self._next_index += 1
+                self._reused += 1
+        if discarded:
+            self._discard(discarded, old_loop, loop)
+        if create:
+            client = self._create(loop)
+        return client
+
+    def _create(self, loop: asyncio.AbstractEventLoop | None) -> ClientT:
+        """Creates a client for a reserved slot, and adds it to the pool."""
+        try:
+            client = self._factory()
+        except BaseException:
+            with self._lock:
+                self._creating -= 1
+                self._created_client.notify_all()
+            raise
+        with self._lock:
+            self._creating -= 1
+            if self._loop is loop:
+                self._clients.append(client)
+                self._created += 1
+            self._created_client.notify_all()
+        return client
+
+    def _discard(
+        self,
+        clients: List[ClientT],
+        old_loop: asyncio.AbstractEventLoop | None,
+        loop: asyncio.AbstractEventLoop | None,
+    ) -> None:
+        """Schedules the closing of clients created on another event loop.
+
+        The clients are closed on their own event loop if it's still
+        running, in another thread. Otherwise they're closed on the running
+        event loop, or on a new event loop if none is running.
+        """
+        if (
+            old_loop is not None
+            and old_loop.is_running()
+            and not old_loop.is_closed()
+        ):
+            asyncio.run_coroutine_threadsafe(_close_clients(clients), old_loop)
+        elif loop is not None:
+            task = loop.create_task(_close_clients(clients))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        else:
+            asyncio.run(_close_clients(clients))
+
+    async def close(self) -> None:
+        """Closes all clients in the pool.
+
+        The pool remains usable after it's closed, and creates new clients on
+        the next call to `get`.
+        """
+        with self._lock:
+            clients = self._clients
+            self._clients = []
+            self._next_index = 0
+            self._loop = None
+        for client in clients:
+            result = client.transport.close()
+            if inspect.isawaitable(result):
+                await result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of clients created and reused by the pool."""
+        with self._lock:
+            return {
+                "size": self._size,
+                "open_clients": len(self._clients),
+                "created": self._created,
+                "reused": self._reused,
+            }
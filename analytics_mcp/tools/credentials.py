@@ -0,0 +1,226 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide credentials with background token refresh."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+from analytics_mcp.lazy import lazy_import
+import google.auth
+import google.auth.credentials
+
+# Loads the `requests` library on the first refresh.
+google_auth_requests = lazy_import("google.auth.transport.requests")
+
+_logger = logging.getLogger(__name__)
+
+# Delay before retrying a failed background refresh.
+_RETRY_DELAY_SECONDS = 30.0
+
+
+class CredentialsManager:
+    """Resolves credentials once and keeps their access token fresh.
+
+    Token refreshes use synchronous HTTP, so they run in a worker thread
+    instead of on the event loop. A background task refreshes the token
+    `refresh_margin_seconds` before it expires, which keeps refreshes off the
+    request path. Concurrent calls to `refresh` share a single refresh.
+    """
+
+    def __init__(
+        self,
+        scopes: Sequence[str],
+        refresh_margin_seconds: float,
+        loader: Callable[
+            ..., Tuple[google.auth.credentials.Credentials, Any]
+        ] = google.auth.default,
+        request_factory: Callable[[], google.auth.transport.Request] = (
+            lambda: google_auth_requests.Request()
+        ),
+    ) -> None:
+        """Initializes the manager.
+
+        Args:
+            scopes: The OAuth scopes to request.
+            refresh_margin_seconds: How long before expiry to refresh the
+              token. Should exceed the google-auth refresh threshold of 225
+              seconds so that requests never refresh the token inline.
+            loader: A function with the signature of `google.auth.default`.
+            request_factory: A function that returns the HTTP request object
+              used for refreshes.
+        """
+        self._scopes = list(scopes)
+        self._refresh_margin = datetime.timedelta(
+            seconds=refresh_margin_seconds
+        )
+        self._loader = loader
+        self._request_factory = request_factory
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._credentials: google.auth.credentials.Credentials | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._background_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._collapsed_refreshes = 0
+        self._last_refresh_latency = 0.0
+        self._max_refresh_latency = 0.0
+        self._total_refresh_latency = 0.0
+
+    def get(self) -> google.auth.credentials.Credentials:
+        """Returns the credentials, resolving them on the first call."""
+        with self._lock:
+            if self._credentials is None:
+                credentials, _ = self._loader(scopes=self._scopes)
+                self._credentials = credentials
+            return self._credentials
+
+    async def resolve(self) -> google.auth.credentials.Credentials:
+        """Returns the credentials, resolving them in a worker thread.
+
+        Resolving the credentials can block on HTTP requests, such as to the
+        GCE metadata server, so it's kept off the event loop.
+        """
+        if self._credentials is not None:
+            return self._credentials
+        return await asyncio.to_thread(self.get)
+
+    def _seconds_until_refresh(self) -> float:
+        """Returns how long to wait before the next refresh is due."""
+        credentials = self.get()
+        if credentials.token is None:
+            return 0.0
+        if credentials.expiry is None:
+            # The token never expires, or the credentials don't report an
+            # expiry. Checks again after the retry delay.
+            return _RETRY_DELAY_SECONDS
+        refresh_at = credentials.expiry - self._refresh_margin
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return max(0.0, (refresh_at - now).total_seconds())
+
+    def _refresh_sync(self) -> None:
+        """Refreshes the token. Runs in a worker thread."""
+        credentials = self.get()
+        with self._refresh_lock:
+            start = time.perf_counter()
+            try:
+                credentials.refresh(self._request_factory())
+            except Exception:
+                self._refresh_failures += 1
+                raise
+            finally:
+                latency = time.perf_counter() - start
+                self._refreshes += 1
+                self._last_refresh_latency = latency
+                self._total_refresh_latency += latency
+                self._max_refresh_latency = max(
+                    self._max_refresh_latency, latency
+                )
+
+    def _bind_to_running_loop(self) -> None:
+        """Drops tasks that belong to an event loop other than this one."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._background_task = None
+            self._refresh_task = None
+
+    async def refresh(self) -> None:
+        """Refreshes the token in a worker thread.
+
+        If a refresh is already in progress, waits for it instead of starting
+        another one. Cancelling a waiter doesn't cancel the shared refresh.
+
+        Raises:
+            google.auth.exceptions.RefreshError: If the refresh fails.
+        """
+        self._bind_to_running_loop()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(
+                asyncio.to_thread(self._refresh_sync)
+            )
+        else:
+            self._collapsed_refreshes += 1
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh_periodically(self) -> None:
+        """Refreshes the token ahead of expiry until cancelled."""
+        while True:
+            await asyncio.sleep(self._seconds_until_refresh())
+            try:
+                await self.refresh()
+            except Exception:
+                _logger.warning(
+                    "Background token refresh failed. Retrying in %s seconds.",
+                    _RETRY_DELAY_SECONDS,
+                    exc_info=True,
+                )
+                await asyncio.sleep(_RETRY_DELAY_SECONDS)
+
+    def start_background_refresh(self) -> None:
+        """Starts the background refresh task if it isn't already running.
+
+        Does nothing if there's no running event loop.
+        """
+        try:
+            self._bind_to_running_loop()
+        except RuntimeError:
+            return
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.create_task(
+                self._refresh_periodically()
+            )
+
+    async def stop(self) -> None:
+        """Stops the background refresh task."""
+        task = self._background_task
+        self._background_task = None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters for token refreshes."""
+        average = (
+            self._total_refresh_latency / self._refreshes
+            if self._refreshes
+            else 0.0
+        )
+        return {
+            "resolved": self._credentials is not None,
+            "background_refresh_running": self._background_task is not None
+            and not self._background_task.done(),
+            "refreshes": self._refreshes,
+            "refresh_failures": self._refresh_failures,
+            "collapsed_refreshes": self._collapsed_refreshes,
+            "last_refresh_latency_ms": round(
+                self._last_refresh_latency * 1000, 3
+            ),
+            "average_refresh_latency_ms": round(average * 1000, 3),
+            "max_refresh_latency_ms": round(
+                self._max_refresh_latency * 1000, 3
+            ),
+        }
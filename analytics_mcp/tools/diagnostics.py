@@ -0,0 +1,52 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tools for inspecting the state of the MCP server itself."""
+
+from typing import Any, Dict
+
+from analytics_mcp import stats
+from analytics_mcp.coordinator import mcp
+from analytics_mcp.tools.admin.directory import accepts_property_names
+from analytics_mcp.tools.reporting.quota import quota_scheduler
+from analytics_mcp.tools.utils import construct_property_rn
+
+
+@mcp.tool(title="Gets runtime statistics for the MCP server")
+async def get_server_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns runtime statistics for the server's components.
+
+    The statistics are keyed by component, such as the pools of API clients,
+    and describe the server process rather than any Google Analytics data.
+    """
+    return stats.snapshot()
+
+
+@mcp.tool(title="Gets the server's view of a property's Data API quota")
+@accepts_property_names
+async def get_property_quota_status(property_id: int | str) -> Dict[str, Any]:
+    """Returns the Data API quota of a property as last reported by the API.
+
+    The server tracks the quota reported by every report it runs, and uses it
+    to delay or reject reports that would exhaust the property's tokens. The
+    result is keyed by quota category (`core` or `realtime`) and is empty if
+    the server hasn't run a report for the property yet.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+    """
+    return quota_scheduler.property_status(construct_property_rn(property_id))
@@ -0,0 +1,472 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Group-by, filter, top-N, pivot and derived metrics on stored results.
+
+Operations work a column at a time on the arrays of a `ResultTable` and
+return a new table. Metrics are only summed across rows if they're additive,
+such as `sessions` or `eventCount`. Summing a ratio such as `bounceRate`, or
+a count of users, across rows gives a wrong result, so grouping that would
+combine rows of such a metric is refused.
+"""
+
+from __future__ import annotations
+
+import array
+import ast
+import math
+import operator
+from typing import Any, Callable, Dict, List, Sequence
+
+from analytics_mcp.coordinator import mcp
+from analytics_mcp.tools.reporting.results import (
+    MetricColumn,
+    ResultTable,
+    new_metric_column,
+    result_store,
+)
+
+# The maximum number of columns created by a pivot.
+MAX_PIVOT_COLUMNS = 100
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda value, values: value in values,
+    "not_in": lambda value, values: value not in values,
+    "contains": lambda value, substring: substring in value,
+    "begins_with": lambda value, prefix: value.startswith(prefix),
+}
+
+_STRING_OPERATORS = frozenset({"contains", "begins_with"})
+
+
+def _safe_divide(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else math.nan
+
+
+_BINARY_OPERATORS: Dict[type, Callable[[float, float], float]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _safe_divide,
+}
+
+
+def _metric_column(table: ResultTable, name: str) -> MetricColumn:
+    try:
+        return table.metric_columns[table.metrics.index(name)]
+    except ValueError:
+        raise ValueError(
+            f"Unknown metric: {name!r}. The result's metrics are: "
+            f"{', '.join(table.metrics)}."
+        ) from None
+
+
+def _number(value: Any) -> int | float:
+    """Returns a metric value to compare with, keeping ints exact."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return float(value)
+
+
+def _column(table: ResultTable, name: str) -> Sequence[Any]:
+    if name in table.dimensions:
+        return table.dimension_columns[table.dimensions.index(name)]
+    if name in table.metrics:
+        return _metric_column(table, name)
+    raise ValueError(
+        f"Unknown field: {name!r}. The result's fields are: "
+        f"{', '.join(table.headers)}."
+    )
+
+
+def filter_rows(
+    table: ResultTable, conditions: List[Dict[str, Any]]
+) -> ResultTable:
+    """Returns the rows that match every condition.
+
+    Each condition is an object with a `field`, an `operator` and a `value`.
+    The operators are `==`, `!=`, `>`, `>=`, `<`, `<=`, `in` and `not_in`,
+    plus `contains` and `begins_with` for dimensions. The value of `in` and
+    `not_in` is a list.
+    """
+    matches = [True] * table.row_count
+    for condition in conditions:
+        field = condition.get("field")
+        op = condition.get("operator", "==")
+        value = condition.get("value")
+        compare = _COMPARISONS.get(op)
+        if compare is None:
+            raise ValueError(
+                f"Invalid operator: {op!r}. Must be one of "
+                f"{', '.join(_COMPARISONS)}."
+            )
+        column = _column(table, field)
+        if field in table.metrics:
+            if op in _STRING_OPERATORS:
+                raise ValueError(f"{op} can't be used with metric {field!r}.")
+            value = (
+                [_number(v) for v in value]
+                if op in ("in", "not_in")
+                else _number(value)
+            )
+        elif op not in ("in", "not_in"):
+            value = str(value)
+        else:
+            value = {str(v) for v in value}
+        matches = [
+            match and compare(cell, value)
+            for match, cell in zip(matches, column)
+        ]
+    return table.take([i for i, match in enumerate(matches) if match])
+
+
+def group_by(table: ResultTable, dimensions: List[str]) -> ResultTable:
+    """Groups rows by some of the dimensions and sums their metrics.
+
+    Missing metric values are ignored, and a group with no values is missing.
+
+    Raises:
+        ValueError: If a dimension is unknown, or if a non-additive metric
+          would be summed across more than one row.
+    """
+    for dimension in dimensions:
+        if dimension not in table.dimensions:
+            raise ValueError(
+                f"Unknown dimension: {dimension!r}. The result's dimensions "
+                f"are: {', '.join(table.dimensions)}."
+            )
+    key_columns = [
+        table.dimension_columns[table.dimensions.index(dimension)]
+        for dimension in dimensions
+    ]
+    groups: Dict[tuple, int] = {}
+    group_ids = [
+        groups.setdefault(key, len(groups))
+        for key in (
+            zip(*key_columns) if key_columns else [()] * table.row_count
+        )
+    ]
+    if len(groups) < table.row_count:
+        unsafe = [
+            metric
+            for metric, additive in zip(table.metrics, table.additive)
+            if not additive
+        ]
+        if unsafe:
+            raise ValueError(
+                f"Can't sum {', '.join(unsafe)} across rows, since "
+                "the sum of a ratio, average or user count isn't meaningful. "
+                "Use `metrics` to keep only additive metrics, such as "
+                "sessions or eventCount, and compute ratios of their sums "
+                "with `derived_metrics`, or run a new report with the "
+                "grouped dimensions."
+            )
+
+    metric_columns = []
+    for column in table.metric_columns:
+        sums = new_metric_column(
+            [math.nan] * len(groups), isinstance(column, list)
+        )
+        for group_id, value in zip(group_ids, column):
+            if value == value:  # Skips NaN.
+                total = sums[group_id]
+                sums[group_id] = value if total != total else total + value
+        metric_columns.append(sums)
+    keys = list(groups)
+    return ResultTable(
+        list(dimensions),
+        [[key[i] for key in keys] for i in range(len(dimensions))],
+        table.metrics,
+        metric_columns,
+        table.metric_types,
+        table.additive,
+    )
+
+
+def select_metrics(table: ResultTable, metrics: List[str]) -> ResultTable:
+    """Returns a table with only some of the metrics, in the given order."""
+    for metric in metrics:
+        _metric_column(table, metric)
+    indexes = [table.metrics.index(metric) for metric in metrics]
+    return ResultTable(
+        table.dimensions,
+        table.dimension_columns,
+        [table.metrics[i] for i in indexes],
+        [table.metric_columns[i] for i in indexes],
+        [table.metric_types[i] for i in indexes],
+        [table.additive[i] for i in indexes],
+    )
+
+
+def _evaluate(node: ast.AST, table: ResultTable) -> Sequence[float] | float:
+    """Evaluates an arithmetic expression on the metric columns."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, table)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return _metric_column(table, node.id)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        operand = _evaluate(node.operand, table)
+        if isinstance(operand, float):
+            return -operand
+        return array.array("d", map(operator.neg, operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        function = _BINARY_OPERATORS[type(node.op)]
+        left = _evaluate(node.left, table)
+        right = _evaluate(node.right, table)
+        if isinstance(left, float) and isinstance(right, float):
+            return function(left, right)
+        if isinstance(left, float):
+            left = [left] * table.row_count
+        if isinstance(right, float):
+            right = [right] * table.row_count
+        return array.array("d", map(function, left, right))
+    raise ValueError(
+        "Derived metric expressions may only contain metric names, numbers, "
+        "parentheses and the operators +, -, * and /."
+    )
+
+
+def derive_metrics(
+    table: ResultTable, derived_metrics: List[Dict[str, str]]
+) -> ResultTable:
+    """Adds metrics computed from the other metrics of each row.
+
+    Each derived metric is an object with a `name` and an `expression`, such
+    as {"name": "conversionRate", "expression": "keyEvents / sessions"}.
+    Division by zero gives a missing value. Derived metrics aren't additive.
+    """
+    metrics = list(table.metrics)
+    metric_columns = list(table.metric_columns)
+    metric_types = list(table.metric_types)
+    additive = list(table.additive)
+    for derived in derived_metrics:
+        name = derived.get("name")
+        expression = derived.get("expression")
+        if not name or not expression:
+            raise ValueError(
+                "Each derived metric must have a name and an expression."
+            )
+        if name in table.dimensions or name in metrics:
+            raise ValueError(f"A field named {name!r} already exists.")
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(
+                f"Invalid expression for {name!r}: {e.msg}."
+            ) from None
+        current = ResultTable(
+            table.dimensions,
+            table.dimension_columns,
+            metrics,
+            metric_columns,
+            metric_types,
+            additive,
+        )
+        values = _evaluate(tree, current)
+        if isinstance(values, float):
+            values = array.array("d", [values]) * table.row_count
+        metrics.append(name)
+        metric_columns.append(values)
+        metric_types.append("TYPE_FLOAT")
+        additive.append(False)
+    return ResultTable(
+        table.dimensions,
+        table.dimension_columns,
+        metrics,
+        metric_columns,
+        metric_types,
+        additive,
+    )
+
+
+def sort_rows(
+    table: ResultTable, order_bys: List[Dict[str, Any]]
+) -> ResultTable:
+    """Sorts rows by fields, each an object with a `field` and `desc`.
+
+    Missing metric values are sorted last.
+    """
+    indexes = list(range(table.row_count))
+    for order_by in reversed(order_bys):
+        field = order_by.get("field")
+        desc = bool(order_by.get("desc", False))
+        column = _column(table, field)
+        if field in table.metrics:
+            missing = math.inf if desc else -math.inf
+
+            def key(i, column=column, missing=missing):
+                value = column[i]
+                return -missing if value != value else value
+
+        else:
+            key = column.__getitem__
+        indexes.sort(key=key, reverse=desc)
+    return table.take(indexes)
+
+
+def pivot(
+    table: ResultTable,
+    dimension: str,
+    metric: str,
+    max_columns: int = MAX_PIVOT_COLUMNS,
+) -> ResultTable:
+    """Turns the values of a dimension into metric columns.
+
+    The result has a row for each combination of the other dimensions, and
+    one column per value of `dimension`, named `metric[value]`. Columns are
+    ordered by the sum of their values, largest first, and only the first
+    `max_columns` are kept.
+
+    Raises:
+        ValueError: If the pivot would sum a non-additive metric.
+    """
+    row_dimensions = [d for d in table.dimensions if d != dimension]
+    grouped = group_by(
+        select_metrics(table, [metric]), row_dimensions + [dimension]
+    )
+    values = grouped.metric_columns[0]
+    pivot_values = grouped.dimension_columns[-1]
+    row_keys = list(zip(*grouped.dimension_columns[:-1]))
+    column_totals: Dict[str, float] = {}
+    for pivot_value, value in zip(pivot_values, values):
+        if value == value:
+            column_totals[pivot_value] = (
+                column_totals.get(pivot_value, 0.0) + value
+            )
+        else:
+            column_totals.setdefault(pivot_value, 0.0)
+    columns = sorted(column_totals, key=column_totals.get, reverse=True)[
+        :max_columns
+    ]
+    column_indexes = {value: i for i, value in enumerate(columns)}
+    rows: Dict[tuple, int] = {}
+    for key in row_keys:
+        rows.setdefault(key, len(rows))
+    metric_columns = [
+        new_metric_column([math.nan] * len(rows), isinstance(values, list))
+        for _ in columns
+    ]
+    for key, pivot_value, value in zip(row_keys, pivot_values, values):
+        column_index = column_indexes.get(pivot_value)
+        if column_index is not None:
+            metric_columns[column_index][rows[key]] = value
+    row_list = list(rows)
+    return ResultTable(
+        row_dimensions,
+        [[key[i] for key in row_list] for i in range(len(row_dimensions))],
+        [f"{metric}[{value}]" for value in columns],
+        metric_columns,
+        [grouped.metric_types[0]] * len(columns),
+        [grouped.additive[0]] * len(columns),
+    )
+
+
+@mcp.tool(title="Analyze a stored report result without calling the API")
+async def analyze_result(
+    result_handle: str,
+    conditions: List[Dict[str, Any]] = None,
+    metrics: List[str] = None,
+    group_by_dimensions: List[str] = None,
+    derived_metrics: List[Dict[str, str]] = None,
+    pivot_dimension: str = None,
+    pivot_metric: str = None,
+    order_bys: List[Dict[str, Any]] = None,
+    limit: int = None,
+) -> Dict[str, Any]:
+    """Filters, groups, pivots or ranks a report that was already run.
+
+    Works on the result of an earlier `run_report` call, identified by the
+    `result_handle` in its response, without calling the API again. The
+    steps run in this order: filter, select metrics, group, derive metrics,
+    pivot, sort and limit. The response has a new `result_handle` for further
+    analysis.
+
+    Metrics are only summed across rows if they're additive, such as
+    `sessions`, `eventCount` or `totalRevenue`. Grouping or pivoting that
+    would sum a ratio, an average or a user count, such as `bounceRate` or
+    `activeUsers`, is refused. To get a ratio of grouped rows, group additive
+    metrics and compute the ratio with `derived_metrics`.
+
+    Args:
+        result_handle: The `result_handle` of an earlier result.
+        conditions: Conditions that rows must all match. Each condition is an
+          object with a `field`, an `operator` and a `value`, such as
+          {"field": "country", "operator": "in", "value": ["France", "Peru"]}
+          or {"field": "sessions", "operator": ">=", "value": 100}. The
+          operators are `==`, `!=`, `>`, `>=`, `<`, `<=`, `in`, `not_in`,
+          `contains` and `begins_with`.
+        metrics: The metrics to keep, in order. Defaults to every metric.
+        group_by_dimensions: The dimensions to keep. Rows with the same values
+          of these dimensions are combined, and their metrics summed. An
+          empty list sums every row.
+        derived_metrics: Metrics computed from each row's other metrics. Each
+          is an object with a `name` and an arithmetic `expression`, such as
+          {"name": "revenuePerSession",
+           "expression": "totalRevenue / sessions"}.
+        pivot_dimension: A dimension whose values become columns, named
+          `metric[value]`, with the values of `pivot_metric`.
+        pivot_metric: The metric shown in the pivot's columns.
+        order_bys: Fields to sort by, each an object with a `field` and an
+          optional `desc`, such as {"field": "sessions", "desc": true}.
+        limit: The maximum number of rows to return. Combine with
+          `order_bys` to get the top N rows.
+
+    Returns:
+        The `result_handle` of the new result, its `headers` and
+        `metric_types`, one list of values per header in `columns`, its
+        `row_count`, and a `warning` if the stored result has only some of
+        the report's rows.
+    """
+    table = source = await result_store.get_async(result_handle)
+    if conditions:
+        table = filter_rows(table, conditions)
+    if metrics:
+        table = select_metrics(table, metrics)
+    if group_by_dimensions is not None:
+        table = group_by(table, group_by_dimensions)
+    if derived_metrics:
+        table = derive_metrics(table, derived_metrics)
+    if pivot_dimension or pivot_metric:
+        if not (pivot_dimension and pivot_metric):
+            raise ValueError(
+                "pivot_dimension and pivot_metric must be used together."
+            )
+        table = pivot(table, pivot_dimension, pivot_metric)
+    if order_bys:
+        table = sort_rows(table, order_bys)
+    if limit is not None:
+        if limit < 0:
+            raise ValueError("limit must not be negative.")
+        table = table.take(range(min(limit, table.row_count)))
+    if source.truncated:
+        table.report_row_count = source.report_row_count
+        table.truncated = True
+    result = table.to_dict()
+    if table.truncated:
+        result["warning"] = (
+            "The stored result has only some of the report's "
+            f"{table.report_row_count} rows, so this analysis doesn't cover "
+            "the whole report. Run the report with `fetch_all_rows` to "
+            "analyze every row."
+        )
+    result["result_handle"] = result_store.put(table)
+    return result
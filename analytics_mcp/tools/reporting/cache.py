@@ -0,0 +1,249 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-memory cache of report responses keyed on canonicalized requests."""
+
+from __future__ import annotations
+
+import collections
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from analytics_mcp import config, stats
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.dates import property_today, resolve_date
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+_logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """An LRU cache of serialized responses bounded by their total size.
+
+    Each entry has its own expiry time. Values are stored as serialized bytes
+    so that callers can't mutate cached responses, and so that the size bound
+    reflects the actual memory used by the values.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initializes the cache.
+
+        Args:
+            max_bytes: The maximum total size of the cached values. A value of
+              0 disables the cache.
+        """
+        self._max_bytes = max_bytes
+        self._entries: collections.OrderedDict[bytes, Tuple[bytes, float]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores any values."""
+        return self._max_bytes > 0
+
+    def get(self, key: bytes) -> bytes | None:
+        """Returns the cached value for the key, or None if there isn't one."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: bytes, value: bytes, ttl_seconds: float) -> None:
+        """Caches the value, evicting the least recently used values if needed.
+
+        Values larger than the cache's maximum size aren't cached.
+        """
+        if ttl_seconds <= 0 or len(value) > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._bytes += len(value)
+            while self._bytes > self._max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Removes all values from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: bytes) -> None:
+        """Removes an entry. Must be called while holding the lock."""
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache's hit, miss and eviction counts and its size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+def _sort_key(message) -> bytes:
+    """Returns a stable sort key for a protobuf message."""
+    return message.SerializeToString(deterministic=True)
+
+
+def _normalize_filter_expression(expression) -> None:
+    """Normalizes a FilterExpression protobuf in place.
+
+    Sorts the operands of AND and OR groups and the values of IN list
+    filters, none of which affect the report's results.
+    """
+    kind = expression.WhichOneof("expr")
+    if kind in ("and_group", "or_group"):
+        group = getattr(expression, kind).expressions
+        for child in group:
+            _normalize_filter_expression(child)
+        ordered = sorted(group, key=_sort_key)
+        copies = [type(child)() for child in ordered]
+        for copy, child in zip(copies, ordered):
+            copy.CopyFrom(child)
+        del group[:]
+        group.extend(copies)
+    elif kind == "not_expression":
+        _normalize_filter_expression(expression.not_expression)
+    elif kind == "filter" and expression.filter.HasField("in_list_filter"):
+        values = expression.filter.in_list_filter.values
+        ordered_values = sorted(values)
+        del values[:]
+        values.extend(ordered_values)
+
+
+def canonical_request_key(
+    request: data_v1beta.RunReportRequest, today: datetime.date
+) -> bytes:
+    """Returns a cache key that's identical for equivalent report requests.
+
+    Relative dates are resolved to calendar dates using `today`, filter
+    operands whose order doesn't matter are sorted, and the request is
+    serialized deterministically. The order of dimensions, metrics, date
+    ranges and order bys is preserved since it determines the layout of the
+    response.
+
+    Args:
+        request: The report request.
+        today: The current date in the property's time zone.
+    """
+    canonical = data_v1beta.RunReportRequest.pb()()
+    canonical.CopyFrom(data_v1beta.RunReportRequest.pb(request))
+    for date_range in canonical.date_ranges:
+        date_range.start_date = resolve_date(
+            date_range.start_date, today
+        ).isoformat()
+        date_range.end_date = resolve_date(
+            date_range.end_date, today
+        ).isoformat()
+    if canonical.HasField("dimension_filter"):
+        _normalize_filter_expression(canonical.dimension_filter)
+    if canonical.HasField("metric_filter"):
+        _normalize_filter_expression(canonical.metric_filter)
+    return canonical.SerializeToString(deterministic=True)
+
+
+def is_historical(
+    request: data_v1beta.RunReportRequest, today: datetime.date
+) -> bool:
+    """Returns whether every date range of the request ends before today."""
+    return all(
+        resolve_date(date_range.end_date, today) < today
+        for date_range in request.date_ranges
+    )
+
+
+# Maximum total size of the cached report responses. 0 disables the cache.
+_MAX_BYTES = config.get_int("REPORT_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# How long to cache reports whose date ranges include today.
+_TTL_SECONDS = config.get_float("REPORT_CACHE_TTL_SECONDS", 60.0)
+
+# How long to cache reports whose date ranges all end before today.
+_HISTORICAL_TTL_SECONDS = config.get_float(
+    "REPORT_CACHE_HISTORICAL_TTL_SECONDS", 3600.0
+)
+
+report_cache = ResponseCache(_MAX_BYTES)
+stats.register_stats_provider("report_cache", report_cache.stats)
+
+
+async def cached_run_report(
+    request: data_v1beta.RunReportRequest,
+    run: Callable[
+        [data_v1beta.RunReportRequest],
+        Awaitable[data_v1beta.RunReportResponse],
+    ],
+) -> data_v1beta.RunReportResponse:
+    """Returns the report from the cache, or runs and caches it.
+
+    Args:
+        request: The report request.
+        run: Async function that runs the report using the Data API.
+    """
+    if not report_cache.enabled:
+        return await run(request)
+    try:
+        today = await property_today(request.property)
+        key = canonical_request_key(request, today)
+    except Exception:
+        # Skips the cache if the request can't be canonicalized, and leaves
+        # reporting any problem with the request to the Data API.
+        _logger.debug("Not caching report request", exc_info=True)
+        return await run(request)
+
+    cached = report_cache.get(key)
+    if cached is not None:
+        return data_v1beta.RunReportResponse.deserialize(cached)
+
+    response = await run(request)
+    ttl = (
+        _HISTORICAL_TTL_SECONDS
+        if is_historical(request, today)
+        else _TTL_SECONDS
+    )
+    report_cache.put(
+        key, data_v1beta.RunReportResponse.serialize(response), ttl
+    )
+    return response
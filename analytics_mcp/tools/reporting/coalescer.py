@@ -0,0 +1,188 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coalesces concurrent reports for the same property into batch calls."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from analytics_mcp.lazy import lazy_import
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+exceptions = lazy_import("google.api_core.exceptions")
+
+# The maximum number of reports the Data API accepts in a single
+# `batchRunReports` call.
+MAX_BATCH_SIZE = 5
+
+_Pending = List[Tuple["data_v1beta.RunReportRequest", asyncio.Future]]
+
+
+class ReportCoalescer:
+    """Packs concurrent `run_report` calls into `batchRunReports` calls.
+
+    The first report queued for a property starts a short window. Reports for
+    the same property that arrive during the window are sent with it in a
+    single batch call, which is sent early if it reaches `MAX_BATCH_SIZE`.
+    Each caller receives the response for its own report.
+
+    The API rejects a whole batch if any of its reports is invalid, so if a
+    batch fails with `InvalidArgument`, each of its reports is run on its
+    own and each caller receives its own report's outcome.
+    """
+
+    def __init__(
+        self,
+        run_report: Callable[
+            [data_v1beta.RunReportRequest],
+            Awaitable[data_v1beta.RunReportResponse],
+        ],
+        run_batch: Callable[
+            [data_v1beta.BatchRunReportsRequest],
+            Awaitable[data_v1beta.BatchRunReportsResponse],
+        ],
+        window_seconds: float,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        """Initializes the coalescer.
+
+        Args:
+            run_report: Async function that runs a single report. Used when
+              only one report is queued at the end of the window.
+            run_batch: Async function that runs a batch of reports.
+            window_seconds: How long to wait for more reports after the first
+              report for a property is queued.
+            max_batch_size: The maximum number of reports in a batch.
+        """
+        self._run_report = run_report
+        self._run_batch = run_batch
+        self._window_seconds = window_seconds
+        self._max_batch_size = max_batch_size
+        self._pending: Dict[str, _Pending] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._sends: Set[asyncio.Task] = set()
+        self._reports = 0
+        self._batches = 0
+        self._single_calls = 0
+        self._split_batches = 0
+
+    async def run_report(
+        self, request: data_v1beta.RunReportRequest
+    ) -> data_v1beta.RunReportResponse:
+        """Queues a report and returns its response once its batch is sent."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = (request, future)
+        pending = self._pending.setdefault(request.property, [])
+        pending.append(entry)
+        self._reports += 1
+        if len(pending) >= self._max_batch_size:
+            self._flush(request.property)
+        elif len(pending) == 1:
+            self._timers[request.property] = loop.call_later(
+                self._window_seconds, self._flush, request.property
+            )
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Drops the report if its batch hasn't been sent yet.
+            queued = self._pending.get(request.property)
+            if queued:
+                queued[:] = [e for e in queued if e is not entry]
+                if not queued:
+                    # Stops the window, so that the next report starts its
+                    # own window.
+                    del self._pending[request.property]
+                    timer = self._timers.pop(request.property, None)
+                    if timer is not None:
+                        timer.cancel()
+            raise
+
+    def _flush(self, property_rn: str) -> None:
+        """Sends the reports queued for a property."""
+        timer = self._timers.pop(property_rn, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(property_rn, [])
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(property_rn, batch))
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    async def _send(self, property_rn: str, batch: _Pending) -> None:
+        """Runs a batch of reports and resolves each caller's future."""
+        try:
+            if len(batch) == 1:
+                self._single_calls += 1
+                reports = [await self._run_report(batch[0][0])]
+            else:
+                self._batches += 1
+                response = await self._run_batch(
+                    data_v1beta.BatchRunReportsRequest(
+                        property=property_rn,
+                        requests=[request for request, _ in batch],
+                    )
+                )
+                reports = list(response.reports)
+                if len(reports) != len(batch):
+                    raise RuntimeError(
+                        f"Expected {len(batch)} reports in the batch "
+                        f"response, but received {len(reports)}."
+                    )
+        except exceptions.InvalidArgument:
+            self._split_batches += 1
+            await asyncio.gather(
+                *(self._send_one(request, future) for request, future in batch)
+            )
+            return
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), report in zip(batch, reports):
+            if not future.done():
+                future.set_result(report)
+
+    async def _send_one(
+        self, request: data_v1beta.RunReportRequest, future: asyncio.Future
+    ) -> None:
+        """Runs a report of a rejected batch and resolves its future."""
+        if future.done():
+            return
+        self._single_calls += 1
+        try:
+            report = await self._run_report(request)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(report)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of reports, batch calls and single calls.
+
+        `split_batches` counts the batches that were rejected as invalid and
+        whose reports were run on their own.
+        """
+        return {
+            "reports": self._reports,
+            "batch_calls": self._batches,
+            "single_calls": self._single_calls,
+            "split_batches": self._split_batches,
+        }
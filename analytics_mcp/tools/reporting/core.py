@@ -14,21 +14,61 @@
 
 """Tools for running core reports using the Data API."""
 
+from __future__ import annotations
+
+import asyncio
+import inspect
 from typing import Any, Dict, List
 
 from analytics_mcp.coordinator import mcp
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.admin.directory import accepts_property_names
+from analytics_mcp.tools.calls import with_deadline
+from analytics_mcp.tools.reporting import data_api
+from analytics_mcp.tools.reporting.formatting import (
+    COMPACT,
+    VERBOSE,
+    check_output_format,
+    format_pivot_response,
+    unchanged_response,
+)
+from analytics_mcp.tools.reporting.cache import cached_run_report
+from analytics_mcp.tools.reporting.coalescer import MAX_BATCH_SIZE
+from analytics_mcp.tools.reporting.dates import property_today
+from analytics_mcp.tools.reporting.fanout import (
+    resolve_properties,
+    run_for_properties,
+)
+from analytics_mcp.tools.reporting.materialize import (
+    is_materializable,
+    materialized_store,
+    run_report_materialized,
+)
 from analytics_mcp.tools.reporting.metadata import (
     get_date_ranges_hints,
     get_dimension_filter_hints,
     get_metric_filter_hints,
     get_order_bys_hints,
+    get_pivots_hints,
 )
-from analytics_mcp.tools.utils import (
-    construct_property_rn,
-    create_data_api_client,
-    proto_to_dict,
+from analytics_mcp.tools.reporting.offload import (
+    convert_async,
+    format_response_async,
 )
-from google.analytics import data_v1beta
+from analytics_mcp.tools.reporting.pagination import run_report_all_pages
+from analytics_mcp.tools.reporting.resources import is_large, summarize
+from analytics_mcp.tools.reporting.results import ResultTable, result_store
+from analytics_mcp.tools.reporting.sharding import run_report_sharded
+from analytics_mcp.tools.reporting.validation import (
+    validate_pivot_report_request,
+    validate_report_request,
+)
+from analytics_mcp.tools.utils import construct_property_rn
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+# The number of rows the Data API returns for a report without a limit.
+_DEFAULT_LIMIT = 10_000
 
 
 def _run_report_description() -> str:
@@ -79,6 +119,96 @@ def _run_report_description() -> str:
           """
 
 
+def build_run_report_request(
+    property_id: int | str,
+    date_ranges: List[Dict[str, str]],
+    dimensions: List[str],
+    metrics: List[str],
+    dimension_filter: Dict[str, Any] = None,
+    metric_filter: Dict[str, Any] = None,
+    order_bys: List[Dict[str, Any]] = None,
+    limit: int = None,
+    offset: int = None,
+    currency_code: str = None,
+    return_property_quota: bool = False,
+) -> data_v1beta.RunReportRequest:
+    """Returns a `RunReportRequest` built from `run_report` tool arguments.
+
+    See `run_report` for a description of the arguments.
+    """
+    request = data_v1beta.RunReportRequest(
+        property=construct_property_rn(property_id),
+        dimensions=[
+            data_v1beta.Dimension(name=dimension) for dimension in dimensions
+        ],
+        metrics=[data_v1beta.Metric(name=metric) for metric in metrics],
+        date_ranges=[data_v1beta.DateRange(dr) for dr in date_ranges],
+        return_property_quota=return_property_quota,
+    )
+
+    if dimension_filter:
+        request.dimension_filter = data_v1beta.FilterExpression(
+            dimension_filter
+        )
+
+    if metric_filter:
+        request.metric_filter = data_v1beta.FilterExpression(metric_filter)
+
+    if order_bys:
+        request.order_bys = [
+            data_v1beta.OrderBy(order_by) for order_by in order_bys
+        ]
+
+    if limit:
+        request.limit = limit
+    if offset:
+        request.offset = offset
+    if currency_code:
+        request.currency_code = currency_code
+
+    return request
+
+
+async def _run_report_page(
+    request: data_v1beta.RunReportRequest,
+) -> data_v1beta.RunReportResponse:
+    """Runs a single page of a report, using the response cache if possible."""
+    return await cached_run_report(request, data_api.run_report)
+
+
+async def _format_report(
+    response: data_v1beta.RunReportResponse,
+    output_format: str,
+    previous_fingerprint: str | None = None,
+) -> Dict[str, Any]:
+    """Stores a report's result and returns it, or its summary if it's large.
+
+    If the result's fingerprint is `previous_fingerprint`, returns only the
+    fingerprint and the result's handle.
+    """
+    row_count = len(data_v1beta.RunReportResponse.pb(response).rows)
+    if result_store.enabled and is_large(row_count):
+        # A large result is summarized rather than formatted, so only its
+        # table is built.
+        table = await convert_async(ResultTable.from_response, response)
+        result_handle = result_store.put(table)
+        if previous_fingerprint and table.fingerprint == previous_fingerprint:
+            result = unchanged_response(table.fingerprint)
+            result["result_handle"] = result_handle
+            return result
+        # A result that doesn't fit in the store is still only previewed.
+        return summarize(table, result_handle, response, output_format)
+    result = await format_response_async(response, output_format)
+    # The table of an inline result is only built if it's read later.
+    result_handle = result_store.put_response(response, result["fingerprint"])
+    if previous_fingerprint and result["fingerprint"] == previous_fingerprint:
+        result = unchanged_response(previous_fingerprint)
+    result["result_handle"] = result_handle
+    return result
+
+
+@with_deadline(120)
+@accepts_property_names
 async def run_report(
     property_id: int | str,
     date_ranges: List[Dict[str, str]],
@@ -91,6 +221,11 @@ async def run_report(
     offset: int = None,
     currency_code: str = None,
     return_property_quota: bool = False,
+    fetch_all_rows: bool = False,
+    max_rows: int = None,
+    shard_by: str = None,
+    output_format: str = VERBOSE,
+    previous_fingerprint: str = None,
 ) -> Dict[str, Any]:
     """Runs a Google Analytics Data API report.
 
@@ -101,10 +236,22 @@ async def run_report(
     format. The protocol buffers for the Data API are available at
     https://github.com/googleapis/googleapis/tree/master/google/analytics/data/v1beta.
 
+    The response's `result_handle` identifies the result for the
+    `analyze_result` tool, which can filter, group, pivot and rank the rows
+    without running the report again. If the report returns many rows, the
+    response is a summary with only the first rows, and the rest are read in
+    chunks from the resource in `chunks_uri`.
+
+    The response's `fingerprint` identifies the result's content. To poll a
+    report for changes, pass the last response's fingerprint as
+    `previous_fingerprint`: if the result hasn't changed, the response is
+    just `{"unchanged": true, "fingerprint": ...}` and the result's handle.
+
     Args:
         property_id: The Google Analytics property ID. Accepted formats are:
           - A number
           - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
         date_ranges: A list of date ranges
           (https://developers.google.com/analytics/devguides/reporting/data/v1/rest/v1beta/DateRange)
           to include in the report.
@@ -137,48 +284,353 @@ async def run_report(
           ISO4217 format, such as "AED", "USD", "JPY". If the field is empty, the
           report uses the property's default currency.
         return_property_quota: Whether to return property quota in the response.
+        fetch_all_rows: Whether to fetch every row of the report in a single
+          call instead of a single page. The pages are fetched concurrently
+          and merged in order. When set, `limit` is the size of each page
+          and `offset` is the first row to fetch.
+        max_rows: The maximum number of rows to return when `fetch_all_rows`
+          is set. The server also enforces its own maximum. If the report has
+          more rows, the response's `row_count` is larger than the number of
+          rows returned.
+        shard_by: Runs the report once per "day", "week" or "month" of each
+          date range and merges the results, which is faster for long date
+          ranges and reduces sampling. Only reports that include a `date`,
+          `dateHour` or `dateHourMinute` dimension, or whose metrics are all
+          counts or sums such as `sessions` or `eventCount`, can be sharded.
+          Every row is fetched, up to the server's maximum for all the
+          shards together, and `limit`, `offset` and `max_rows` apply to
+          the merged rows. The response's `sharding` object describes the
+          shards and lists the sampling metadata of any sampled shard.
+        output_format: The format of the response. Either "verbose", which
+          returns the report as the Data API's response message, or
+          "compact", which returns a list of `headers` plus one list of
+          values per column in `columns`, with metric values typed as numbers.
+          Use "compact" for large reports.
+        previous_fingerprint: The `fingerprint` of an earlier response to the
+          same report. If the result is unchanged, its rows aren't returned.
     """
-    request = data_v1beta.RunReportRequest(
+    check_output_format(output_format)
+    request = build_run_report_request(
+        property_id,
+        date_ranges,
+        dimensions,
+        metrics,
+        dimension_filter=dimension_filter,
+        metric_filter=metric_filter,
+        order_bys=order_bys,
+        limit=limit,
+        offset=offset,
+        currency_code=currency_code,
+        return_property_quota=return_property_quota,
+    )
+    await validate_report_request(request)
+
+    if shard_by:
+        today = await property_today(request.property)
+        response, sharding = await run_report_sharded(
+            _run_report_page, request, shard_by, today, max_rows=max_rows
+        )
+        result = await _format_report(
+            response, output_format, previous_fingerprint
+        )
+        result["sharding"] = sharding
+        return result
+
+    if materialized_store.enabled and is_materializable(request):
+        today = await property_today(request.property)
+        response = await run_report_materialized(
+            _run_report_page,
+            request,
+            today,
+            max_rows=max_rows if fetch_all_rows else limit or _DEFAULT_LIMIT,
+        )
+    elif fetch_all_rows:
+        response = await run_report_all_pages(
+            _run_report_page, request, max_rows=max_rows
+        )
+    else:
+        response = await _run_report_page(request)
+
+    return await _format_report(response, output_format, previous_fingerprint)
+
+
+# The `run_report` tool requires a more complex description that's generated at
+# runtime. Uses the `add_tool` method instead of an annnotation since `add_tool`
+# provides the flexibility needed to generate the description while also
+# including the `run_report` method's docstring.
+mcp.add_tool(
+    run_report,
+    title="Run a Google Analytics Data API report using the Data API",
+    description=_run_report_description(),
+)
+
+
+def _run_pivot_report_description() -> str:
+    """Returns the description for the `run_pivot_report` tool."""
+    return f"""
+          {run_pivot_report.__doc__}
+
+          ## Hints for arguments
+
+          Here are some hints that outline the expected format and requirements
+          for arguments.
+
+          ### Hints for `dimensions` and `metrics`
+
+          The same dimensions and metrics as the `run_report` tool are
+          available. Use the `get_custom_dimensions_and_metrics` tool to
+          retrieve the custom dimensions and metrics for a property.
+
+          ### Hints for `pivots`:
+          {get_pivots_hints()}
+
+          ### Hints for `date_ranges`:
+          {get_date_ranges_hints()}
+
+          ### Hints for `dimension_filter`:
+          {get_dimension_filter_hints()}
+
+          ### Hints for `metric_filter`:
+          {get_metric_filter_hints()}
+
+          """
+
+
+def build_run_pivot_report_request(
+    property_id: int | str,
+    date_ranges: List[Dict[str, str]],
+    dimensions: List[str],
+    metrics: List[str],
+    pivots: List[Dict[str, Any]],
+    dimension_filter: Dict[str, Any] = None,
+    metric_filter: Dict[str, Any] = None,
+    currency_code: str = None,
+    return_property_quota: bool = False,
+) -> data_v1beta.RunPivotReportRequest:
+    """Returns a `RunPivotReportRequest` built from tool arguments.
+
+    See `run_pivot_report` for a description of the arguments.
+    """
+    request = data_v1beta.RunPivotReportRequest(
         property=construct_property_rn(property_id),
         dimensions=[
             data_v1beta.Dimension(name=dimension) for dimension in dimensions
         ],
         metrics=[data_v1beta.Metric(name=metric) for metric in metrics],
         date_ranges=[data_v1beta.DateRange(dr) for dr in date_ranges],
+        pivots=[data_v1beta.Pivot(pivot) for pivot in pivots],
         return_property_quota=return_property_quota,
     )
-
     if dimension_filter:
         request.dimension_filter = data_v1beta.FilterExpression(
             dimension_filter
         )
-
     if metric_filter:
         request.metric_filter = data_v1beta.FilterExpression(metric_filter)
-
-    if order_bys:
-        request.order_bys = [
-            data_v1beta.OrderBy(order_by) for order_by in order_bys
-        ]
-
-    if limit:
-        request.limit = limit
-    if offset:
-        request.offset = offset
     if currency_code:
         request.currency_code = currency_code
+    return request
 
-    response = await create_data_api_client().run_report(request)
 
-    return proto_to_dict(response)
+@with_deadline(120)
+@accepts_property_names
+async def run_pivot_report(
+    property_id: int | str,
+    date_ranges: List[Dict[str, str]],
+    dimensions: List[str],
+    metrics: List[str],
+    pivots: List[Dict[str, Any]],
+    dimension_filter: Dict[str, Any] = None,
+    metric_filter: Dict[str, Any] = None,
+    currency_code: str = None,
+    return_property_quota: bool = False,
+    output_format: str = COMPACT,
+) -> Dict[str, Any]:
+    """Runs a Google Analytics Data API pivot report.
+
+    Use a pivot report for a metric by one dimension, broken out by another,
+    such as sessions by browser for each country. A single pivot report
+    replaces a `run_report` call with both dimensions, which returns every
+    combination as a separate row, or one `run_report` call per value of the
+    second dimension.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+        date_ranges: A list of date ranges
+          (https://developers.google.com/analytics/devguides/reporting/data/v1/rest/v1beta/DateRange)
+          to include in the report.
+        dimensions: A list of dimensions to include in the report. Every
+          dimension in `pivots` must be in this list.
+        metrics: A list of metrics to include in the report.
+        pivots: A list of Data API Pivot
+          (https://developers.google.com/analytics/devguides/reporting/data/v1/rest/v1beta/Pivot)
+          objects. The first pivot's dimensions become the rows of the
+          result, and each combination of the other pivots' dimension values
+          becomes a column. Each pivot's `limit` caps its number of values.
+        dimension_filter: A Data API FilterExpression
+          (https://developers.google.com/analytics/devguides/reporting/data/v1/rest/v1beta/FilterExpression)
+          to apply to the dimensions.
+        metric_filter: A Data API FilterExpression
+          (https://developers.google.com/analytics/devguides/reporting/data/v1/rest/v1beta/FilterExpression)
+          to apply to the metrics.
+        currency_code: The currency code to use for currency values. Must be in
+          ISO4217 format, such as "AED", "USD", "JPY". If the field is empty, the
+          report uses the property's default currency.
+        return_property_quota: Whether to return property quota in the response.
+        output_format: The format of the response. Either "compact", which
+          returns `row_headers`, `column_headers`, the dimension values of
+          each column in `columns`, and `rows` that each contain the row's
+          dimension values followed by one list of values per metric, with a
+          value for each column; or "verbose", which returns the Data API's
+          response message.
+    """
+    check_output_format(output_format)
+    request = build_run_pivot_report_request(
+        property_id,
+        date_ranges,
+        dimensions,
+        metrics,
+        pivots,
+        dimension_filter=dimension_filter,
+        metric_filter=metric_filter,
+        currency_code=currency_code,
+        return_property_quota=return_property_quota,
+    )
+    await validate_pivot_report_request(request)
+    response = await data_api.run_pivot_report(request)
+    return format_pivot_response(
+        response,
+        [list(pivot.field_names) for pivot in request.pivots],
+        output_format,
+    )
 
 
-# The `run_report` tool requires a more complex description that's generated at
-# runtime. Uses the `add_tool` method instead of an annnotation since `add_tool`
-# provides the flexibility needed to generate the description while also
-# including the `run_report` method's docstring.
 mcp.add_tool(
-    run_report,
-    title="Run a Google Analytics Data API report using the Data API",
-    description=_run_report_description(),
+    run_pivot_report,
+    title="Run a Google Analytics Data API pivot report",
+    description=_run_pivot_report_description(),
+)
+
+
+@mcp.tool(
+    title="Run several Google Analytics Data API reports for a property at once"
 )
+@with_deadline(120)
+@accepts_property_names
+async def batch_run_reports(
+    property_id: int | str,
+    reports: List[Dict[str, Any]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Runs several reports for the same property in as few calls as possible.
+
+    The Data API runs up to 5 reports in a single call. Larger lists of
+    reports are split into groups of 5 that run concurrently.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+        reports: A list of reports. Each report is an object whose keys are
+          arguments of the `run_report` tool, other than `property_id`,
+          `fetch_all_rows`, `max_rows` and `shard_by`. For example:
+          {"date_ranges": [{"start_date": "7daysAgo", "end_date": "yesterday"}],
+           "dimensions": ["country"], "metrics": ["activeUsers"]}
+          See the `run_report` tool for the format of each argument.
+
+    Returns:
+        An object whose `reports` list contains the response for each report,
+        in the same order as `reports`.
+    """
+    if not reports:
+        raise ValueError("reports must contain at least one report.")
+    requests = []
+    for index, report in enumerate(reports):
+        try:
+            requests.append(build_run_report_request(property_id, **report))
+        except TypeError as e:
+            raise ValueError(f"Invalid report at index {index}: {e}") from e
+    await asyncio.gather(
+        *(validate_report_request(request) for request in requests)
+    )
+
+    property_rn = construct_property_rn(property_id)
+    batches = [
+        requests[start : start + MAX_BATCH_SIZE]
+        for start in range(0, len(requests), MAX_BATCH_SIZE)
+    ]
+    responses = await asyncio.gather(
+        *(
+            data_api.batch_run_reports(
+                data_v1beta.BatchRunReportsRequest(
+                    property=property_rn, requests=batch
+                )
+            )
+            for batch in batches
+        )
+    )
+    formatted = await asyncio.gather(
+        *(
+            format_response_async(report, VERBOSE)
+            for response in responses
+            for report in response.reports
+        )
+    )
+    return {"reports": list(formatted)}
+
+
+@mcp.tool(title="Run the same Google Analytics report for several properties")
+@with_deadline(600)
+async def run_report_for_properties(
+    report: Dict[str, Any],
+    property_ids: List[int | str] = None,
+    account_id: int | str = None,
+    output_format: str = VERBOSE,
+) -> Dict[str, Any]:
+    """Runs the same report for several properties concurrently.
+
+    Each property's report is run as if by the `run_report` tool. A property
+    whose report fails is listed with its error, and doesn't stop the other
+    properties' reports.
+
+    Args:
+        report: The report to run. An object whose keys are arguments of the
+          `run_report` tool, other than `property_id` and `output_format`.
+          For example:
+          {"date_ranges": [{"start_date": "7daysAgo", "end_date": "yesterday"}],
+           "dimensions": ["country"], "metrics": ["activeUsers"]}
+          See the `run_report` tool for the format of each argument.
+        property_ids: The properties to run the report for. Accepted formats
+          for each property are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+        account_id: The ID of an account, such as 123 or 'accounts/123'. The
+          report runs for each of the account's properties, in addition to
+          `property_ids`.
+        output_format: The format of each report. See the `run_report` tool.
+
+    Returns:
+        An object whose `results` list contains the `property_id` and
+        `display_name` of each property with either its `report` or its
+        `error`, followed by the number of properties that `succeeded` and
+        `failed`.
+    """
+    check_output_format(output_format)
+    try:
+        inspect.signature(run_report).bind(
+            property_id=None, output_format=output_format, **report
+        )
+    except TypeError as e:
+        raise ValueError(f"Invalid report: {e}") from e
+    property_rns = await resolve_properties(property_ids, account_id)
+
+    async def run(property_rn: str) -> Dict[str, Any]:
+        return await run_report(
+            property_id=property_rn, output_format=output_format, **report
+        )
+
+    return await run_for_properties(run, property_rns)
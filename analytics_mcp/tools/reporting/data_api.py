@@ -0,0 +1,220 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Data API calls shared by the reporting tools.
+
+Identical calls made while an earlier call is still in flight share the
+earlier call's response instead of calling the API again.
+
+If `ANALYTICS_MCP_COALESCE_WINDOW_MS` is set, concurrent `run_report` calls
+for the same property are also packed into `batchRunReports` calls.
+
+Report calls are admitted by the quota scheduler, and always ask the API for
+the property's quota so the scheduler can track it. The quota is removed from
+the response unless the caller asked for it.
+
+Every call is made with the retries and deadline of `calls.call_api`.
+"""
+
+from __future__ import annotations
+
+from analytics_mcp import config, stats
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.calls import call_api
+from analytics_mcp.tools.reporting.coalescer import ReportCoalescer
+from analytics_mcp.tools.reporting.quota import CORE, REALTIME, quota_scheduler
+from analytics_mcp.tools.singleflight import SingleFlight
+from analytics_mcp.tools.utils import create_data_api_client
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+_in_flight = SingleFlight()
+stats.register_stats_provider("data_api_in_flight", _in_flight.stats)
+
+
+def _request_key(method: str, request) -> tuple[str, bytes]:
+    """Returns the deduplication key for a request to a Data API method."""
+    return (method, type(request).serialize(request))
+
+
+def _copy_message(message):
+    """Returns a deep copy of a proto-plus message."""
+    message_type = type(message)
+    return message_type.deserialize(message_type.serialize(message))
+
+
+async def _call(method: str, **kwargs):
+    """Calls a Data API method using a pooled client."""
+    return await call_api(
+        method,
+        lambda timeout: getattr(create_data_api_client(), method)(
+            **kwargs, timeout=timeout, retry=None
+        ),
+    )
+
+
+def _with_property_quota(request):
+    """Returns a copy of a report request that asks for the property quota."""
+    if request.return_property_quota:
+        return request
+    request = type(request)(request)
+    request.return_property_quota = True
+    return request
+
+
+def _for_caller(response, wants_quota: bool):
+    """Returns a caller's response, without the quota unless it was asked for.
+
+    `_in_flight` gives each caller that shares a call its own copy of the
+    response, so removing the quota doesn't affect the other callers.
+    """
+    if not wants_quota:
+        del response.property_quota
+    return response
+
+
+async def _run_single_report(
+    request: data_v1beta.RunReportRequest,
+) -> data_v1beta.RunReportResponse:
+    """Runs a single report without coalescing."""
+    return await quota_scheduler.run(
+        request.property,
+        CORE,
+        lambda: _call("run_report", request=request),
+    )
+
+
+async def _run_batch(
+    request: data_v1beta.BatchRunReportsRequest,
+) -> data_v1beta.BatchRunReportsResponse:
+    """Runs a batch of reports once the property's quota allows it."""
+    return await quota_scheduler.run(
+        request.property,
+        CORE,
+        lambda: _call("batch_run_reports", request=request),
+        property_quotas=lambda response: [
+            report.property_quota for report in response.reports
+        ],
+    )
+
+
+async def batch_run_reports(
+    request: data_v1beta.BatchRunReportsRequest,
+) -> data_v1beta.BatchRunReportsResponse:
+    """Runs a batch of reports for a single property."""
+    wants_quota = [report.return_property_quota for report in request.requests]
+    if not all(wants_quota):
+        request = data_v1beta.BatchRunReportsRequest(
+            property=request.property,
+            requests=[
+                _with_property_quota(report) for report in request.requests
+            ],
+        )
+    response = await _in_flight.do(
+        _request_key("batch_run_reports", request),
+        lambda: _run_batch(request),
+        copy=_copy_message,
+    )
+    for report, wanted in zip(response.reports, wants_quota):
+        _for_caller(report, wanted)
+    return response
+
+
+# How long to wait for more reports for the same property before sending a
+# batch. 0 disables coalescing.
+_COALESCE_WINDOW_SECONDS = config.get_float("COALESCE_WINDOW_MS", 0.0) / 1000
+
+_coalescer = ReportCoalescer(
+    _run_single_report, batch_run_reports, _COALESCE_WINDOW_SECONDS
+)
+stats.register_stats_provider("report_coalescer", _coalescer.stats)
+
+
+async def run_report(
+    request: data_v1beta.RunReportRequest,
+) -> data_v1beta.RunReportResponse:
+    """Runs a report using a pooled Data API client."""
+    if _COALESCE_WINDOW_SECONDS > 0:
+        call = _coalescer.run_report
+    else:
+        call = _run_single_report
+    wants_quota = request.return_property_quota
+    request = _with_property_quota(request)
+    response = await _in_flight.do(
+        _request_key("run_report", request),
+        lambda: call(request),
+        copy=_copy_message,
+    )
+    return _for_caller(response, wants_quota)
+
+
+async def run_pivot_report(
+    request: data_v1beta.RunPivotReportRequest,
+) -> data_v1beta.RunPivotReportResponse:
+    """Runs a pivot report using a pooled Data API client."""
+    wants_quota = request.return_property_quota
+    request = _with_property_quota(request)
+    response = await _in_flight.do(
+        _request_key("run_pivot_report", request),
+        lambda: quota_scheduler.run(
+            request.property,
+            CORE,
+            lambda: _call("run_pivot_report", request=request),
+        ),
+        copy=_copy_message,
+    )
+    return _for_caller(response, wants_quota)
+
+
+async def run_realtime_report(
+    request: data_v1beta.RunRealtimeReportRequest,
+) -> data_v1beta.RunRealtimeReportResponse:
+    """Runs a realtime report using a pooled Data API client."""
+    wants_quota = request.return_property_quota
+    request = _with_property_quota(request)
+    response = await _in_flight.do(
+        _request_key("run_realtime_report", request),
+        lambda: quota_scheduler.run(
+            request.property,
+            REALTIME,
+            lambda: _call("run_realtime_report", request=request),
+        ),
+        copy=_copy_message,
+    )
+    return _for_caller(response, wants_quota)
+
+
+async def get_metadata(name: str) -> data_v1beta.Metadata:
+    """Returns the dimensions and metrics metadata for a property.
+
+    Args:
+        name: The resource name of the metadata, such as
+          `properties/1234/metadata`.
+    """
+    return await _in_flight.do(
+        ("get_metadata", name),
+        lambda: _call("get_metadata", name=name),
+        copy=_copy_message,
+    )
+
+
+async def check_compatibility(
+    request: data_v1beta.CheckCompatibilityRequest,
+) -> data_v1beta.CheckCompatibilityResponse:
+    """Checks the compatibility of a report's dimensions and metrics."""
+    return await _in_flight.do(
+        _request_key("check_compatibility", request),
+        lambda: _call("check_compatibility", request=request),
+        copy=_copy_message,
+    )
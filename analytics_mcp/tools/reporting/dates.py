@@ -0,0 +1,88 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Date helpers for report requests, evaluated in the property's time zone."""
+
+from __future__ import annotations
+
+import datetime
+import re
+import zoneinfo
+from typing import Dict
+
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.calls import call_api
+from analytics_mcp.tools.utils import create_admin_api_client
+
+admin_v1beta = lazy_import("google.analytics.admin_v1beta")
+
+_DAYS_AGO_PATTERN = re.compile(r"^(\d+)daysAgo$")
+
+# Time zone of each property, keyed by property resource name. A property's
+# time zone rarely changes, so it's cached for the lifetime of the process.
+_property_time_zones: Dict[str, zoneinfo.ZoneInfo] = {}
+
+
+def resolve_date(value: str, today: datetime.date) -> datetime.date:
+    """Returns the calendar date for a Data API date string.
+
+    Args:
+        value: A date in the format `YYYY-MM-DD`, or one of the relative dates
+          `today`, `yesterday` and `NdaysAgo`.
+        today: The current date in the property's time zone.
+
+    Raises:
+        ValueError: If the value isn't a valid Data API date.
+    """
+    value = value.strip()
+    if value == "today":
+        return today
+    if value == "yesterday":
+        return today - datetime.timedelta(days=1)
+    match = _DAYS_AGO_PATTERN.match(value)
+    if match:
+        return today - datetime.timedelta(days=int(match.group(1)))
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid date: {value!r}. Dates must be in the format YYYY-MM-DD "
+            "or one of 'today', 'yesterday' or 'NdaysAgo'."
+        ) from None
+
+
+async def property_time_zone(property_rn: str) -> zoneinfo.ZoneInfo:
+    """Returns the reporting time zone of a property.
+
+    Args:
+        property_rn: The property resource name, such as `properties/1234`.
+    """
+    time_zone = _property_time_zones.get(property_rn)
+    if time_zone is None:
+        request = admin_v1beta.GetPropertyRequest(name=property_rn)
+        response = await call_api(
+            "get_property",
+            lambda timeout: create_admin_api_client().get_property(
+                request=request, timeout=timeout, retry=None
+            ),
+        )
+        time_zone = zoneinfo.ZoneInfo(response.time_zone or "UTC")
+        _property_time_zones[property_rn] = time_zone
+    return time_zone
+
+
+async def property_today(property_rn: str) -> datetime.date:
+    """Returns the current date in the property's reporting time zone."""
+    time_zone = await property_time_zone(property_rn)
+    return datetime.datetime.now(time_zone).date()
@@ -0,0 +1,430 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streams large reports to local files.
+
+The report is fetched one page at a time, and each page is written to the
+file as soon as it arrives while the next page is fetched. At most two pages
+are held in memory, however many rows the report has. The file is written
+under a temporary name and renamed once complete, so a failed export never
+leaves a partial file behind under the final name.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import pathlib
+import tempfile
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+
+from analytics_mcp import config
+from analytics_mcp.coordinator import mcp
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.admin.directory import accepts_property_names
+from analytics_mcp.tools.calls import with_deadline
+from analytics_mcp.tools.reporting import data_api
+from analytics_mcp.tools.reporting.core import build_run_report_request
+from analytics_mcp.tools.reporting.formatting import metric_parsers
+from analytics_mcp.tools.reporting.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    RunPage,
+)
+from analytics_mcp.tools.reporting.quota import bulk
+from analytics_mcp.tools.reporting.validation import validate_report_request
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+NDJSON = "ndjson"
+CSV = "csv"
+PARQUET = "parquet"
+
+EXPORT_FORMATS = (NDJSON, CSV, PARQUET)
+
+_EXTENSIONS = {NDJSON: ".ndjson", CSV: ".csv", PARQUET: ".parquet"}
+
+# The directory that exported files are written to.
+EXPORT_DIR = config.get_str(
+    "EXPORT_DIR", os.path.join(tempfile.gettempdir(), "analytics-mcp-exports")
+)
+
+# The maximum number of rows in a single export.
+MAX_EXPORT_ROWS = config.get_int("EXPORT_MAX_ROWS", 10_000_000)
+
+
+async def iter_report_pages(
+    run_page: RunPage,
+    request: data_v1beta.RunReportRequest,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_rows: int = MAX_EXPORT_ROWS,
+) -> AsyncIterator[data_v1beta.RunReportResponse]:
+    """Yields the pages of a report in order, fetching one page ahead.
+
+    Each page is fetched as a bulk call while the caller processes the
+    previous page.
+
+    Args:
+        run_page: Async function that runs a single page of the report.
+        request: The report request. Its `offset`, if set, is the first row
+          fetched.
+        page_size: The number of rows per page.
+        max_rows: The maximum number of rows to fetch.
+    """
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    end = request.offset + max_rows
+
+    def fetch(offset: int) -> asyncio.Task:
+        page_request = data_v1beta.RunReportRequest(request)
+        page_request.offset = offset
+        page_request.limit = min(page_size, end - offset)
+
+        async def run() -> data_v1beta.RunReportResponse:
+            with bulk():
+                return await run_page(page_request)
+
+        return asyncio.create_task(run())
+
+    offset = request.offset
+    next_page = fetch(offset)
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+            end = min(end, page.row_count)
+            offset += len(data_v1beta.RunReportResponse.pb(page).rows)
+            if offset < end and data_v1beta.RunReportResponse.pb(page).rows:
+                next_page = fetch(offset)
+            yield page
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
+class _HashingFile(io.RawIOBase):
+    """A writable binary file that computes the SHA-256 of what's written."""
+
+    def __init__(self, file) -> None:
+        self._file = file
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self._file.write(data)
+
+
+class _NdjsonWriter:
+    """Writes each row as a JSON object keyed by dimension and metric name."""
+
+    def __init__(self, file: _HashingFile) -> None:
+        self._file = file
+
+    def write_page(self, page: data_v1beta.RunReportResponse) -> None:
+        pb = data_v1beta.RunReportResponse.pb(page)
+        dimensions = [header.name for header in pb.dimension_headers]
+        metrics = [header.name for header in pb.metric_headers]
+        parsers = metric_parsers(page)
+        lines = []
+        for row in pb.rows:
+            record = {
+                name: value.value
+                for name, value in zip(dimensions, row.dimension_values)
+            }
+            for name, parse, value in zip(metrics, parsers, row.metric_values):
+                record[name] = parse(value.value)
+            lines.append(json.dumps(record, ensure_ascii=False))
+        if lines:
+            self._file.write(("\n".join(lines) + "\n").encode())
+
+    def close(self) -> None:
+        pass
+
+
+class _CsvWriter:
+    """Writes a header line followed by one line per row."""
+
+    def __init__(self, file: _HashingFile) -> None:
+        self._file = file
+        self._wrote_header = False
+
+    def write_page(self, page: data_v1beta.RunReportResponse) -> None:
+        pb = data_v1beta.RunReportResponse.pb(page)
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator="\n")
+        if not self._wrote_header:
+            writer.writerow(
+                [header.name for header in pb.dimension_headers]
+                + [header.name for header in pb.metric_headers]
+            )
+            self._wrote_header = True
+        writer.writerows(
+            [value.value for value in row.dimension_values]
+            + [value.value for value in row.metric_values]
+            for row in pb.rows
+        )
+        self._file.write(text.getvalue().encode())
+
+    def close(self) -> None:
+        pass
+
+
+class _ParquetWriter:
+    """Writes each page as a row group of a Parquet file.
+
+    Requires the optional `pyarrow` package.
+    """
+
+    def __init__(self, file: _HashingFile) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ModuleNotFoundError:
+            raise ValueError(
+                "The parquet format requires the pyarrow package. Install "
+                "it with `pip install analytics-mcp[parquet]`, or use the "
+                f"{NDJSON} or {CSV} format."
+            ) from None
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._file = file
+        self._schema = None
+        self._writer = None
+
+    def _page_schema(self, page: data_v1beta.RunReportResponse):
+        """Returns the file's schema, derived from the page's headers.
+
+        Every page of a report has the same headers, so the schema doesn't
+        depend on the values of any one page.
+        """
+        pa = self._pyarrow
+        return pa.schema(
+            [(header.name, pa.string()) for header in page.dimension_headers]
+            + [
+                (
+                    header.name,
+                    (
+                        pa.int64()
+                        if header.type_.name == "TYPE_INTEGER"
+                        else pa.float64()
+                    ),
+                )
+                for header in page.metric_headers
+            ]
+        )
+
+    def write_page(self, page: data_v1beta.RunReportResponse) -> None:
+        pa = self._pyarrow
+        if self._schema is None:
+            self._schema = self._page_schema(page)
+            self._writer = self._parquet.ParquetWriter(self._file, self._schema)
+        pb = data_v1beta.RunReportResponse.pb(page)
+        dimension_count = len(pb.dimension_headers)
+        columns: List[List[Any]] = [
+            [row.dimension_values[index].value for row in pb.rows]
+            for index in range(dimension_count)
+        ]
+        for index, parse in enumerate(metric_parsers(page)):
+            columns.append(
+                [parse(row.metric_values[index].value) for row in pb.rows]
+            )
+        arrays = [
+            pa.array(values, field.type)
+            for values, field in zip(columns, self._schema)
+        ]
+        self._writer.write_table(pa.table(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+_WRITERS = {NDJSON: _NdjsonWriter, CSV: _CsvWriter, PARQUET: _ParquetWriter}
+
+
+def _check_file_format(file_format: str) -> None:
+    """Raises a ValueError if the file format is invalid."""
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Invalid file_format: {file_format!r}. Must be one of "
+            f"{', '.join(EXPORT_FORMATS)}."
+        )
+
+
+def _export_path(file_name: str | None, export_format: str) -> pathlib.Path:
+    """Returns the path of an export file in `EXPORT_DIR`."""
+    if file_name is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        file_name = (
+            f"report-{timestamp}-{uuid.uuid4().hex[:8]}"
+            f"{_EXTENSIONS[export_format]}"
+        )
+    elif pathlib.PurePath(file_name).name != file_name or file_name in (
+        ".",
+        "..",
+    ):
+        raise ValueError(
+            f"Invalid file_name: {file_name!r}. Must be a file name without "
+            f"a directory. Files are written to {EXPORT_DIR}."
+        )
+    return pathlib.Path(EXPORT_DIR) / file_name
+
+
+async def export_pages(
+    pages: AsyncIterator[data_v1beta.RunReportResponse],
+    path: pathlib.Path,
+    export_format: str,
+) -> Dict[str, Any]:
+    """Writes pages of a report to a file, as each page arrives.
+
+    Pages are written in a thread, so the event loop keeps serving other
+    requests while large pages are converted. The file's directory is
+    created if it doesn't exist. If writing fails, `pages` is closed, which
+    stops fetching the next page.
+
+    Returns:
+        The file's `path`, `format`, number of `bytes` and `sha256`
+        checksum, and the report's `headers`, the number of rows written in
+        `row_count` and the report's `total_row_count`.
+    """
+    _check_file_format(export_format)
+    partial_path = path.with_name(f".{path.name}.partial")
+    row_count = 0
+    total_row_count = 0
+    headers: List[str] = []
+    await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+    try:
+        async with contextlib.aclosing(pages):
+            raw_file = await asyncio.to_thread(open, partial_path, "wb")
+            try:
+                file = _HashingFile(raw_file)
+                writer = _WRITERS[export_format](file)
+                async for page in pages:
+                    pb = data_v1beta.RunReportResponse.pb(page)
+                    if not headers:
+                        headers = [h.name for h in pb.dimension_headers] + [
+                            h.name for h in pb.metric_headers
+                        ]
+                        total_row_count = pb.row_count
+                    row_count += len(pb.rows)
+                    await asyncio.to_thread(writer.write_page, page)
+                await asyncio.to_thread(writer.close)
+            finally:
+                await asyncio.to_thread(raw_file.close)
+        await asyncio.to_thread(os.replace, partial_path, path)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+    return {
+        "path": str(path),
+        "format": export_format,
+        "headers": headers,
+        "row_count": row_count,
+        "total_row_count": total_row_count,
+        "bytes": file.bytes,
+        "sha256": file.sha256.hexdigest(),
+    }
+
+
+@mcp.tool(title="Export a Google Analytics report to a local file")
+@with_deadline(3600)
+@accepts_property_names
+async def export_report(
+    property_id: int | str,
+    date_ranges: List[Dict[str, str]],
+    dimensions: List[str],
+    metrics: List[str],
+    dimension_filter: Dict[str, Any] = None,
+    metric_filter: Dict[str, Any] = None,
+    order_bys: List[Dict[str, Any]] = None,
+    currency_code: str = None,
+    file_format: str = NDJSON,
+    file_name: str = None,
+    max_rows: int = None,
+) -> Dict[str, Any]:
+    """Exports every row of a report to a file on the server's machine.
+
+    Use this instead of `run_report` for reports with too many rows to
+    return in a response. The rows are written to the file page by page, and
+    only a summary of the file is returned.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+        date_ranges: A list of date ranges to include in the report. See the
+          `run_report` tool.
+        dimensions: A list of dimensions to include in the report.
+        metrics: A list of metrics to include in the report.
+        dimension_filter: A Data API FilterExpression to apply to the
+          dimensions. See the `run_report` tool.
+        metric_filter: A Data API FilterExpression to apply to the metrics.
+          See the `run_report` tool.
+        order_bys: A list of Data API OrderBy objects. See the `run_report`
+          tool.
+        currency_code: The currency code to use for currency values, in
+          ISO4217 format.
+        file_format: The file format. Either "ndjson", with one JSON object per
+          row; "csv", with a header line; or "parquet", which requires the
+          pyarrow package on the server.
+        file_name: The name of the file, without a directory. Defaults to a
+          generated name. Files are written to the server's export
+          directory.
+        max_rows: The maximum number of rows to export.
+
+    Returns:
+        The file's `path`, `format`, size in `bytes` and `sha256` checksum,
+        and the report's `headers`, the number of rows written in
+        `row_count` and the report's `total_row_count`.
+    """
+    _check_file_format(file_format)
+    if max_rows is not None and max_rows < 1:
+        raise ValueError(
+            f"Invalid max_rows: {max_rows}. Must be a positive integer."
+        )
+    request = build_run_report_request(
+        property_id,
+        date_ranges,
+        dimensions,
+        metrics,
+        dimension_filter=dimension_filter,
+        metric_filter=metric_filter,
+        order_bys=order_bys,
+        currency_code=currency_code,
+    )
+    await validate_report_request(request)
+    path = _export_path(file_name, file_format)
+    # Pages bypass the response cache, which would otherwise keep copies of
+    # the pages in memory.
+    pages = iter_report_pages(
+        data_api.run_report,
+        request,
+        max_rows=min(max_rows or MAX_EXPORT_ROWS, MAX_EXPORT_ROWS),
+    )
+    return await export_pages(pages, path, file_format)
@@ -0,0 +1,144 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs the same report for many properties.
+
+The properties' reports run concurrently, at most `MAX_CONCURRENT_PROPERTIES`
+at a time, as bulk calls. Calls for each property are also limited by the
+quota scheduler to the property's concurrent request quota. A property whose
+report fails is reported with its error, and doesn't stop the other
+properties' reports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+
+from analytics_mcp import config
+from analytics_mcp.tools import utils
+from analytics_mcp.tools.admin.directory import property_directory
+from analytics_mcp.tools.reporting.quota import bulk
+
+_logger = logging.getLogger(__name__)
+
+# The maximum number of properties whose reports run concurrently.
+MAX_CONCURRENT_PROPERTIES = config.get_int("FANOUT_CONCURRENCY", 8)
+
+# The maximum number of properties in a single fan-out.
+MAX_PROPERTIES = config.get_int("FANOUT_MAX_PROPERTIES", 500)
+
+RunForProperty = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+async def resolve_properties(
+    property_ids: List[int | str] | None = None,
+    account_id: int | str | None = None,
+) -> List[str]:
+    """Returns the resource names of the properties to run a report for.
+
+    Args:
+        property_ids: Property IDs, resource names or display names.
+        account_id: The ID or resource name of an account whose properties
+          are added to `property_ids`.
+
+    Raises:
+        ValueError: If no property is given, a property can't be resolved,
+          the account has no properties or there are more than
+          `MAX_PROPERTIES` properties.
+    """
+    property_ids = list(property_ids or [])
+    if not property_ids and account_id is None:
+        raise ValueError("Either property_ids or account_id must be provided.")
+    if account_id is not None or not all(
+        utils.is_property_id(str(property_id)) for property_id in property_ids
+    ):
+        directory = await property_directory.get()
+    property_rns = [
+        utils.construct_property_rn(property_id) for property_id in property_ids
+    ]
+    if account_id is not None:
+        account_properties = directory.properties_of_account(str(account_id))
+        if not account_properties:
+            raise ValueError(
+                f"Account {account_id} has no properties, or isn't "
+                "accessible. Use the `get_account_summaries` tool to list "
+                "the accessible accounts."
+            )
+        property_rns.extend(entry["name"] for entry in account_properties)
+    # Removes duplicates, keeping the first occurrence of each property.
+    property_rns = list(dict.fromkeys(property_rns))
+    if len(property_rns) > MAX_PROPERTIES:
+        raise ValueError(
+            f"The report would run for {len(property_rns)} properties, more "
+            f"than the maximum of {MAX_PROPERTIES}."
+        )
+    return property_rns
+
+
+def _display_name(property_rn: str) -> str | None:
+    """Returns a property's display name, if the directory has loaded."""
+    directory = property_directory.current
+    if directory is None:
+        return None
+    entry = directory.properties.get(property_rn.rsplit("/", 1)[-1])
+    return entry["display_name"] if entry else None
+
+
+async def run_for_properties(
+    run: RunForProperty,
+    property_rns: List[str],
+    max_concurrency: int = MAX_CONCURRENT_PROPERTIES,
+) -> Dict[str, Any]:
+    """Runs a report for each property, and returns every property's result.
+
+    Args:
+        run: Async function that returns the formatted report for a property,
+          given its resource name.
+        property_rns: The resource names of the properties.
+        max_concurrency: The maximum number of properties whose reports run
+          concurrently.
+
+    Returns:
+        An object whose `results` list contains, in the same order as
+        `property_rns`, the `property_id` and `display_name` of each property
+        with either its `report` or its `error`, followed by the number of
+        properties that `succeeded` and `failed`.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(property_rn: str) -> Dict[str, Any]:
+        result = {
+            "property_id": property_rn,
+            "display_name": _display_name(property_rn),
+        }
+        async with semaphore:
+            try:
+                with bulk():
+                    result["report"] = await run(property_rn)
+            except Exception as e:
+                _logger.info("Report for %s failed: %s", property_rn, e)
+                result["error"] = str(e) or type(e).__name__
+        return result
+
+    results = await asyncio.gather(
+        *(run_one(property_rn) for property_rn in property_rns)
+    )
+    failed = sum(1 for result in results if "error" in result)
+    return {
+        "results": list(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
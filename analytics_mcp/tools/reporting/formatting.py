@@ -0,0 +1,532 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Output formats for report responses."""
+
+from __future__ import annotations
+
+import collections.abc
+import functools
+import hashlib
+import itertools
+from typing import Any, Callable, Dict, List
+
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.utils import proto_to_dict
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+proto = lazy_import("proto")
+
+# Returns the response as the dictionary form of the response message.
+VERBOSE = "verbose"
+
+# Returns the response as a list of headers plus one array per column.
+COMPACT = "compact"
+
+OUTPUT_FORMATS = (VERBOSE, COMPACT)
+
+# Metric types whose values are integers. Values of all other metric types
+# are floats.
+_INTEGER_METRIC_TYPES = frozenset({"TYPE_INTEGER"})
+
+
+@functools.cache
+def _metric_type_names() -> Dict[int, str]:
+    """Returns the names of the MetricType enum values, keyed by number."""
+    return {
+        metric_type.value: metric_type.name
+        for metric_type in data_v1beta.MetricType
+    }
+
+
+def _values_to_dicts(values) -> List[Dict[str, str]]:
+    """Converts DimensionValue or MetricValue protobufs to dictionaries."""
+    return [
+        (
+            {"value": string_value}
+            if (string_value := value.value) or value.HasField("value")
+            else {}
+        )
+        for value in values
+    ]
+
+
+def _row_to_dict(row) -> Dict[str, List[Dict[str, str]]]:
+    """Converts a Row protobuf to a dictionary.
+
+    Like `json_format.MessageToDict`, lists fields that are set before fields
+    that aren't.
+    """
+    dimension_values = _values_to_dicts(row.dimension_values)
+    metric_values = _values_to_dicts(row.metric_values)
+    if metric_values and not dimension_values:
+        return {
+            "metric_values": metric_values,
+            "dimension_values": dimension_values,
+        }
+    return {
+        "dimension_values": dimension_values,
+        "metric_values": metric_values,
+    }
+
+
+def _metric_header_to_dict(header) -> Dict[str, Any]:
+    """Converts a MetricHeader protobuf to a dictionary."""
+    metric_type = _metric_type_names().get(header.type_, header.type_)
+    if header.type_ and not header.name:
+        return {"type_": metric_type, "name": header.name}
+    return {"name": header.name, "type_": metric_type}
+
+
+def _rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    return [_row_to_dict(row) for row in rows]
+
+
+def _fingerprinted_rows_to_dicts(
+    rows, fingerprint: Fingerprint
+) -> List[Dict[str, Any]]:
+    """Converts Row protobufs to dictionaries, adding each to `fingerprint`."""
+    result = []
+    for row in rows:
+        fingerprint.add_row(row)
+        result.append(_row_to_dict(row))
+    return result
+
+
+# Fields of report responses that aren't part of their fingerprint. The rows
+# are added one at a time while they're converted, and the property quota
+# changes with every call.
+_UNFINGERPRINTED_FIELDS = frozenset({"rows", "property_quota"})
+
+
+class Fingerprint:
+    """Computes the fingerprint of a report response's content.
+
+    The fingerprint covers the headers, aggregates and metadata of the
+    response when it's created, and each row passed to `add_row`. Two
+    responses with the same rows, in the same order, and the same headers,
+    aggregates and metadata have the same fingerprint, whatever their
+    property quota.
+    """
+
+    def __init__(self, pb) -> None:
+        """Initializes the fingerprint with the non-row fields of `pb`."""
+        self._hash = hashlib.blake2b(digest_size=16)
+        for field, value in pb.ListFields():
+            if field.name in _UNFINGERPRINTED_FIELDS:
+                continue
+            if isinstance(value, collections.abc.MutableSequence):
+                parts = [
+                    item.SerializeToString(deterministic=True) for item in value
+                ]
+            elif field.message_type is not None:
+                parts = [value.SerializeToString(deterministic=True)]
+            else:
+                parts = [str(value).encode()]
+            self._add(f"{field.number}:{len(parts)}".encode())
+            for part in parts:
+                self._add(part)
+
+    def _add(self, data: bytes) -> None:
+        # Prefixes each part with its length so that parts can't run into
+        # each other.
+        self._hash.update(len(data).to_bytes(4, "little"))
+        self._hash.update(data)
+
+    def add_row(self, row) -> None:
+        """Adds a Row protobuf to the fingerprint."""
+        self._add(row.SerializeToString(deterministic=True))
+
+    def hexdigest(self) -> str:
+        """Returns the fingerprint as a string of 32 hex digits."""
+        return self._hash.hexdigest()
+
+
+def response_fingerprint(response: proto.Message) -> str:
+    """Returns the fingerprint of a report response's content.
+
+    Returns the same fingerprint as the `fingerprint` of `format_response`.
+    """
+    pb = type(response).pb(response)
+    fingerprint = Fingerprint(pb)
+    for row in pb.rows:
+        fingerprint.add_row(row)
+    return fingerprint.hexdigest()
+
+
+# Converters for the fields of report responses, keyed by field name.
+_FIELD_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "dimension_headers": lambda headers: [
+        {"name": header.name} for header in headers
+    ],
+    "metric_headers": lambda headers: [
+        _metric_header_to_dict(header) for header in headers
+    ],
+    "rows": _rows_to_dicts,
+    "totals": _rows_to_dicts,
+    "maximums": _rows_to_dicts,
+    "minimums": _rows_to_dicts,
+    "row_count": lambda row_count: row_count,
+    "kind": lambda kind: kind,
+}
+
+
+def response_to_dict(
+    response: proto.Message, fingerprint: Fingerprint | None = None
+) -> Dict[str, Any]:
+    """Converts a report response to a dictionary.
+
+    Returns the same result as `proto_to_dict`, including the order of keys,
+    but walks the rows of the underlying protobuf message directly instead of
+    using the generic, reflection-based conversion. Works with
+    `RunReportResponse` and `RunRealtimeReportResponse`.
+
+    Args:
+        response: The report response.
+        fingerprint: If given, each row is added to it as it's converted.
+    """
+    pb = type(response).pb(response)
+    descriptor = pb.DESCRIPTOR
+    if any(
+        field.name not in _FIELD_CONVERTERS and not field.has_presence
+        for field in descriptor.fields
+    ):
+        # Falls back to the generic conversion for unexpected message types.
+        if fingerprint is not None:
+            for row in pb.rows:
+                fingerprint.add_row(row)
+        return proto_to_dict(response)
+
+    # Like `json_format.MessageToDict`, lists the fields that are set in field
+    # number order, followed by the unset fields without presence.
+    set_fields = [field for field, _ in pb.ListFields()]
+    set_names = {field.name for field in set_fields}
+    unset_fields = [
+        field
+        for field in descriptor.fields
+        if field.name not in set_names and not field.has_presence
+    ]
+    result = {}
+    for field in set_fields + unset_fields:
+        converter = _FIELD_CONVERTERS.get(field.name)
+        if converter is None:
+            # Small message fields, such as `metadata` and `property_quota`.
+            result[field.name] = proto_to_dict(getattr(response, field.name))
+        elif field.name == "rows" and fingerprint is not None:
+            result["rows"] = _fingerprinted_rows_to_dicts(pb.rows, fingerprint)
+        else:
+            result[field.name] = converter(getattr(pb, field.name))
+    return result
+
+
+def _parse_int(value: str) -> int | float | None:
+    """Parses an integer metric value."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _parse_float(value: str) -> float | None:
+    """Parses a non-integer metric value."""
+    return float(value) if value else None
+
+
+def metric_parsers(response) -> List[Callable[[str], Any]]:
+    """Returns the function that parses the values of each metric column."""
+    return [
+        (
+            _parse_int
+            if header.type_.name in _INTEGER_METRIC_TYPES
+            else _parse_float
+        )
+        for header in response.metric_headers
+    ]
+
+
+def _typed_metric_rows(
+    rows, parsers: List[Callable[[str], Any]]
+) -> List[List[Any]]:
+    """Returns the typed metric values of rows such as totals or maximums."""
+    return [
+        [parse(value.value) for parse, value in zip(parsers, row.metric_values)]
+        for row in rows
+    ]
+
+
+def response_to_columns(
+    response: proto.Message, fingerprint: Fingerprint | None = None
+) -> Dict[str, Any]:
+    """Converts a report response to a column-oriented dictionary.
+
+    Works with `RunReportResponse` and `RunRealtimeReportResponse`. Dimension
+    values are strings. Metric values are ints or floats according to the
+    metric's type in `metric_headers`, or None if the API returned an empty
+    value. If `fingerprint` is given, each row is added to it as it's
+    converted.
+
+    Returns:
+        A dictionary with these keys:
+          - `headers`: The dimension names followed by the metric names.
+          - `metric_types`: The type of each metric, in the order of the
+            metrics in `headers`.
+          - `columns`: One list of values per header, in the order of
+            `headers`.
+          - `row_count`: The total number of rows in the report.
+          - `totals`, `maximums` and `minimums`: Lists of typed metric values,
+            if requested.
+          - `metadata` and `property_quota`: As in the verbose format, if
+            present in the response.
+    """
+    pb = type(response).pb(response)
+    parsers = metric_parsers(response)
+    dimension_count = len(pb.dimension_headers)
+    metric_count = len(pb.metric_headers)
+
+    dimension_columns: List[List[str]] = [[] for _ in range(dimension_count)]
+    metric_columns: List[List[Any]] = [[] for _ in range(metric_count)]
+    add_row = fingerprint.add_row if fingerprint is not None else None
+    for row in pb.rows:
+        if add_row is not None:
+            add_row(row)
+        for column, value in zip(dimension_columns, row.dimension_values):
+            column.append(value.value)
+        for column, parse, value in zip(
+            metric_columns, parsers, row.metric_values
+        ):
+            column.append(parse(value.value))
+
+    result = {
+        "headers": [header.name for header in pb.dimension_headers]
+        + [header.name for header in pb.metric_headers],
+        "metric_types": [
+            header.type_.name for header in response.metric_headers
+        ],
+        "columns": dimension_columns + metric_columns,
+        "row_count": pb.row_count,
+    }
+    result.update(response_extras(response))
+    return result
+
+
+def response_extras(response: proto.Message) -> Dict[str, Any]:
+    """Returns the parts of a report response other than its rows.
+
+    Returns the `totals`, `maximums` and `minimums` as lists of typed metric
+    values, and the `metadata` and `property_quota`, for those that are
+    present in the response.
+    """
+    pb = type(response).pb(response)
+    parsers = metric_parsers(response)
+    result = {}
+    for aggregate in ("totals", "maximums", "minimums"):
+        rows = getattr(pb, aggregate)
+        if rows:
+            result[aggregate] = _typed_metric_rows(rows, parsers)
+    for field in ("metadata", "property_quota"):
+        if field in type(response).meta.fields and field in response:
+            result[field] = proto_to_dict(getattr(response, field))
+    return result
+
+
+def check_output_format(output_format: str) -> None:
+    """Raises a ValueError if the output format is invalid."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Invalid output_format: {output_format!r}. Must be one of "
+            f"{', '.join(OUTPUT_FORMATS)}."
+        )
+
+
+def format_response(
+    response: proto.Message,
+    output_format: str = VERBOSE,
+    fingerprint: str | None = None,
+) -> Dict[str, Any]:
+    """Converts a report response to a dictionary in the requested format.
+
+    The result's `fingerprint` identifies the response's content, and is
+    computed while the rows are converted. See `Fingerprint`.
+
+    Args:
+        response: A `RunReportResponse` or `RunRealtimeReportResponse`.
+        output_format: Either `verbose` or `compact`.
+        fingerprint: The response's fingerprint, if it's already known, so
+          that the rows aren't hashed again.
+
+    Raises:
+        ValueError: If the output format is invalid.
+    """
+    check_output_format(output_format)
+    hasher = None
+    if fingerprint is None:
+        hasher = Fingerprint(type(response).pb(response))
+    if output_format == COMPACT:
+        result = response_to_columns(response, hasher)
+    else:
+        result = response_to_dict(response, hasher)
+    result["fingerprint"] = (
+        hasher.hexdigest() if hasher is not None else fingerprint
+    )
+    return result
+
+
+def unchanged_response(fingerprint: str) -> Dict[str, Any]:
+    """Returns the response for a result that matches the caller's copy."""
+    return {
+        "unchanged": True,
+        "fingerprint": fingerprint,
+        "note": (
+            "The result is the same as the result with this fingerprint, so "
+            "its rows aren't returned again."
+        ),
+    }
+
+
+def pivot_response_to_grid(
+    response: data_v1beta.RunPivotReportResponse,
+    pivot_field_names: List[List[str]],
+) -> Dict[str, Any]:
+    """Converts a pivot report response to a grid of rows and columns.
+
+    The first pivot's dimensions, and any dimension that isn't in a pivot,
+    identify the rows of the grid. Each combination of the other pivots'
+    dimension values is a column, in the order of the response's pivot
+    headers.
+
+    Args:
+        response: The pivot report response.
+        pivot_field_names: The `field_names` of each of the request's pivots.
+
+    Returns:
+        A dictionary with these keys:
+          - `row_headers`: The dimensions that identify each row.
+          - `column_headers`: The dimensions that identify each column.
+          - `metric_headers` and `metric_types`: The metric names and types.
+          - `columns`: The dimension values of each column.
+          - `rows`: For each row, its dimension values followed by one list
+            per metric, with the metric's typed value in each column, or
+            None if there's no value.
+          - `row_count`: The total number of rows of the first pivot.
+          - `aggregates`: The dimension values followed by the typed metric
+            values of each aggregate row, if requested.
+          - `metadata` and `property_quota`: As in the verbose format, if
+            present in the response.
+    """
+    pb = data_v1beta.RunPivotReportResponse.pb(response)
+    parsers = metric_parsers(response)
+    positions = {
+        header.name: index for index, header in enumerate(pb.dimension_headers)
+    }
+    pivoted = {name for names in pivot_field_names for name in names}
+    row_headers = list(pivot_field_names[0] if pivot_field_names else []) + [
+        name for name in positions if name not in pivoted
+    ]
+    column_headers = [name for names in pivot_field_names[1:] for name in names]
+    row_positions = [positions[name] for name in row_headers]
+    column_positions = [positions[name] for name in column_headers]
+
+    column_keys = [
+        tuple(itertools.chain.from_iterable(parts))
+        for parts in itertools.product(
+            *(
+                [
+                    tuple(value.value for value in header.dimension_values)
+                    for header in pivot_header.pivot_dimension_headers
+                ]
+                for pivot_header in pb.pivot_headers[1:]
+            )
+        )
+    ]
+    column_indexes: Dict[tuple, int] = {}
+    cells: Dict[tuple, Dict[int, List[Any]]] = {}
+    for row in pb.rows:
+        values = [value.value for value in row.dimension_values]
+        row_key = tuple(values[i] for i in row_positions)
+        column_key = tuple(values[i] for i in column_positions)
+        column_index = column_indexes.setdefault(
+            column_key, len(column_indexes)
+        )
+        cells.setdefault(row_key, {})[column_index] = [
+            parse(value.value)
+            for parse, value in zip(parsers, row.metric_values)
+        ]
+    # Orders the columns that have values as in the pivot headers.
+    order = {key: index for index, key in enumerate(column_keys)}
+    columns = sorted(column_indexes, key=lambda key: order.get(key, len(order)))
+    empty = [None] * len(parsers)
+    rows = []
+    for row_key, row_cells in cells.items():
+        grid = [
+            row_cells.get(column_indexes[column], empty) for column in columns
+        ]
+        rows.append(
+            list(row_key)
+            + [
+                [cell[metric] for cell in grid]
+                for metric in range(len(parsers))
+            ]
+        )
+
+    result = {
+        "row_headers": row_headers,
+        "column_headers": column_headers,
+        "metric_headers": [header.name for header in pb.metric_headers],
+        "metric_types": [
+            header.type_.name for header in response.metric_headers
+        ],
+        "columns": [list(column) for column in columns],
+        "rows": rows,
+        "row_count": (
+            pb.pivot_headers[0].row_count if pb.pivot_headers else len(rows)
+        ),
+    }
+    if pb.aggregates:
+        result["aggregates"] = [
+            [value.value for value in row.dimension_values]
+            + [
+                parse(value.value)
+                for parse, value in zip(parsers, row.metric_values)
+            ]
+            for row in pb.aggregates
+        ]
+    for field in ("metadata", "property_quota"):
+        if field in response:
+            result[field] = proto_to_dict(getattr(response, field))
+    return result
+
+
+def format_pivot_response(
+    response: data_v1beta.RunPivotReportResponse,
+    pivot_field_names: List[List[str]],
+    output_format: str = COMPACT,
+) -> Dict[str, Any]:
+    """Converts a pivot report response to a dictionary.
+
+    Args:
+        response: The pivot report response.
+        pivot_field_names: The `field_names` of each of the request's pivots.
+        output_format: Either `compact`, which returns the grid built by
+          `pivot_response_to_grid`, or `verbose`, which returns the
+          dictionary form of the response message.
+
+    Raises:
+        ValueError: If the output format is invalid.
+    """
+    check_output_format(output_format)
+    if output_format == COMPACT:
+        return pivot_response_to_grid(response, pivot_field_names)
+    return proto_to_dict(response)
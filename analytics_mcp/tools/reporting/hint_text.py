@@ -0,0 +1,245 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Precomputed hints for the reporting tool descriptions.
+
+Generated by `python -m analytics_mcp.tools.reporting.metadata`. Don't edit.
+"""
+
+DATE_RANGES_HINTS = """\
+Example date_range arguments:
+      1. A single date range:
+
+        [ {"start_date": "2025-01-01", "end_date": "2025-01-31", "name": "Jan2025"} ]
+
+      2. A relative date range using 'yesterday' and 'today':
+        [ {"start_date": "yesterday", "end_date": "today", "name": "YesterdayAndToday"} ]
+
+      3. A relative date range using 'NdaysAgo' and 'today':
+        [ {"start_date": "30daysAgo", "end_date": "yesterday", "name": "Previous30Days"}]
+
+      4. Multiple date ranges:
+        [ {"start_date": "2025-01-01", "end_date": "2025-01-31", "name": "Jan2025"}, {"start_date": "2025-02-01", "end_date": "2025-02-28", "name": "Feb2025"} ]
+    """
+
+DIMENSION_FILTER_HINTS = """\
+Example dimension_filter arguments:
+      1. A simple filter:
+        {"filter": {"field_name": "eventName", "string_filter": {"match_type": 2, "value": "add", "case_sensitive": false}}}
+
+      2. A NOT filter:
+        {"not_expression": {"filter": {"field_name": "eventName", "string_filter": {"match_type": 2, "value": "add", "case_sensitive": false}}}}
+
+      3. An empty value filter:
+        {"filter": {"field_name": "source", "empty_filter": {}}}
+
+      4. An AND group filter:
+        {"and_group": {"expressions": [{"filter": {"field_name": "sourceMedium", "string_filter": {"match_type": 1, "value": "google / cpc", "case_sensitive": false}}}, {"filter": {"field_name": "eventName", "in_list_filter": {"values": ["first_visit", "purchase", "add_to_cart"], "case_sensitive": true}}}]}}
+
+      5. An OR group filter:
+        {"or_group": {"expressions": [{"filter": {"field_name": "sourceMedium", "string_filter": {"match_type": 1, "value": "google / cpc", "case_sensitive": false}}}, {"filter": {"field_name": "eventName", "in_list_filter": {"values": ["first_visit", "purchase", "add_to_cart"], "case_sensitive": true}}}]}}
+
+    
+  Notes:
+    The API applies the `dimension_filter` and `metric_filter`
+    independently. As a result, some complex combinations of dimension and
+    metric filters are not possible in a single report request.
+
+    For example, you can't create a `dimension_filter` and `metric_filter`
+    combination for the following condition:
+
+    (
+      (eventName = "page_view" AND eventCount > 100)
+      OR
+      (eventName = "join_group" AND eventCount < 50)
+    )
+
+    This isn't possible because there's no way to apply the condition
+    "eventCount > 100" only to the data with eventName of "page_view", and
+    the condition "eventCount < 50" only to the data with eventName of
+    "join_group".
+
+    More generally, you can't define a `dimension_filter` and `metric_filter`
+    for:
+
+    (
+      ((dimension condition D1) AND (metric condition M1))
+      OR
+      ((dimension condition D2) AND (metric condition M2))
+    )
+
+    If you have complex conditions like this, either:
+
+    a)  Run a single report that applies a subset of the conditions that
+        the API supports as well as the data needed to perform filtering of the
+        API response on the client side. For example, for the condition:
+        (
+          (eventName = "page_view" AND eventCount > 100)
+          OR
+          (eventName = "join_group" AND eventCount < 50)
+        )
+        You could run a report that filters only on:
+        eventName one of "page_view" or "join_group"
+        and include the eventCount metric, then filter the API response on the
+        client side to apply the different metric filters for the different
+        events.
+
+    or
+
+    b)  Run a separate report for each combination of dimension condition and
+        metric condition. For the example above, you'd run one report for the
+        combination of (D1 AND M1), and another report for the combination of
+        (D2 AND M2).
+
+    Try to run fewer reports (option a) if possible. However, if running
+    fewer reports results in excessive quota usage for the API, use option
+    b. More information on quota usage is at
+    https://developers.google.com/analytics/blog/2023/data-api-quota-management.
+  """
+
+METRIC_FILTER_HINTS = """\
+Example metric_filter arguments:
+      1. A simple filter:
+        {"filter": {"field_name": "eventCount", "numeric_filter": {"operation": 4, "value": {"int64_value": "10"}}}}
+
+      2. A NOT filter:
+        {"not_expression": {"filter": {"field_name": "eventCount", "numeric_filter": {"operation": 4, "value": {"int64_value": "10"}}}}}
+
+      3. An empty value filter:
+        {"filter": {"field_name": "purchaseRevenue", "empty_filter": {}}}
+
+      4. An AND group filter:
+        {"and_group": {"expressions": [{"filter": {"field_name": "eventCount", "numeric_filter": {"operation": 4, "value": {"int64_value": "10"}}}}, {"filter": {"field_name": "purchaseRevenue", "between_filter": {"from_value": {"double_value": 10.0}, "to_value": {"double_value": 25.0}}}}]}}
+
+      5. An OR group filter:
+        {"or_group": {"expressions": [{"filter": {"field_name": "eventCount", "numeric_filter": {"operation": 4, "value": {"int64_value": "10"}}}}, {"filter": {"field_name": "purchaseRevenue", "between_filter": {"from_value": {"double_value": 10.0}, "to_value": {"double_value": 25.0}}}}]}}
+
+    
+  Notes:
+    The API applies the `dimension_filter` and `metric_filter`
+    independently. As a result, some complex combinations of dimension and
+    metric filters are not possible in a single report request.
+
+    For example, you can't create a `dimension_filter` and `metric_filter`
+    combination for the following condition:
+
+    (
+      (eventName = "page_view" AND eventCount > 100)
+      OR
+      (eventName = "join_group" AND eventCount < 50)
+    )
+
+    This isn't possible because there's no way to apply the condition
+    "eventCount > 100" only to the data with eventName of "page_view", and
+    the condition "eventCount < 50" only to the data with eventName of
+    "join_group".
+
+    More generally, you can't define a `dimension_filter` and `metric_filter`
+    for:
+
+    (
+      ((dimension condition D1) AND (metric condition M1))
+      OR
+      ((dimension condition D2) AND (metric condition M2))
+    )
+
+    If you have complex conditions like this, either:
+
+    a)  Run a single report that applies a subset of the conditions that
+        the API supports as well as the data needed to perform filtering of the
+        API response on the client side. For example, for the condition:
+        (
+          (eventName = "page_view" AND eventCount > 100)
+          OR
+          (eventName = "join_group" AND eventCount < 50)
+        )
+        You could run a report that filters only on:
+        eventName one of "page_view" or "join_group"
+        and include the eventCount metric, then filter the API response on the
+        client side to apply the different metric filters for the different
+        events.
+
+    or
+
+    b)  Run a separate report for each combination of dimension condition and
+        metric condition. For the example above, you'd run one report for the
+        combination of (D1 AND M1), and another report for the combination of
+        (D2 AND M2).
+
+    Try to run fewer reports (option a) if possible. However, if running
+    fewer reports results in excessive quota usage for the API, use option
+    b. More information on quota usage is at
+    https://developers.google.com/analytics/blog/2023/data-api-quota-management.
+  """
+
+ORDER_BYS_HINTS = """\
+Example order_bys arguments:
+
+    1.  Order by ascending 'eventName':
+        [ {"dimension": {"dimension_name": "eventName", "order_type": 1}, "desc": false} ]
+
+    2.  Order by descending 'eventName', ignoring case:
+        [ {"dimension": {"dimension_name": "campaignName", "order_type": 2}, "desc": true} ]
+
+    3.  Order by ascending 'audienceId':
+        [ {"dimension": {"dimension_name": "audienceId", "order_type": 3}, "desc": false} ]
+
+    4.  Order by descending 'eventCount':
+        [ {"metric": {"metric_name": "eventValue"}, "desc": true} ]
+
+    5.  Order by ascending 'eventCount':
+        [ {"metric": {"metric_name": "eventCount"}, "desc": false} ]
+
+    6.  Combination of dimension and metric order bys:
+        [
+          {"dimension": {"dimension_name": "eventName", "order_type": 1}, "desc": false},
+          {"metric": {"metric_name": "eventValue"}, "desc": true},
+        ]
+
+    7.  Order by multiple dimensions and metrics:
+        [
+          {"dimension": {"dimension_name": "eventName", "order_type": 1}, "desc": false},
+          {"dimension": {"dimension_name": "audienceId", "order_type": 3}, "desc": false},
+          {"metric": {"metric_name": "eventValue"}, "desc": true},
+        ]
+
+    The dimensions and metrics in order_bys must also be present in the report
+    request's "dimensions" and "metrics" arguments, respectively.
+    """
+
+PIVOTS_HINTS = """\
+Example pivots arguments:
+
+    1.  Sessions for the top 5 browsers (rows), broken out by the 10 countries
+        with the most sessions (columns), with dimensions
+        ["browser", "country"] and metrics ["sessions"]:
+        [
+          {"field_names": ["browser"], "limit": "5", "order_bys": [], "offset": "0", "metric_aggregations": []},
+          {"field_names": ["country"], "order_bys": [{"metric": {"metric_name": "sessions"}, "desc": true}], "limit": "10", "offset": "0", "metric_aggregations": []}
+        ]
+
+    2.  Rows by browser, with one column per combination of device category
+        and language, with dimensions
+        ["browser", "deviceCategory", "language"]:
+        [
+          {"field_names": ["browser"], "limit": "5", "order_bys": [], "offset": "0", "metric_aggregations": []},
+          {"field_names": ["deviceCategory", "language"], "limit": "20", "order_bys": [], "offset": "0", "metric_aggregations": []}
+        ]
+
+    The first pivot's field_names become the rows of the result, and the
+    field_names of the other pivots become its columns. Every field name in
+    pivots must also be present in the report request's "dimensions"
+    argument. Dimensions and metrics in a pivot's order_bys must also be
+    present in the request's "dimensions" and "metrics" arguments.
+    """
@@ -0,0 +1,471 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""On-disk store of the daily rows of reports whose data is final.
+
+Recurring reports such as "sessions by date and country for the last 90 days"
+mostly cover days whose data can no longer change. The store keeps the rows of
+each final day in a SQLite database, keyed by property, the shape of the
+query and the day. When a report with a date dimension runs, only the days
+that aren't stored, and recent days whose data may still change, are fetched
+from the Data API.
+
+The store is disabled unless `ANALYTICS_MCP_MATERIALIZE_PATH` is set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Tuple
+
+from analytics_mcp import config, stats
+from analytics_mcp.coordinator import on_shutdown
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.cache import canonical_request_key
+from analytics_mcp.tools.reporting.dates import resolve_date
+from analytics_mcp.tools.reporting.pagination import (
+    MAX_TOTAL_ROWS,
+    RunPage,
+    run_report_all_pages,
+)
+from analytics_mcp.tools.reporting.sharding import DATE_DIMENSIONS, sort_rows
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+_logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    property TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    day TEXT NOT NULL,
+    response BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (property, shape, day)
+);
+CREATE INDEX IF NOT EXISTS days_last_used ON days (last_used);
+"""
+
+# The fraction of the maximum size the store shrinks to when it's full.
+_COMPACTED_FRACTION = 0.8
+
+
+def is_materializable(request: data_v1beta.RunReportRequest) -> bool:
+    """Returns whether the report's rows can be stored day by day.
+
+    The report needs a single date range and a dimension that places each row
+    in a single day. Reports with totals, maximums or minimums can't be
+    assembled from stored days.
+    """
+    return (
+        len(request.date_ranges) == 1
+        and not request.metric_aggregations
+        and not any("pivot" in order_by for order_by in request.order_bys)
+        and _date_dimension_index(request) is not None
+    )
+
+
+def _date_dimension_index(request: data_v1beta.RunReportRequest) -> int | None:
+    for index, dimension in enumerate(request.dimensions):
+        if dimension.name in DATE_DIMENSIONS:
+            return index
+    return None
+
+
+def query_shape(request: data_v1beta.RunReportRequest) -> str:
+    """Returns a key that's identical for reports that differ only in dates.
+
+    The key ignores the date range, order, paging and property quota of the
+    report, which don't affect the rows of a day.
+    """
+    shape = data_v1beta.RunReportRequest(request)
+    for field in (
+        "date_ranges",
+        "order_bys",
+        "limit",
+        "offset",
+        "return_property_quota",
+    ):
+        delattr(shape, field)
+    # Dates are cleared, so `today` isn't used.
+    key = canonical_request_key(shape, datetime.date.min)
+    return hashlib.sha256(key).hexdigest()
+
+
+class MaterializedStore:
+    """A SQLite store of report rows for single days, bounded in size.
+
+    Each stored day is a compressed, serialized `RunReportResponse` holding
+    the headers, metadata and rows of that day. When the store exceeds its
+    maximum size, the least recently used days are removed. The database
+    file isn't vacuumed, since SQLite reuses the freed pages for new days.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        """Initializes the store.
+
+        Args:
+            path: The path of the SQLite database. An empty path disables the
+              store.
+            max_bytes: The maximum total size of the stored days.
+        """
+        self._path = path
+        self._max_bytes = max_bytes
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._compactions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the store is configured."""
+        return bool(self._path) and self._max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens the database. Must be called while holding the lock."""
+        if self._connection is None:
+            connection = sqlite3.connect(self._path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def load(
+        self, property_rn: str, shape: str, days: Iterable[datetime.date]
+    ) -> Dict[datetime.date, data_v1beta.RunReportResponse]:
+        """Returns the responses stored for any of the given days."""
+        days = [day.isoformat() for day in days]
+        if not days:
+            return {}
+        with self._lock:
+            connection = self._connect()
+            placeholders = ", ".join("?" * len(days))
+            rows = connection.execute(
+                "SELECT day, response FROM days WHERE property = ? AND "
+                f"shape = ? AND day IN ({placeholders})",
+                (property_rn, shape, *days),
+            ).fetchall()
+            if rows:
+                with connection:
+                    connection.executemany(
+                        "UPDATE days SET last_used = ? WHERE property = ? "
+                        "AND shape = ? AND day = ?",
+                        [
+                            (time.time(), property_rn, shape, day)
+                            for day, _ in rows
+                        ],
+                    )
+            self._hits += len(rows)
+            self._misses += len(days) - len(rows)
+        return {
+            datetime.date.fromisoformat(day): (
+                data_v1beta.RunReportResponse.deserialize(
+                    zlib.decompress(response)
+                )
+            )
+            for day, response in rows
+        }
+
+    def save(
+        self,
+        property_rn: str,
+        shape: str,
+        responses: Dict[datetime.date, data_v1beta.RunReportResponse],
+    ) -> None:
+        """Stores the responses of single days and enforces the size limit."""
+        if not responses:
+            return
+        now = time.time()
+        values = [
+            (
+                property_rn,
+                shape,
+                day.isoformat(),
+                zlib.compress(
+                    data_v1beta.RunReportResponse.serialize(response)
+                ),
+                now,
+            )
+            for day, response in responses.items()
+        ]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?)",
+                    values,
+                )
+            if self._size(connection) > self._max_bytes:
+                self._compact(connection)
+
+    def _size(self, connection: sqlite3.Connection) -> int:
+        (size,) = connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(response)), 0) FROM days"
+        ).fetchone()
+        return size
+
+    def _compact(self, connection: sqlite3.Connection) -> None:
+        """Removes the least recently used days."""
+        target = self._max_bytes * _COMPACTED_FRACTION
+        size = self._size(connection)
+        removed = []
+        for rowid, length in connection.execute(
+            "SELECT rowid, LENGTH(response) FROM days ORDER BY last_used"
+        ).fetchall():
+            if size <= target:
+                break
+            removed.append((rowid,))
+            size -= length
+        with connection:
+            connection.executemany("DELETE FROM days WHERE rowid = ?", removed)
+        self._evictions += len(removed)
+        self._compactions += 1
+        _logger.info(
+            "Compacted the materialized report store, removing %d days",
+            len(removed),
+        )
+
+    def clear(self) -> None:
+        """Removes all stored days."""
+        if not self.enabled:
+            return
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM days")
+            connection.execute("VACUUM")
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the store's size and the days served from it and fetched."""
+        result = {
+            "enabled": self.enabled,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "compactions": self._compactions,
+        }
+        if self.enabled and self._connection is not None:
+            with self._lock:
+                result["bytes"] = self._size(self._connection)
+                (result["days"],) = self._connection.execute(
+                    "SELECT COUNT(*) FROM days"
+                ).fetchone()
+        return result
+
+
+# The number of days after which a day's data no longer changes. Days within
+# the horizon are always fetched from the API and never stored.
+FINAL_AFTER_DAYS = config.get_int("MATERIALIZE_FINAL_AFTER_DAYS", 3)
+
+materialized_store = MaterializedStore(
+    config.get_str("MATERIALIZE_PATH", ""),
+    config.get_int("MATERIALIZE_MAX_BYTES", 256 * 1024 * 1024),
+)
+stats.register_stats_provider("materialized_reports", materialized_store.stats)
+
+
+@on_shutdown
+async def close_store() -> None:
+    """Closes the materialized report store."""
+    materialized_store.close()
+
+
+def _contiguous_ranges(
+    days: List[datetime.date],
+) -> List[Tuple[datetime.date, datetime.date]]:
+    """Groups sorted days into (start, end) ranges of consecutive days."""
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] + datetime.timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def _split_by_day(
+    response: data_v1beta.RunReportResponse,
+    date_index: int,
+    start: datetime.date,
+    end: datetime.date,
+) -> Dict[datetime.date, data_v1beta.RunReportResponse]:
+    """Splits the response of a date range into a response for each day."""
+    response_pb = data_v1beta.RunReportResponse.pb(response)
+    days = {}
+    day = start
+    while day <= end:
+        day_response = data_v1beta.RunReportResponse()
+        day_pb = data_v1beta.RunReportResponse.pb(day_response)
+        day_pb.dimension_headers.extend(response_pb.dimension_headers)
+        day_pb.metric_headers.extend(response_pb.metric_headers)
+        day_pb.metadata.CopyFrom(response_pb.metadata)
+        days[day.strftime("%Y%m%d")] = day_response
+        day += datetime.timedelta(days=1)
+    for row in response_pb.rows:
+        # Values of the `dateHour` and `dateHourMinute` dimensions also start
+        # with the date.
+        day_response = days.get(row.dimension_values[date_index].value[:8])
+        if day_response is not None:
+            data_v1beta.RunReportResponse.pb(day_response).rows.append(row)
+    return {
+        datetime.datetime.strptime(key, "%Y%m%d").date(): day_response
+        for key, day_response in days.items()
+    }
+
+
+def _merge_metadata(merged_pb, metadata) -> None:
+    """Adds the metadata of a range or day to the merged response's."""
+    merged_pb.metadata.sampling_metadatas.extend(metadata.sampling_metadatas)
+    if metadata.currency_code:
+        merged_pb.metadata.currency_code = metadata.currency_code
+    if metadata.time_zone:
+        merged_pb.metadata.time_zone = metadata.time_zone
+    if metadata.subject_to_thresholding:
+        merged_pb.metadata.subject_to_thresholding = True
+    if metadata.data_loss_from_other_row:
+        merged_pb.metadata.data_loss_from_other_row = True
+
+
+async def run_report_materialized(
+    run_page: RunPage,
+    request: data_v1beta.RunReportRequest,
+    today: datetime.date,
+    max_rows: int | None = None,
+    store: MaterializedStore = materialized_store,
+) -> data_v1beta.RunReportResponse:
+    """Runs a report using the stored rows of days whose data is final.
+
+    Fetches the days that aren't stored, and the days within
+    `FINAL_AFTER_DAYS` of today, in as few date ranges as possible, and
+    stores the final days. Each range is fetched in the request's order, up
+    to the rows needed for the merged result, so a range with more rows is
+    fetched only in part and its days aren't stored. Days of sampled
+    responses, or of responses whose rows lost data to the `(other)` row,
+    aren't stored either. The merged rows are sorted according to the
+    request's `order_bys`, and its `offset` applies to the merged rows.
+
+    Args:
+        run_page: Async function that runs a single page of the report.
+        request: A report for which `is_materializable` is true.
+        today: The current date in the property's time zone.
+        max_rows: The maximum number of merged rows to return. Capped at
+          `MAX_TOTAL_ROWS`.
+        store: The store of final days.
+    """
+    (date_range,) = request.date_ranges
+    start = resolve_date(date_range.start_date, today)
+    end = resolve_date(date_range.end_date, today)
+    if end < start:
+        raise ValueError("The date range of the report is empty.")
+    days = [
+        start + datetime.timedelta(days=offset)
+        for offset in range((end - start).days + 1)
+    ]
+    last_final_day = today - datetime.timedelta(days=FINAL_AFTER_DAYS)
+    if max_rows is None:
+        max_rows = MAX_TOTAL_ROWS
+    row_limit = min(max_rows, MAX_TOTAL_ROWS)
+    shape = query_shape(request)
+    stored = await asyncio.to_thread(
+        store.load,
+        request.property,
+        shape,
+        [day for day in days if day <= last_final_day],
+    )
+
+    async def fetch(
+        range_start: datetime.date, range_end: datetime.date
+    ) -> data_v1beta.RunReportResponse:
+        range_request = data_v1beta.RunReportRequest(request)
+        range_request.date_ranges = [
+            data_v1beta.DateRange(
+                start_date=range_start.isoformat(),
+                end_date=range_end.isoformat(),
+            )
+        ]
+        range_request.offset = 0
+        range_request.limit = 0
+        return await run_report_all_pages(
+            run_page, range_request, max_rows=request.offset + row_limit
+        )
+
+    missing = _contiguous_ranges([day for day in days if day not in stored])
+    fetched = await asyncio.gather(
+        *(fetch(range_start, range_end) for range_start, range_end in missing)
+    )
+
+    date_index = _date_dimension_index(request)
+    by_day = dict(stored)
+    new_final_days = {}
+    merged = data_v1beta.RunReportResponse()
+    merged_pb = data_v1beta.RunReportResponse.pb(merged)
+    # The total number of rows of the stored days and fetched ranges.
+    row_count = 0
+    for day_response in stored.values():
+        day_pb = data_v1beta.RunReportResponse.pb(day_response)
+        _merge_metadata(merged_pb, day_pb.metadata)
+        row_count += len(day_pb.rows)
+    for (range_start, range_end), response in zip(missing, fetched):
+        response_pb = data_v1beta.RunReportResponse.pb(response)
+        metadata = response_pb.metadata
+        _merge_metadata(merged_pb, metadata)
+        row_count += response_pb.row_count
+        if "property_quota" in response:
+            merged.property_quota = response.property_quota
+        split = _split_by_day(response, date_index, range_start, range_end)
+        by_day.update(split)
+        complete = len(response_pb.rows) >= response_pb.row_count
+        if (
+            complete
+            and not metadata.sampling_metadatas
+            and not metadata.data_loss_from_other_row
+        ):
+            new_final_days.update(
+                (day, day_response)
+                for day, day_response in split.items()
+                if day <= last_final_day
+            )
+    if new_final_days:
+        await asyncio.to_thread(
+            store.save, request.property, shape, new_final_days
+        )
+
+    first_pb = data_v1beta.RunReportResponse.pb(by_day[days[0]])
+    merged_pb.dimension_headers.extend(first_pb.dimension_headers)
+    merged_pb.metric_headers.extend(first_pb.metric_headers)
+    rows = [
+        row
+        for day in days
+        for row in data_v1beta.RunReportResponse.pb(by_day[day]).rows
+    ]
+    sort_rows(rows, request, merged_pb)
+    merged_pb.row_count = row_count
+    merged_pb.rows.extend(rows[request.offset : request.offset + row_limit])
+    return merged
@@ -12,21 +12,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Metadata to provide context and hints for reporting tools."""
+"""Metadata to provide context and hints for reporting tools.
 
+The hints in the descriptions of the reporting tools are built from protobuf
+messages, which requires the Data API client library. To keep it out of
+server startup, the hint text is precomputed in the `hint_text` module. After
+changing a hint, regenerate the module with:
+
+    python -m analytics_mcp.tools.reporting.metadata
+"""
+
+from __future__ import annotations
+
+import pathlib
 from typing import Any, Dict, List
 
 from analytics_mcp.coordinator import mcp
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.admin.directory import accepts_property_names
+from analytics_mcp.tools.calls import with_deadline
+from analytics_mcp.tools.reporting import hint_text
+from analytics_mcp.tools.reporting.metadata_cache import (
+    DIMENSION,
+    METRIC,
+    metadata_cache,
+)
 from analytics_mcp.tools.utils import (
     construct_property_rn,
-    create_data_api_client,
-    proto_to_dict,
     proto_to_json,
 )
-from google.analytics import data_v1beta
 
+data_v1beta = lazy_import("google.analytics.data_v1beta")
 
-def get_date_ranges_hints():
+
+def _build_date_ranges_hints():
     range_jan = data_v1beta.DateRange(
         start_date="2025-01-01", end_date="2025-01-31", name="Jan2025"
     )
@@ -116,8 +135,8 @@ _FILTER_NOTES = """
   """
 
 
-def get_metric_filter_hints():
-    """Returns hints and samples for metric_filter arguments."""
+def _build_metric_filter_hints():
+    """Builds hints and samples for metric_filter arguments."""
     event_count_gt_10_filter = data_v1beta.FilterExpression(
         filter=data_v1beta.Filter(
             field_name="eventCount",
@@ -177,8 +196,8 @@ def get_metric_filter_hints():
     )
 
 
-def get_dimension_filter_hints():
-    """Returns hints and samples for dimension_filter arguments."""
+def _build_dimension_filter_hints():
+    """Builds hints and samples for dimension_filter arguments."""
     begins_with = data_v1beta.FilterExpression(
         filter=data_v1beta.Filter(
             field_name="eventName",
@@ -244,8 +263,8 @@ def get_dimension_filter_hints():
     )
 
 
-def get_order_bys_hints():
-    """Returns hints and examples for order_bys arguments."""
+def _build_order_bys_hints():
+    """Builds hints and examples for order_bys arguments."""
     dimension_alphanumeric_ascending = data_v1beta.OrderBy(
         dimension=data_v1beta.OrderBy.DimensionOrderBy(
             dimension_name="eventName",
@@ -315,9 +334,115 @@ def get_order_bys_hints():
     """
 
 
+def _build_pivots_hints():
+    """Builds hints and examples for pivots arguments."""
+    rows_by_browser = data_v1beta.Pivot(
+        field_names=["browser"],
+        limit=5,
+    )
+    columns_by_country = data_v1beta.Pivot(
+        field_names=["country"],
+        limit=10,
+        order_bys=[
+            data_v1beta.OrderBy(
+                metric=data_v1beta.OrderBy.MetricOrderBy(
+                    metric_name="sessions"
+                ),
+                desc=True,
+            )
+        ],
+    )
+    columns_by_device_and_language = data_v1beta.Pivot(
+        field_names=["deviceCategory", "language"],
+        limit=20,
+    )
+
+    return f"""Example pivots arguments:
+
+    1.  Sessions for the top 5 browsers (rows), broken out by the 10 countries
+        with the most sessions (columns), with dimensions
+        ["browser", "country"] and metrics ["sessions"]:
+        [
+          {proto_to_json(rows_by_browser)},
+          {proto_to_json(columns_by_country)}
+        ]
+
+    2.  Rows by browser, with one column per combination of device category
+        and language, with dimensions
+        ["browser", "deviceCategory", "language"]:
+        [
+          {proto_to_json(rows_by_browser)},
+          {proto_to_json(columns_by_device_and_language)}
+        ]
+
+    The first pivot's field_names become the rows of the result, and the
+    field_names of the other pivots become its columns. Every field name in
+    pivots must also be present in the report request's "dimensions"
+    argument. Dimensions and metrics in a pivot's order_bys must also be
+    present in the request's "dimensions" and "metrics" arguments.
+    """
+
+
+# Builders of the precomputed hints, keyed by their name in `hint_text`.
+_HINT_BUILDERS = {
+    "DATE_RANGES_HINTS": _build_date_ranges_hints,
+    "DIMENSION_FILTER_HINTS": _build_dimension_filter_hints,
+    "METRIC_FILTER_HINTS": _build_metric_filter_hints,
+    "ORDER_BYS_HINTS": _build_order_bys_hints,
+    "PIVOTS_HINTS": _build_pivots_hints,
+}
+
+
+def generate_hint_text_module() -> str:
+    """Returns the source code of the `hint_text` module."""
+    license_header = pathlib.Path(__file__).read_text().split("\n\n")[0]
+    constants = []
+    for name, build in _HINT_BUILDERS.items():
+        text = build()
+        if '"""' in text or "\\" in text:
+            constants.append(f"{name} = {text!r}")
+        else:
+            constants.append(f'{name} = """\\\n{text}"""')
+    return (
+        f"{license_header}\n\n"
+        '"""Precomputed hints for the reporting tool descriptions.\n\n'
+        "Generated by `python -m analytics_mcp.tools.reporting.metadata`. Don't "
+        'edit.\n"""\n\n'
+        + "\n\n".join(constants)
+        + "\n"
+    )
+
+
+def get_date_ranges_hints():
+    """Returns hints and samples for date_ranges arguments."""
+    return hint_text.DATE_RANGES_HINTS
+
+
+def get_metric_filter_hints():
+    """Returns hints and samples for metric_filter arguments."""
+    return hint_text.METRIC_FILTER_HINTS
+
+
+def get_dimension_filter_hints():
+    """Returns hints and samples for dimension_filter arguments."""
+    return hint_text.DIMENSION_FILTER_HINTS
+
+
+def get_order_bys_hints():
+    """Returns hints and examples for order_bys arguments."""
+    return hint_text.ORDER_BYS_HINTS
+
+
+def get_pivots_hints():
+    """Returns hints and examples for pivots arguments."""
+    return hint_text.PIVOTS_HINTS
+
+
 @mcp.tool(
     title="Retrieves the custom Core Reporting dimensions and metrics for a specific property"
 )
+@with_deadline()
+@accepts_property_names
 async def get_custom_dimensions_and_metrics(
     property_id: int | str,
 ) -> Dict[str, List[Dict[str, Any]]]:
@@ -327,22 +452,106 @@ async def get_custom_dimensions_and_metrics(
         property_id: The Google Analytics property ID. Accepted formats are:
           - A number
           - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
 
     """
-    metadata = await create_data_api_client().get_metadata(
-        name=f"{construct_property_rn(property_id)}/metadata"
-    )
-    custom_metrics = [
-        proto_to_dict(metric)
-        for metric in metadata.metrics
-        if metric.custom_definition
-    ]
-    custom_dimensions = [
-        proto_to_dict(dimension)
-        for dimension in metadata.dimensions
-        if dimension.custom_definition
-    ]
+    metadata = await metadata_cache.get(construct_property_rn(property_id))
     return {
-        "custom_dimensions": custom_dimensions,
-        "custom_metrics": custom_metrics,
+        "custom_dimensions": [
+            dimension
+            for dimension in metadata.dimensions
+            if dimension["custom_definition"]
+        ],
+        "custom_metrics": [
+            metric for metric in metadata.metrics if metric["custom_definition"]
+        ],
     }
+
+
+@mcp.tool(title="Searches the dimensions and metrics available to a property")
+@with_deadline()
+@accepts_property_names
+async def search_dimensions_and_metrics(
+    property_id: int | str,
+    prefix: str = None,
+    kind: str = None,
+    category: str = None,
+    custom: bool = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Searches the standard and custom dimensions and metrics of a property.
+
+    Use this tool to find the API name of a field instead of downloading every
+    dimension and metric. All criteria are optional and are combined with AND.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+        prefix: A case-insensitive prefix of the field's API name, such as
+          "session" or "customEvent:".
+        kind: Either "dimension" or "metric".
+        category: The exact category of the field, such as "Event" or
+          "Traffic source". Use the `list_dimension_and_metric_categories`
+          tool to retrieve the categories of a property.
+        custom: True to return only custom fields, False to return only
+          standard fields.
+        limit: The maximum number of fields to return.
+    """
+    if kind is not None and kind not in (DIMENSION, METRIC):
+        raise ValueError(
+            f"Invalid kind: {kind!r}. Must be '{DIMENSION}' or '{METRIC}'."
+        )
+    metadata = await metadata_cache.get(construct_property_rn(property_id))
+    fields = metadata.search(
+        prefix=prefix, kind=kind, category=category, custom=custom
+    )
+    return {"total_matches": len(fields), "fields": fields[:limit]}
+
+
+@mcp.tool(
+    title="Lists the categories of dimensions and metrics available to a property"
+)
+@with_deadline()
+@accepts_property_names
+async def list_dimension_and_metric_categories(
+    property_id: int | str,
+) -> Dict[str, Dict[str, int]]:
+    """Returns the number of dimensions and metrics in each category.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+    """
+    metadata = await metadata_cache.get(construct_property_rn(property_id))
+    return metadata.categories()
+
+
+@mcp.tool(title="Clears cached dimension and metric metadata")
+@accepts_property_names
+async def invalidate_metadata_cache(property_id: int | str = None) -> str:
+    """Clears the cached dimensions and metrics of a property.
+
+    Use this after creating or archiving a custom dimension or metric so
+    that other tools see the change.
+
+    Args:
+        property_id: The Google Analytics property ID. If omitted, clears the
+          metadata of all properties. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+    """
+    if property_id is None:
+        metadata_cache.invalidate()
+        return "Cleared cached metadata for all properties."
+    property_rn = construct_property_rn(property_id)
+    metadata_cache.invalidate(property_rn)
+    return f"Cleared cached metadata for {property_rn}."
+
+
+if __name__ == "__main__":
+    pathlib.Path(hint_text.__file__).write_text(generate_hint_text_module())
@@ -0,0 +1,181 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-property cache of indexed dimension and metric metadata."""
+
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any, Dict, List, Tuple
+
+from analytics_mcp import config, stats
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting import data_api
+from analytics_mcp.tools.utils import proto_to_dict
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+DIMENSION = "dimension"
+METRIC = "metric"
+
+
+class PropertyMetadata:
+    """Dimensions and metrics of a property, indexed for fast lookups.
+
+    Each field is represented by the dictionary form of its
+    `DimensionMetadata` or `MetricMetadata` message.
+    """
+
+    def __init__(self, metadata: data_v1beta.Metadata) -> None:
+        """Builds the indexes from a Data API `Metadata` response."""
+        self.dimensions = [proto_to_dict(d) for d in metadata.dimensions]
+        self.metrics = [proto_to_dict(m) for m in metadata.metrics]
+        # (kind, field) pairs for every dimension and metric.
+        self._fields: List[Tuple[str, Dict[str, Any]]] = [
+            (DIMENSION, field) for field in self.dimensions
+        ] + [(METRIC, field) for field in self.metrics]
+        self._by_api_name: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._by_category: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for entry in self._fields:
+            _, field = entry
+            self._by_category.setdefault(field["category"], []).append(entry)
+            for name in field["deprecated_api_names"]:
+                self._by_api_name.setdefault(name, entry)
+        # Current API names take precedence over deprecated ones.
+        for entry in self._fields:
+            self._by_api_name[entry[1]["api_name"]] = entry
+        # Sorted (lowercase API name, index) pairs used for prefix search.
+        self._sorted_names: List[Tuple[str, int]] = sorted(
+            (field["api_name"].lower(), i)
+            for i, (_, field) in enumerate(self._fields)
+        )
+
+    def get(self, api_name: str) -> Dict[str, Any] | None:
+        """Returns the field with the API name or deprecated API name."""
+        entry = self._by_api_name.get(api_name)
+        return None if entry is None else entry[1]
+
+    def kind_of(self, api_name: str) -> str | None:
+        """Returns `dimension`, `metric` or None if the field doesn't exist."""
+        entry = self._by_api_name.get(api_name)
+        return None if entry is None else entry[0]
+
+    def categories(self) -> Dict[str, Dict[str, int]]:
+        """Returns the number of dimensions and metrics in each category."""
+        counts = {}
+        for category, entries in sorted(self._by_category.items()):
+            counts[category] = {
+                DIMENSION: sum(1 for kind, _ in entries if kind == DIMENSION),
+                METRIC: sum(1 for kind, _ in entries if kind == METRIC),
+            }
+        return counts
+
+    def search(
+        self,
+        prefix: str | None = None,
+        kind: str | None = None,
+        category: str | None = None,
+        custom: bool | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the fields that match all of the given criteria.
+
+        Each returned field has an added `kind` key whose value is either
+        `dimension` or `metric`.
+
+        Args:
+            prefix: Case-insensitive prefix of the API name.
+            kind: Either `dimension` or `metric`.
+            category: The exact category, such as `Event`.
+            custom: Whether to return only custom fields (True) or only
+              standard fields (False).
+        """
+        lowered_prefix = prefix.lower() if prefix else None
+        if category is not None:
+            candidates = self._by_category.get(category, [])
+        elif lowered_prefix:
+            start = bisect.bisect_left(self._sorted_names, (lowered_prefix, -1))
+            candidates = []
+            for name, index in self._sorted_names[start:]:
+                if not name.startswith(lowered_prefix):
+                    break
+                candidates.append(self._fields[index])
+        else:
+            candidates = self._fields
+
+        return [
+            {"kind": field_kind, **field}
+            for field_kind, field in candidates
+            if (kind is None or field_kind == kind)
+            and (custom is None or field["custom_definition"] == custom)
+            and (
+                lowered_prefix is None
+                or field["api_name"].lower().startswith(lowered_prefix)
+            )
+        ]
+
+
+class MetadataCache:
+    """Caches the indexed metadata of each property for a fixed time."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        """Initializes the cache.
+
+        Args:
+            ttl_seconds: How long to keep a property's metadata.
+        """
+        self._ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[PropertyMetadata, float]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    async def get(self, property_rn: str) -> PropertyMetadata:
+        """Returns the metadata for the property, fetching it if needed.
+
+        Args:
+            property_rn: The property resource name, such as `properties/1234`.
+        """
+        entry = self._entries.get(property_rn)
+        if entry is not None and time.monotonic() < entry[1]:
+            self._hits += 1
+            return entry[0]
+        self._misses += 1
+        response = await data_api.get_metadata(f"{property_rn}/metadata")
+        metadata = PropertyMetadata(response)
+        self._entries[property_rn] = (
+            metadata,
+            time.monotonic() + self._ttl_seconds,
+        )
+        return metadata
+
+    def invalidate(self, property_rn: str | None = None) -> None:
+        """Removes the metadata of a property, or of all properties if None."""
+        if property_rn is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(property_rn, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of cached properties, hits and misses."""
+        return {
+            "properties": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+metadata_cache = MetadataCache(
+    config.get_float("METADATA_CACHE_TTL_SECONDS", 3600.0)
+)
+stats.register_stats_provider("metadata_cache", metadata_cache.stats)
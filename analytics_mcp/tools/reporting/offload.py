@@ -0,0 +1,163 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs the conversion of large report responses in a worker pool.
+
+Converting a response with many rows takes long enough to stall every other
+request served by the event loop, so responses with at least
+`ANALYTICS_MCP_OFFLOAD_MIN_ROWS` rows are converted in a thread or process
+pool instead. The response is passed to the pool as serialized protobuf
+bytes, which are cheap to send to another process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+from typing import Any, Callable, Dict, TypeVar
+
+from analytics_mcp import config, stats
+from analytics_mcp.coordinator import on_shutdown
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.formatting import format_response
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+proto = lazy_import("proto")
+
+_T = TypeVar("_T")
+
+THREAD = "thread"
+PROCESS = "process"
+
+# Responses with at least this many rows are converted in the pool. 0
+# disables offloading.
+_MIN_ROWS = config.get_int("OFFLOAD_MIN_ROWS", 10_000)
+
+# Either `thread` or `process`.
+_EXECUTOR_TYPE = config.get_str("OFFLOAD_EXECUTOR", THREAD)
+
+# The maximum number of workers in the pool.
+_MAX_WORKERS = config.get_int("OFFLOAD_WORKERS", 2)
+
+# Names of the response types that can be converted in the pool.
+_RESPONSE_TYPES = ("RunReportResponse", "RunRealtimeReportResponse")
+
+_executor: concurrent.futures.Executor | None = None
+_inline_conversions = 0
+_offloaded_conversions = 0
+
+
+def _convert_serialized(
+    function: Callable[..., _T], type_name: str, data: bytes, *args: Any
+) -> _T:
+    """Parses a serialized response and converts it. Runs in a worker."""
+    response = getattr(data_v1beta, type_name).deserialize(data)
+    return function(response, *args)
+
+
+def _get_executor() -> concurrent.futures.Executor:
+    """Returns the worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        if _EXECUTOR_TYPE == PROCESS:
+            _executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=_MAX_WORKERS
+            )
+        elif _EXECUTOR_TYPE == THREAD:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_MAX_WORKERS,
+                thread_name_prefix="analytics-mcp-convert",
+            )
+        else:
+            raise ValueError(
+                f"Invalid value for ANALYTICS_MCP_OFFLOAD_EXECUTOR: "
+                f"{_EXECUTOR_TYPE!r}. Must be '{THREAD}' or '{PROCESS}'."
+            )
+    return _executor
+
+
+async def convert_async(
+    function: Callable[..., _T], response: proto.Message, *args: Any
+) -> _T:
+    """Calls `function(response, *args)`, in the worker pool if it's large.
+
+    With the process pool, `function` must be a module-level function or a
+    method of a module-level class, and its result must be picklable.
+
+    Args:
+        function: The function that converts the response.
+        response: A `RunReportResponse` or `RunRealtimeReportResponse`.
+        *args: The other arguments of `function`.
+    """
+    global _inline_conversions, _offloaded_conversions
+    response_type = type(response)
+    row_count = len(response_type.pb(response).rows)
+    if (
+        _MIN_ROWS <= 0
+        or row_count < _MIN_ROWS
+        or response_type.__name__ not in _RESPONSE_TYPES
+    ):
+        _inline_conversions += 1
+        return function(response, *args)
+
+    _offloaded_conversions += 1
+    data = response_type.serialize(response)
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_executor(),
+        _convert_serialized,
+        function,
+        response_type.__name__,
+        data,
+        *args,
+    )
+
+
+async def format_response_async(
+    response: proto.Message,
+    output_format: str,
+    fingerprint: str | None = None,
+) -> Dict[str, Any]:
+    """Converts a report response, in the worker pool if it's large.
+
+    Args:
+        response: A `RunReportResponse` or `RunRealtimeReportResponse`.
+        output_format: Either `verbose` or `compact`.
+        fingerprint: The response's fingerprint, if it's already known.
+    """
+    return await convert_async(
+        format_response, response, output_format, fingerprint
+    )
+
+
+@on_shutdown
+async def shutdown_executor() -> None:
+    """Shuts down the worker pool."""
+    global _executor
+    executor = _executor
+    _executor = None
+    if executor is not None:
+        await asyncio.to_thread(executor.shutdown, wait=True)
+
+
+def _stats() -> Dict[str, Any]:
+    """Returns the number of inline and offloaded conversions."""
+    return {
+        "executor": _EXECUTOR_TYPE,
+        "min_rows": _MIN_ROWS,
+        "inline_conversions": _inline_conversions,
+        "offloaded_conversions": _offloaded_conversions,
+    }
+
+
+stats.register_stats_provider("response_conversion", _stats)
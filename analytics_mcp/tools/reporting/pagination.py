@@ -0,0 +1,110 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fetches every page of a report concurrently and merges the pages."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+from analytics_mcp import config
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.quota import bulk
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+# The maximum number of rows the Data API returns in a single response.
+MAX_PAGE_SIZE = 250_000
+
+# The number of rows requested per page when fetching all rows, unless the
+# caller provides a `limit`.
+DEFAULT_PAGE_SIZE = config.get_int("PAGINATION_PAGE_SIZE", 100_000)
+
+# The maximum number of pages fetched concurrently for a single report.
+MAX_CONCURRENT_PAGES = config.get_int("PAGINATION_CONCURRENCY", 4)
+
+# Hard limit on the total number of rows fetched for a single report.
+MAX_TOTAL_ROWS = config.get_int("PAGINATION_MAX_TOTAL_ROWS", 1_000_000)
+
+RunPage = Callable[
+    ["data_v1beta.RunReportRequest"],
+    Awaitable["data_v1beta.RunReportResponse"],
+]
+
+
+async def run_report_all_pages(
+    run_page: RunPage,
+    request: data_v1beta.RunReportRequest,
+    max_rows: int | None = None,
+    max_concurrency: int = MAX_CONCURRENT_PAGES,
+) -> data_v1beta.RunReportResponse:
+    """Runs a report and returns a single response containing all its rows.
+
+    Fetches the first page to learn the report's `row_count`, then fetches the
+    remaining pages concurrently as bulk calls and appends their rows in
+    order. The returned response's `row_count` is the total number of rows in
+    the report, so it's larger than the number of rows returned if the report
+    exceeds `max_rows`.
+
+    Args:
+        run_page: Async function that runs a single page of the report.
+        request: The report request. Its `limit`, if set, is used as the page
+          size and its `offset`, if set, is the first row fetched.
+        max_rows: The maximum number of rows to fetch. Capped at
+          `MAX_TOTAL_ROWS`.
+        max_concurrency: The maximum number of pages fetched concurrently.
+
+    Raises:
+        ValueError: If max_rows or max_concurrency is not a positive integer.
+    """
+    if max_rows is None:
+        max_rows = MAX_TOTAL_ROWS
+    if max_rows < 1:
+        raise ValueError(
+            f"Invalid max_rows: {max_rows}. Must be a positive integer."
+        )
+    if max_concurrency < 1:
+        raise ValueError(
+            f"Invalid max_concurrency: {max_concurrency}. "
+            "Must be a positive integer."
+        )
+    max_rows = min(max_rows, MAX_TOTAL_ROWS)
+    page_size = min(request.limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    start = request.offset
+
+    first_request = data_v1beta.RunReportRequest(request)
+    first_request.limit = min(page_size, max_rows)
+    first_page = await run_page(first_request)
+
+    end = min(first_page.row_count, start + max_rows)
+    offsets = range(start + first_request.limit, end, page_size)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(offset: int) -> data_v1beta.RunReportResponse:
+        page_request = data_v1beta.RunReportRequest(request)
+        page_request.offset = offset
+        page_request.limit = min(page_size, end - offset)
+        async with semaphore:
+            with bulk():
+                return await run_page(page_request)
+
+    pages = await asyncio.gather(*(fetch(offset) for offset in offsets))
+
+    # Appends rows using the underlying protobuf messages, which avoids
+    # wrapping every row in a proto-plus message.
+    merged_rows = data_v1beta.RunReportResponse.pb(first_page).rows
+    for page in pages:
+        merged_rows.extend(data_v1beta.RunReportResponse.pb(page).rows)
+    return first_page
@@ -0,0 +1,394 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Admission control for Data API calls based on each property's quota.
+
+Every report call asks the API for the property's quota, and the scheduler
+tracks the tokens remaining in each quota window. Calls for a property are
+limited to the property's concurrent request quota, and calls that would
+exhaust a token budget are delayed until the budget refills or rejected if
+that's too far away. Bulk calls, such as the extra pages of a large report,
+stop early enough to leave a reserve of tokens for interactive calls, and
+interactive calls are admitted ahead of bulk calls waiting for a slot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import heapq
+import itertools
+import logging
+import time
+import zoneinfo
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+)
+
+from analytics_mcp import config, stats
+from analytics_mcp.lazy import lazy_import
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+_logger = logging.getLogger(__name__)
+
+# Call priorities. Lower values are admitted first.
+INTERACTIVE = 0
+BULK = 1
+
+# Quota categories. Core and realtime reports have separate quotas.
+CORE = "core"
+REALTIME = "realtime"
+
+# The token budgets enforced by the scheduler, keyed by `PropertyQuota` field
+# name, and the length of each budget's window.
+_HOUR = "hour"
+_DAY = "day"
+_TOKEN_BUDGETS = {
+    "tokens_per_day": _DAY,
+    "tokens_per_hour": _HOUR,
+    "tokens_per_project_per_hour": _HOUR,
+}
+
+# All the `PropertyQuota` fields that are reported, keyed by field name.
+_QUOTA_WINDOWS = {
+    **_TOKEN_BUDGETS,
+    "concurrent_requests": None,
+    "server_errors_per_project_per_hour": _HOUR,
+    "potentially_thresholded_requests_per_hour": _HOUR,
+}
+
+# Daily quotas refill at midnight Pacific time.
+_DAILY_QUOTA_TIME_ZONE = zoneinfo.ZoneInfo("America/Los_Angeles")
+
+# The weight of the latest request when estimating the cost of a request.
+_COST_SMOOTHING = 0.3
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "analytics_mcp_call_priority", default=INTERACTIVE
+)
+
+_T = TypeVar("_T")
+
+
+@contextlib.contextmanager
+def bulk() -> Iterator[None]:
+    """Marks the Data API calls made in the block as bulk calls."""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class QuotaExhaustedError(RuntimeError):
+    """Raised when a call would exceed a property's quota for too long."""
+
+
+def _window_end(window: str, now: float) -> float:
+    """Returns when the quota window containing `now` ends."""
+    if window == _HOUR:
+        return (now // 3600 + 1) * 3600
+    local = datetime.datetime.fromtimestamp(now, _DAILY_QUOTA_TIME_ZONE)
+    next_day = local.date() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(
+        next_day, datetime.time(), _DAILY_QUOTA_TIME_ZONE
+    ).timestamp()
+
+
+class _PrioritySemaphore:
+    """A semaphore that wakes waiters in priority order, then FIFO."""
+
+    def __init__(self, value: int) -> None:
+        self._value = value
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int) -> None:
+        if self._value > 0 and not self.waiting:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._counter), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the waiter was cancelled.
+                self.release()
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+class _QuotaStatus:
+    """The latest known state of one quota of a property."""
+
+    def __init__(self, window: str | None) -> None:
+        self.window = window
+        self.consumed = 0
+        self.remaining = 0
+        # The largest budget seen in the current window.
+        self.capacity = 0
+        self.window_end = 0.0
+
+    def update(self, consumed: int, remaining: int, now: float) -> None:
+        if self.window is not None and now < self.window_end:
+            # Responses can arrive out of order, so the smallest remaining
+            # value is the most recent.
+            self.remaining = min(self.remaining, remaining)
+            self.capacity = max(self.capacity, consumed + remaining)
+        else:
+            self.remaining = remaining
+            self.capacity = consumed + remaining
+            if self.window is not None:
+                self.window_end = _window_end(self.window, now)
+        self.consumed = consumed
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        result = {"consumed": self.consumed, "remaining": self.remaining}
+        if self.window is not None:
+            result["window"] = self.window
+            result["refills_in_seconds"] = max(0, round(self.window_end - now))
+        return result
+
+
+class _PropertyState:
+    """Quota state and concurrency limit of one property and category."""
+
+    def __init__(self, concurrent_requests: int) -> None:
+        self.semaphore = _PrioritySemaphore(concurrent_requests)
+        self.quotas: Dict[str, _QuotaStatus] = {}
+        self.estimated_cost = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.delayed = 0
+        self.rejected = 0
+
+
+class QuotaScheduler:
+    """Admits Data API calls according to each property's quota."""
+
+    def __init__(
+        self,
+        concurrent_requests: int,
+        reserve_fraction: float,
+        max_delay_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initializes the scheduler.
+
+        Args:
+            concurrent_requests: The maximum number of concurrent calls for
+              each property and category.
+            reserve_fraction: The fraction of each token budget that bulk
+              calls leave for interactive calls.
+            max_delay_seconds: The longest a call waits for a token budget to
+              refill before it's rejected.
+            clock: Returns the current time in seconds since the epoch.
+        """
+        self._concurrent_requests = concurrent_requests
+        self._reserve_fraction = reserve_fraction
+        self._max_delay_seconds = max_delay_seconds
+        self._clock = clock
+        self._states: Dict[Tuple[str, str], _PropertyState] = {}
+
+    def _state(self, property_rn: str, category: str) -> _PropertyState:
+        key = (property_rn, category)
+        state = self._states.get(key)
+        if state is None:
+            state = _PropertyState(self._concurrent_requests)
+            self._states[key] = state
+        return state
+
+    def _wait_seconds(
+        self, state: _PropertyState, priority: int, now: float
+    ) -> Tuple[float, str | None]:
+        """Returns how long a call must wait, and the budget it waits for."""
+        wait = 0.0
+        exhausted = None
+        # Tokens the calls already in flight are expected to consume.
+        pending_cost = (state.in_flight + 1) * state.estimated_cost
+        for name in _TOKEN_BUDGETS:
+            status = state.quotas.get(name)
+            if status is None or now >= status.window_end:
+                # Unknown, or the window has refilled since it was reported.
+                continue
+            if priority == BULK:
+                available = status.remaining - pending_cost
+                enough = available >= self._reserve_fraction * status.capacity
+            else:
+                enough = status.remaining > 0
+            if not enough and status.window_end - now > wait:
+                wait = status.window_end - now
+                exhausted = name
+        return wait, exhausted
+
+    async def _admit(
+        self, property_rn: str, state: _PropertyState, priority: int
+    ) -> None:
+        """Waits until the property's token budgets allow another call."""
+        while True:
+            wait, exhausted = self._wait_seconds(state, priority, self._clock())
+            if wait <= 0:
+                return
+            if wait > self._max_delay_seconds:
+                state.rejected += 1
+                raise QuotaExhaustedError(
+                    f"The {exhausted} quota of {property_rn} is nearly "
+                    f"exhausted and refills in {round(wait)} seconds. Try "
+                    "again later, or request fewer or smaller reports."
+                )
+            state.delayed += 1
+            _logger.info(
+                "Delaying call for %s by %.1fs until %s refills",
+                property_rn,
+                wait,
+                exhausted,
+            )
+            await asyncio.sleep(wait)
+
+    async def run(
+        self,
+        property_rn: str,
+        category: str,
+        call: Callable[[], Awaitable[_T]],
+        property_quotas: Callable[[_T], Iterable[Any]] = lambda response: [
+            response.property_quota
+        ],
+    ) -> _T:
+        """Runs a call once the property's quota allows it.
+
+        Args:
+            property_rn: The property resource name, such as `properties/1234`.
+            category: `core` or `realtime`.
+            call: Async function that makes the API call.
+            property_quotas: Returns the `PropertyQuota` messages in the
+              call's response.
+
+        Raises:
+            QuotaExhaustedError: If the property's quota doesn't allow the
+              call within the maximum delay.
+        """
+        state = self._state(property_rn, category)
+        priority = _priority.get()
+        while True:
+            await self._admit(property_rn, state, priority)
+            await state.semaphore.acquire(priority)
+            # The calls that ran while this one waited for the semaphore may
+            # have used up the budget it was admitted with.
+            wait, _ = self._wait_seconds(state, priority, self._clock())
+            if wait <= 0:
+                break
+            state.semaphore.release()
+        state.in_flight += 1
+        state.calls += 1
+        try:
+            response = await call()
+        finally:
+            state.in_flight -= 1
+            state.semaphore.release()
+        for property_quota in property_quotas(response):
+            self.record(property_rn, category, property_quota)
+        return response
+
+    def record(
+        self,
+        property_rn: str,
+        category: str,
+        property_quota: data_v1beta.PropertyQuota,
+    ) -> None:
+        """Records the quota reported in a response."""
+        pb = data_v1beta.PropertyQuota.pb(property_quota)
+        state = self._state(property_rn, category)
+        now = self._clock()
+        for name, window in _QUOTA_WINDOWS.items():
+            if not pb.HasField(name):
+                continue
+            quota_status = getattr(pb, name)
+            status = state.quotas.get(name)
+            if status is None:
+                status = _QuotaStatus(window)
+                state.quotas[name] = status
+            status.update(quota_status.consumed, quota_status.remaining, now)
+            if name == "tokens_per_hour":
+                state.estimated_cost += _COST_SMOOTHING * (
+                    quota_status.consumed - state.estimated_cost
+                )
+
+    def property_status(self, property_rn: str) -> Dict[str, Any]:
+        """Returns the known quota state of a property, keyed by category."""
+        now = self._clock()
+        result = {}
+        for category in (CORE, REALTIME):
+            state = self._states.get((property_rn, category))
+            if state is None:
+                continue
+            result[category] = {
+                "quotas": {
+                    name: status.to_dict(now)
+                    for name, status in state.quotas.items()
+                },
+                "estimated_tokens_per_request": round(state.estimated_cost, 1),
+                "in_flight": state.in_flight,
+                "waiting": state.semaphore.waiting,
+                "calls": state.calls,
+                "delayed": state.delayed,
+                "rejected": state.rejected,
+            }
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of tracked properties and scheduled calls."""
+        states = self._states.values()
+        return {
+            "properties": len({property_rn for property_rn, _ in self._states}),
+            "in_flight": sum(state.in_flight for state in states),
+            "waiting": sum(state.semaphore.waiting for state in states),
+            "calls": sum(state.calls for state in states),
+            "delayed": sum(state.delayed for state in states),
+            "rejected": sum(state.rejected for state in states),
+        }
+
+
+quota_scheduler = QuotaScheduler(
+    concurrent_requests=config.get_int("QUOTA_CONCURRENT_REQUESTS", 10),
+    reserve_fraction=config.get_float("QUOTA_RESERVE_FRACTION", 0.1),
+    max_delay_seconds=config.get_float("QUOTA_MAX_DELAY_SECONDS", 60.0),
+)
+stats.register_stats_provider("property_quota", quota_scheduler.stats)
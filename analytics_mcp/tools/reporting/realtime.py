@@ -14,21 +14,34 @@
 
 """Tools for running realtime reports using the Data API."""
 
+from __future__ import annotations
+
 from typing import Any, Dict, List
 
 from analytics_mcp.coordinator import mcp
-from analytics_mcp.tools.utils import (
-    construct_property_rn,
-    create_data_api_client,
-    proto_to_dict,
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.admin.directory import accepts_property_names
+from analytics_mcp.tools.calls import with_deadline
+from analytics_mcp.tools.reporting import data_api
+from analytics_mcp.tools.reporting.formatting import (
+    VERBOSE,
+    check_output_format,
+    unchanged_response,
+)
+from analytics_mcp.tools.reporting.offload import format_response_async
+from analytics_mcp.tools.reporting.subscriptions import subscription_manager
+from analytics_mcp.tools.reporting.validation import (
+    validate_realtime_report_request,
 )
+from analytics_mcp.tools.utils import construct_property_rn
 from analytics_mcp.tools.reporting.metadata import (
     get_date_ranges_hints,
     get_dimension_filter_hints,
     get_metric_filter_hints,
     get_order_bys_hints,
 )
-from google.analytics import data_v1beta
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
 
 
 def _run_realtime_report_description() -> str:
@@ -77,6 +90,53 @@ def _run_realtime_report_description() -> str:
 """
 
 
+def build_realtime_report_request(
+    property_id: int | str,
+    dimensions: List[str],
+    metrics: List[str],
+    dimension_filter: Dict[str, Any] = None,
+    metric_filter: Dict[str, Any] = None,
+    order_bys: List[Dict[str, Any]] = None,
+    limit: int = None,
+    offset: int = None,
+    return_property_quota: bool = False,
+) -> data_v1beta.RunRealtimeReportRequest:
+    """Returns a `RunRealtimeReportRequest` built from tool arguments.
+
+    See `run_realtime_report` for a description of the arguments.
+    """
+    request = data_v1beta.RunRealtimeReportRequest(
+        property=construct_property_rn(property_id),
+        dimensions=[
+            data_v1beta.Dimension(name=dimension) for dimension in dimensions
+        ],
+        metrics=[data_v1beta.Metric(name=metric) for metric in metrics],
+        return_property_quota=return_property_quota,
+    )
+
+    if dimension_filter:
+        request.dimension_filter = data_v1beta.FilterExpression(
+            dimension_filter
+        )
+
+    if metric_filter:
+        request.metric_filter = data_v1beta.FilterExpression(metric_filter)
+
+    if order_bys:
+        request.order_bys = [
+            data_v1beta.OrderBy(order_by) for order_by in order_bys
+        ]
+
+    if limit:
+        request.limit = limit
+    if offset:
+        request.offset = offset
+
+    return request
+
+
+@with_deadline()
+@accepts_property_names
 async def run_realtime_report(
     property_id: int | str,
     dimensions: List[str],
@@ -87,6 +147,8 @@ async def run_realtime_report(
     limit: int = None,
     offset: int = None,
     return_property_quota: bool = False,
+    output_format: str = VERBOSE,
+    previous_fingerprint: str = None,
 ) -> Dict[str, Any]:
     """Runs a Google Analytics Data API realtime report.
 
@@ -94,10 +156,16 @@ async def run_realtime_report(
     https://developers.google.com/analytics/devguides/reporting/data/v1/realtime-basics
     for more information.
 
+    The response's `fingerprint` identifies the result's content. To poll a
+    report for changes, pass the last response's fingerprint as
+    `previous_fingerprint`: if the result hasn't changed, the response is
+    just `{"unchanged": true, "fingerprint": ...}`.
+
     Args:
         property_id: The Google Analytics property ID. Accepted formats are:
           - A number
           - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
         dimensions: A list of dimensions to include in the report. Dimensions must be realtime dimensions.
         metrics: A list of metrics to include in the report. Metrics must be realtime metrics.
         dimension_filter: A Data API FilterExpression
@@ -130,36 +198,32 @@ async def run_realtime_report(
           reports, following the guide at
           https://developers.google.com/analytics/devguides/reporting/data/v1/basics#pagination.
         return_property_quota: Whether to return realtime property quota in the response.
+        output_format: The format of the response. Either "verbose", which
+          returns the report as the Data API's response message, or
+          "compact", which returns a list of `headers` plus one list of
+          values per column in `columns`, with metric values typed as numbers.
+          Use "compact" for large reports.
+        previous_fingerprint: The `fingerprint` of an earlier response to the
+          same report. If the result is unchanged, its rows aren't returned.
     """
-    request = data_v1beta.RunRealtimeReportRequest(
-        property=construct_property_rn(property_id),
-        dimensions=[
-            data_v1beta.Dimension(name=dimension) for dimension in dimensions
-        ],
-        metrics=[data_v1beta.Metric(name=metric) for metric in metrics],
+    check_output_format(output_format)
+    request = build_realtime_report_request(
+        property_id,
+        dimensions,
+        metrics,
+        dimension_filter=dimension_filter,
+        metric_filter=metric_filter,
+        order_bys=order_bys,
+        limit=limit,
+        offset=offset,
         return_property_quota=return_property_quota,
     )
-
-    if dimension_filter:
-        request.dimension_filter = data_v1beta.FilterExpression(
-            dimension_filter
-        )
-
-    if metric_filter:
-        request.metric_filter = data_v1beta.FilterExpression(metric_filter)
-
-    if order_bys:
-        request.order_bys = [
-            data_v1beta.OrderBy(order_by) for order_by in order_bys
-        ]
-
-    if limit:
-        request.limit = limit
-    if offset:
-        request.offset = offset
-
-    response = await create_data_api_client().run_realtime_report(request)
-    return proto_to_dict(response)
+    validate_realtime_report_request(request)
+    response = await data_api.run_realtime_report(request)
+    result = await format_response_async(response, output_format)
+    if previous_fingerprint and result["fingerprint"] == previous_fingerprint:
+        return unchanged_response(previous_fingerprint)
+    return result
 
 
 # The `run_realtime_report` tool requires a more complex description that's generated at
@@ -171,3 +235,94 @@ mcp.add_tool(
     title="Run a Google Analytics realtime report using the Data API",
     description=_run_realtime_report_description(),
 )
+
+
+@mcp.tool(title="Subscribe to a Google Analytics realtime report")
+@with_deadline()
+@accepts_property_names
+async def subscribe_realtime_report(
+    property_id: int | str,
+    dimensions: List[str],
+    metrics: List[str],
+    dimension_filter: Dict[str, Any] = None,
+    metric_filter: Dict[str, Any] = None,
+    order_bys: List[Dict[str, Any]] = None,
+    limit: int = None,
+) -> Dict[str, Any]:
+    """Subscribes to a realtime report and returns its current rows.
+
+    Use this instead of calling `run_realtime_report` repeatedly. The server
+    polls each distinct realtime report once for all its subscribers, and
+    `read_realtime_subscription` returns only the rows that changed since the
+    subscription was last read. A subscription expires if it isn't read for
+    a few minutes.
+
+    Args:
+        property_id: The Google Analytics property ID. Accepted formats are:
+          - A number
+          - A string consisting of 'properties/' followed by a number
+          - The property's display name, such as 'My Store'
+        dimensions: A list of realtime dimensions to include in the report.
+        metrics: A list of realtime metrics to include in the report.
+        dimension_filter: A Data API FilterExpression to apply to the
+          dimensions. See the `run_realtime_report` tool.
+        metric_filter: A Data API FilterExpression to apply to the metrics.
+          See the `run_realtime_report` tool.
+        order_bys: A list of Data API OrderBy objects that determine which
+          rows are included if the report has more than `limit` rows.
+        limit: The maximum number of rows in the report.
+
+    Returns:
+        The `subscription_id` to pass to `read_realtime_subscription`, plus
+        the same fields that `read_realtime_subscription` returns, with every
+        row of the report in `changed_rows`.
+    """
+    request = build_realtime_report_request(
+        property_id,
+        dimensions,
+        metrics,
+        dimension_filter=dimension_filter,
+        metric_filter=metric_filter,
+        order_bys=order_bys,
+        limit=limit,
+    )
+    validate_realtime_report_request(request)
+    return await subscription_manager.subscribe(request)
+
+
+@mcp.tool(title="Read the changes to a subscribed realtime report")
+async def read_realtime_subscription(subscription_id: str) -> Dict[str, Any]:
+    """Returns the rows of a realtime report that changed since the last read.
+
+    Args:
+        subscription_id: The ID returned by `subscribe_realtime_report`.
+
+    Returns:
+        An object with these keys:
+          - `version`: The version of the report. It increases each time a
+            poll of the report changes its rows.
+          - `since_version`: The version of the previous read.
+          - `headers`: The dimension names followed by the metric names.
+          - `changed_rows`: The rows that were added or whose metric values
+            changed, as the dimension values followed by the metric values.
+          - `removed_rows`: The dimension values of the rows that are no
+            longer in the report.
+          - `row_count`: The number of rows in the report.
+          - `polled_at`: When the report was last polled.
+          - `error`: The error of the last poll, if it failed.
+    """
+    return subscription_manager.read(subscription_id)
+
+
+@mcp.tool(title="Unsubscribe from a realtime report")
+async def unsubscribe_realtime_report(subscription_id: str) -> Dict[str, bool]:
+    """Ends a realtime report subscription.
+
+    Args:
+        subscription_id: The ID returned by `subscribe_realtime_report`.
+
+    Returns:
+        An object whose `unsubscribed` key is false if the subscription didn't
+        exist or had already expired.
+    """
+    return {"unsubscribed": subscription_manager.unsubscribe(subscription_id)}
@@ -0,0 +1,176 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Serves the rows of large results as MCP resources.
+
+A report with more than `INLINE_MAX_ROWS` rows isn't returned inline.
+Instead, the tool returns a summary with the result's headers, totals and
+first rows in the requested format, and a handle to the result in the result
+store. The result's rows are split into chunks of `CHUNK_ROWS` rows, and a
+range of chunks is read from the resource
+`analytics://results/{result_handle}/chunks/{chunks}`, where `chunks` is a
+chunk number such as `2` or a range such as `2-4`. Reading chunks doesn't
+call the API again.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict
+
+from analytics_mcp import config
+from analytics_mcp.coordinator import mcp
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.formatting import format_response
+from analytics_mcp.tools.reporting.results import ResultTable, result_store
+
+proto = lazy_import("proto")
+
+# Results with more rows than this are returned as a summary and a handle.
+# 0 returns every result inline.
+INLINE_MAX_ROWS = config.get_int("RESULT_INLINE_MAX_ROWS", 50_000)
+
+# The number of rows in each chunk of a result.
+CHUNK_ROWS = config.get_int("RESULT_CHUNK_ROWS", 1000)
+
+# The number of rows included in the summary of a result.
+PREVIEW_ROWS = config.get_int("RESULT_PREVIEW_ROWS", 20)
+
+# The maximum number of chunks read at once.
+MAX_CHUNKS_PER_READ = 10
+
+CHUNKS_URI_TEMPLATE = "analytics://results/{result_handle}/chunks/{chunks}"
+
+
+def is_large(row_count: int) -> bool:
+    """Returns whether a result is too large to return inline."""
+    return 0 < INLINE_MAX_ROWS < row_count
+
+
+def chunk_count(table: ResultTable) -> int:
+    """Returns the number of chunks of a result."""
+    return max(1, math.ceil(table.row_count / CHUNK_ROWS))
+
+
+def _preview_response(response: proto.Message, row_count: int):
+    """Returns a copy of a report response with only its first rows."""
+    pb = type(response).pb(response)
+    fields = {
+        field.name: value
+        for field, value in pb.ListFields()
+        if field.name != "rows"
+    }
+    return type(response).wrap(type(pb)(rows=pb.rows[:row_count], **fields))
+
+
+def summarize(
+    table: ResultTable,
+    result_handle: str | None,
+    response: proto.Message,
+    output_format: str,
+) -> Dict[str, Any]:
+    """Returns the summary of a large result that's returned inline.
+
+    The summary is the response in `output_format` with only its first
+    `PREVIEW_ROWS` rows. If the result is stored, the summary tells how to
+    read the rest of the rows in chunks.
+
+    Args:
+        table: The result.
+        result_handle: The result's handle in the result store, or None if
+          the result didn't fit in the store.
+        response: The report response the result was built from.
+        output_format: Either `verbose` or `compact`.
+    """
+    preview_rows = min(PREVIEW_ROWS, table.row_count)
+    summary = format_response(
+        _preview_response(response, preview_rows),
+        output_format,
+        table.fingerprint,
+    )
+    summary["result_handle"] = result_handle
+    summary["returned_row_count"] = table.row_count
+    if result_handle is None:
+        summary["warning"] = (
+            f"The result has {table.row_count} rows, which is more than the "
+            f"result store can hold, so only the first {preview_rows} are "
+            "returned. Narrow the report with filters, a shorter date range "
+            "or a `limit`."
+        )
+        return summary
+    chunks = chunk_count(table)
+    summary["chunk_rows"] = CHUNK_ROWS
+    summary["chunk_count"] = chunks
+    summary["chunks_uri"] = CHUNKS_URI_TEMPLATE.replace(
+        "{result_handle}", result_handle
+    )
+    summary["note"] = (
+        f"The result has {table.row_count} rows, so only the first "
+        f"{preview_rows} are returned. Read the rest from the `chunks_uri` "
+        "resource, replacing {chunks} with a chunk number from 0 to "
+        f"{chunks - 1}, or a range of up to {MAX_CHUNKS_PER_READ} chunks such "
+        "as 0-1, or analyze it with the `analyze_result` tool."
+    )
+    return summary
+
+
+def _parse_chunks(chunks: str, count: int) -> range:
+    """Parses a chunk number or an inclusive range of chunk numbers."""
+    first, _, last = chunks.partition("-")
+    try:
+        start = int(first)
+        end = int(last) if last else start
+    except ValueError:
+        raise ValueError(
+            f"Invalid chunks: {chunks!r}. Must be a chunk number, such as 2, "
+            "or a range of chunk numbers, such as 2-4."
+        ) from None
+    if not 0 <= start <= end < count:
+        raise ValueError(
+            f"Invalid chunks: {chunks!r}. The result's chunks are numbered "
+            f"from 0 to {count - 1}."
+        )
+    if end - start + 1 > MAX_CHUNKS_PER_READ:
+        raise ValueError(
+            f"Invalid chunks: {chunks!r}. At most {MAX_CHUNKS_PER_READ} "
+            "chunks can be read at once."
+        )
+    return range(start, end + 1)
+
+
+@mcp.resource(
+    CHUNKS_URI_TEMPLATE,
+    title="Rows of a large Google Analytics report result",
+    mime_type="application/json",
+)
+async def read_result_chunks(result_handle: str, chunks: str) -> Dict[str, Any]:
+    """Returns a range of chunks of the rows of a stored report result.
+
+    The response has the result's `headers` and `metric_types`, the rows of
+    the chunks in `columns`, one list of values per header, and the
+    `first_row` of the chunks.
+    """
+    table = await result_store.get_async(result_handle)
+    chunk_range = _parse_chunks(chunks, chunk_count(table))
+    start = chunk_range.start * CHUNK_ROWS
+    end = min(chunk_range.stop * CHUNK_ROWS, table.row_count)
+    return {
+        "result_handle": result_handle,
+        "chunks": [chunk_range.start, chunk_range.stop - 1],
+        "chunk_count": chunk_count(table),
+        "first_row": start,
+        "headers": table.headers,
+        "metric_types": table.metric_types,
+        "columns": table.to_columns(start, end),
+    }
@@ -0,0 +1,445 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Recent report results, kept in a column-oriented form.
+
+Each result is a `ResultTable`: one list of strings per dimension, one list of
+ints per integer metric and one `array` of floats per other metric. Results are kept in a `ResultStore` under a
+handle, so that later tool calls can work with a result without running the
+report again. Results expire after `TTL_SECONDS`, and the least recently used
+results are removed when the store exceeds `MAX_BYTES`.
+
+Most results are never analyzed, so a report response is stored as is, and
+its table is only built when the result is first read.
+"""
+
+from __future__ import annotations
+
+import array
+import collections
+import math
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from analytics_mcp import config, stats
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.formatting import Fingerprint
+from analytics_mcp.tools.reporting.offload import convert_async
+from analytics_mcp.tools.reporting.sharding import is_additive_metric
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+proto = lazy_import("proto")
+
+# The memory budget for stored results. 0 disables the store.
+MAX_BYTES = config.get_int("RESULT_STORE_MAX_BYTES", 64 * 1024 * 1024)
+
+# How long a result is kept after it's last used.
+TTL_SECONDS = config.get_float("RESULT_STORE_TTL_SECONDS", 1800.0)
+
+# Estimated memory used by a dimension value, in addition to its characters.
+_STRING_OVERHEAD_BYTES = 50
+
+# Estimated memory used by an integer metric value in a list.
+_INTEGER_VALUE_BYTES = 36
+
+_INTEGER_TYPE = "TYPE_INTEGER"
+
+MetricColumn = List[Any] | array.array
+
+
+class UnknownResultError(ValueError):
+    """Raised when a result doesn't exist or has expired."""
+
+
+def new_metric_column(values: Iterable[Any], integer: bool) -> MetricColumn:
+    """Returns a metric column with the given values.
+
+    Integer metrics are kept as a list of ints, so that values above 2**53
+    stay exact, and other metrics as an array of doubles.
+    """
+    return list(values) if integer else array.array("d", values)
+
+
+def _parse_integer(value: str) -> int | float:
+    if not value:
+        return math.nan
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _parse_float(value: str) -> float:
+    return float(value) if value else math.nan
+
+
+def _typed_integer(value: int | float) -> int | float | None:
+    """Returns an integer metric value as in the compact output format."""
+    if isinstance(value, int):
+        return value
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class ResultTable:
+    """A report result with one column per dimension and metric.
+
+    Missing metric values are stored as NaN. `additive` records, for each
+    metric, whether its values can be summed across rows. `fingerprint` is
+    the fingerprint of the response the table was built from, if any.
+
+    `report_row_count` is the number of rows in the report the table was
+    built from, according to the API, and `truncated` is whether the table
+    was built from only some of those rows.
+    """
+
+    def __init__(
+        self,
+        dimensions: List[str],
+        dimension_columns: List[List[str]],
+        metrics: List[str],
+        metric_columns: List[MetricColumn],
+        metric_types: List[str],
+        additive: List[bool],
+        fingerprint: str | None = None,
+        report_row_count: int | None = None,
+        truncated: bool = False,
+    ) -> None:
+        self.dimensions = dimensions
+        self.dimension_columns = dimension_columns
+        self.metrics = metrics
+        self.metric_columns = metric_columns
+        self.metric_types = metric_types
+        self.additive = additive
+        self.fingerprint = fingerprint
+        self.report_row_count = report_row_count
+        self.truncated = truncated
+
+    @classmethod
+    def from_response(
+        cls, response: proto.Message, fingerprint: str | None = None
+    ) -> "ResultTable":
+        """Builds a table from a `RunReportResponse` or realtime response.
+
+        Args:
+            response: The response.
+            fingerprint: The response's fingerprint, if it's already known,
+              so that the rows aren't hashed again.
+        """
+        pb = type(response).pb(response)
+        dimension_columns: List[List[str]] = [[] for _ in pb.dimension_headers]
+        metric_values: List[List[Any]] = [[] for _ in pb.metric_headers]
+        integer = [
+            header.type_.name == _INTEGER_TYPE
+            for header in response.metric_headers
+        ]
+        parsers = [
+            _parse_integer if is_integer else _parse_float
+            for is_integer in integer
+        ]
+        hasher = Fingerprint(pb) if fingerprint is None else None
+        for row in pb.rows:
+            if hasher is not None:
+                hasher.add_row(row)
+            for column, value in zip(dimension_columns, row.dimension_values):
+                column.append(value.value)
+            for column, parse, value in zip(
+                metric_values, parsers, row.metric_values
+            ):
+                column.append(parse(value.value))
+        metrics = [header.name for header in pb.metric_headers]
+        return cls(
+            dimensions=[header.name for header in pb.dimension_headers],
+            dimension_columns=dimension_columns,
+            metrics=metrics,
+            metric_columns=[
+                new_metric_column(values, is_integer)
+                for values, is_integer in zip(metric_values, integer)
+            ],
+            metric_types=[
+                header.type_.name for header in response.metric_headers
+            ],
+            additive=[is_additive_metric(metric) for metric in metrics],
+            fingerprint=(
+                hasher.hexdigest() if hasher is not None else fingerprint
+            ),
+            report_row_count=pb.row_count,
+            truncated=pb.row_count > len(pb.rows),
+        )
+
+    @property
+    def row_count(self) -> int:
+        """The number of rows in the table."""
+        columns = self.dimension_columns or self.metric_columns
+        return len(columns[0]) if columns else 0
+
+    @property
+    def headers(self) -> List[str]:
+        """The dimension names followed by the metric names."""
+        return self.dimensions + self.metrics
+
+    def take(self, indexes: Sequence[int]) -> "ResultTable":
+        """Returns a table with the rows at `indexes`, in that order."""
+        return ResultTable(
+            self.dimensions,
+            [[column[i] for i in indexes] for column in self.dimension_columns],
+            self.metrics,
+            [
+                new_metric_column(
+                    map(column.__getitem__, indexes), isinstance(column, list)
+                )
+                for column in self.metric_columns
+            ],
+            self.metric_types,
+            self.additive,
+        )
+
+    def nbytes(self) -> int:
+        """Returns an estimate of the memory used by the table's values."""
+        dimension_bytes = sum(
+            len(value) + _STRING_OVERHEAD_BYTES
+            for column in self.dimension_columns
+            for value in column
+        )
+        metric_bytes = sum(
+            (
+                _INTEGER_VALUE_BYTES
+                if isinstance(column, list)
+                else column.itemsize
+            )
+            * len(column)
+            for column in self.metric_columns
+        )
+        return dimension_bytes + metric_bytes
+
+    def to_columns(self, start: int = 0, end: int | None = None) -> List[list]:
+        """Returns the values of each column for a range of rows.
+
+        Metric values are typed as in the compact output format: ints for
+        integer metrics, floats for other metrics and None for missing
+        values.
+        """
+        columns: List[list] = [
+            column[start:end] for column in self.dimension_columns
+        ]
+        for column, metric_type in zip(self.metric_columns, self.metric_types):
+            values = column[start:end]
+            if metric_type == _INTEGER_TYPE:
+                columns.append([_typed_integer(value) for value in values])
+            else:
+                columns.append(
+                    [None if math.isnan(value) else value for value in values]
+                )
+        return columns
+
+    def to_dict(self, start: int = 0, end: int | None = None) -> Dict[str, Any]:
+        """Returns a range of rows in the compact output format."""
+        return {
+            "headers": self.headers,
+            "metric_types": self.metric_types,
+            "columns": self.to_columns(start, end),
+            "row_count": self.row_count,
+        }
+
+
+class _PendingTable:
+    """A stored response whose table hasn't been built yet."""
+
+    def __init__(self, response: proto.Message, fingerprint: str | None):
+        self.response = response
+        self.fingerprint = fingerprint
+
+
+class ResultStore:
+    """An LRU store of result tables bounded by their total size.
+
+    Each result expires `ttl_seconds` after it was last used. A response
+    stored with `put_response` takes the size of its serialized form until
+    its table is built, on the first read.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        """Initializes the store.
+
+        Args:
+            max_bytes: The maximum total size of the stored tables. A value of
+              0 disables the store.
+            ttl_seconds: How long a table is kept after it's last used.
+        """
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._entries: collections.OrderedDict[
+            str, Tuple[ResultTable | _PendingTable, int, float]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the store keeps any results."""
+        return self._max_bytes > 0
+
+    def put(self, table: ResultTable) -> str | None:
+        """Stores a table and returns its handle.
+
+        Returns None if the store is disabled or the table is larger than the
+        store.
+        """
+        return self._put(table, table.nbytes()) if self.enabled else None
+
+    def put_response(
+        self, response: proto.Message, fingerprint: str | None = None
+    ) -> str | None:
+        """Stores a report response and returns its handle.
+
+        The response's table is built when it's first read, and the response
+        must not be changed after it's stored. Returns None if the store is
+        disabled or the response is larger than the store.
+
+        Args:
+            response: A `RunReportResponse` or `RunRealtimeReportResponse`.
+            fingerprint: The response's fingerprint, if it's already known.
+        """
+        if not self.enabled:
+            return None
+        return self._put(
+            _PendingTable(response, fingerprint),
+            type(response).pb(response).ByteSize(),
+        )
+
+    def _put(self, value: ResultTable | _PendingTable, size: int) -> str | None:
+        if size > self._max_bytes:
+            return None
+        handle = uuid.uuid4().hex[:16]
+        with self._lock:
+            self._entries[handle] = (
+                value,
+                size,
+                time.monotonic() + self._ttl_seconds,
+            )
+            self._bytes += size
+            self._evict()
+        return handle
+
+    def _evict(self) -> None:
+        """Removes the least recently used tables until the store fits."""
+        while self._bytes > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def get(self, handle: str) -> ResultTable:
+        """Returns the table with a handle, and extends its expiry.
+
+        Builds the table on the event loop if it hasn't been built yet. Use
+        `get_async` in async code.
+
+        Raises:
+            UnknownResultError: If there's no table with the handle.
+        """
+        value = self._get(handle)
+        if isinstance(value, _PendingTable):
+            table = ResultTable.from_response(value.response, value.fingerprint)
+            self._replace(handle, value, table)
+            return table
+        return value
+
+    async def get_async(self, handle: str) -> ResultTable:
+        """Returns the table with a handle, and extends its expiry.
+
+        Builds the table, in the worker pool if it's large, if it hasn't been
+        built yet.
+
+        Raises:
+            UnknownResultError: If there's no table with the handle.
+        """
+        value = self._get(handle)
+        if isinstance(value, _PendingTable):
+            table = await convert_async(
+                ResultTable.from_response, value.response, value.fingerprint
+            )
+            self._replace(handle, value, table)
+            return table
+        return value
+
+    def _replace(
+        self, handle: str, pending: _PendingTable, table: ResultTable
+    ) -> None:
+        """Replaces a pending table with its table, if it's still stored."""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None or entry[0] is not pending:
+                return
+            size = table.nbytes()
+            self._entries[handle] = (table, size, entry[2])
+            self._bytes += size - entry[1]
+            self._evict()
+
+    def _get(self, handle: str) -> ResultTable | _PendingTable:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is not None and time.monotonic() >= entry[2]:
+                self._remove(handle)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                raise UnknownResultError(
+                    f"Unknown result handle: {handle!r}. Results expire "
+                    f"{self._ttl_seconds:g} seconds after they're last used. "
+                    "Run the report again to get a new handle."
+                )
+            value, size, _ = entry
+            self._entries[handle] = (
+                value,
+                size,
+                time.monotonic() + self._ttl_seconds,
+            )
+            self._entries.move_to_end(handle)
+            self._hits += 1
+            return value
+
+    def _remove(self, handle: str) -> None:
+        _, size, _ = self._entries.pop(handle)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Removes every stored table."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the store's size and usage counters."""
+        with self._lock:
+            return {
+                "results": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+result_store = ResultStore(MAX_BYTES, TTL_SECONDS)
+stats.register_stats_provider("result_store", result_store.stats)
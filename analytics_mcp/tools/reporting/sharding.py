@@ -0,0 +1,489 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Splits the date ranges of a report into shards that run concurrently.
+
+A long date range with high-cardinality dimensions is slow, is more likely to
+be sampled or thresholded, and can exceed the rows of a single response.
+Sharding runs the report once per day, week or month of each date range and
+merges the rows of the shards.
+
+A report can be sharded if its rows belong to a single shard, because it has a
+`date` dimension, or if its metrics are sums, whose values for the whole range
+are the sums of the values for each shard. Metrics such as `activeUsers` or
+`bounceRate` can't be summed across shards.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import decimal
+import math
+from typing import Any, Dict, List, Tuple
+
+from analytics_mcp import config
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting.dates import resolve_date
+from analytics_mcp.tools.reporting.pagination import (
+    MAX_TOTAL_ROWS,
+    RunPage,
+    run_report_all_pages,
+)
+from analytics_mcp.tools.reporting.quota import bulk
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+
+GRANULARITIES = (DAY, WEEK, MONTH)
+
+# The maximum number of shards run concurrently for a single report.
+MAX_CONCURRENT_SHARDS = config.get_int("SHARDING_CONCURRENCY", 4)
+
+# The maximum number of shards for a single report.
+MAX_SHARDS = config.get_int("SHARDING_MAX_SHARDS", 400)
+
+# Dimensions that place each row in a single day.
+DATE_DIMENSIONS = frozenset({"date", "dateHour", "dateHourMinute"})
+
+# Standard metrics whose value for a date range is the sum of their values
+# for the days in the range.
+_ADDITIVE_METRICS = frozenset(
+    {
+        "addToCarts",
+        "advertiserAdClicks",
+        "advertiserAdCost",
+        "advertiserAdImpressions",
+        "checkouts",
+        "conversions",
+        "ecommercePurchases",
+        "engagedSessions",
+        "eventCount",
+        "eventValue",
+        "firstTimePurchasers",
+        "grossItemRevenue",
+        "grossPurchaseRevenue",
+        "itemDiscountAmount",
+        "itemRefundAmount",
+        "itemRevenue",
+        "itemsAddedToCart",
+        "itemsCheckedOut",
+        "itemsClickedInList",
+        "itemsClickedInPromotion",
+        "itemsPurchased",
+        "itemsViewed",
+        "itemsViewedInList",
+        "itemsViewedInPromotion",
+        "keyEvents",
+        "newUsers",
+        "organicGoogleSearchClicks",
+        "organicGoogleSearchImpressions",
+        "publisherAdClicks",
+        "publisherAdImpressions",
+        "purchaseRevenue",
+        "refundAmount",
+        "screenPageViews",
+        "sessions",
+        "shippingAmount",
+        "taxAmount",
+        "totalAdRevenue",
+        "totalRevenue",
+        "transactions",
+        "userEngagementDuration",
+    }
+)
+
+# Prefixes of additive metrics, such as custom metrics and the key events of a
+# single event.
+_ADDITIVE_METRIC_PREFIXES = ("customEvent:", "keyEvents:", "conversions:")
+
+
+def is_additive_metric(name: str) -> bool:
+    """Returns whether a metric's values can be summed across rows."""
+    return name in _ADDITIVE_METRICS or name.startswith(
+        _ADDITIVE_METRIC_PREFIXES
+    )
+
+
+def split_date_range(
+    start: datetime.date, end: datetime.date, granularity: str
+) -> List[Tuple[datetime.date, datetime.date]]:
+    """Returns the (start, end) dates of the shards of a date range.
+
+    Week shards run from Monday to Sunday and month shards follow calendar
+    months, except that the first and last shards are clipped to the range.
+    """
+    shards = []
+    shard_start = start
+    while shard_start <= end:
+        if granularity == DAY:
+            shard_end = shard_start
+        elif granularity == WEEK:
+            shard_end = shard_start + datetime.timedelta(
+                days=6 - shard_start.weekday()
+            )
+        else:
+            next_month = shard_start.replace(day=28) + datetime.timedelta(4)
+            shard_end = next_month.replace(day=1) - datetime.timedelta(1)
+        shard_end = min(shard_end, end)
+        shards.append((shard_start, shard_end))
+        shard_start = shard_end + datetime.timedelta(days=1)
+    return shards
+
+
+def check_shardable(
+    request: data_v1beta.RunReportRequest, granularity: str
+) -> None:
+    """Raises a ValueError if the report can't be sharded."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(
+            f"Invalid shard_by: {granularity!r}. Must be one of "
+            f"{', '.join(GRANULARITIES)}."
+        )
+    if any("pivot" in order_by for order_by in request.order_bys):
+        raise ValueError("Sharded reports can't be ordered by pivots.")
+    if request.metric_aggregations:
+        raise ValueError(
+            "Sharded reports can't include metric_aggregations, because the "
+            "totals, minimums and maximums of the shards can't be merged."
+        )
+    if _has_date_dimension(request):
+        return
+    non_additive = [
+        metric.name
+        for metric in request.metrics
+        if not is_additive_metric(metric.name)
+    ]
+    if non_additive:
+        raise ValueError(
+            "Reports can only be sharded if they include one of the "
+            f"{', '.join(sorted(DATE_DIMENSIONS))} dimensions, or if all "
+            "their metrics can be summed across dates. These metrics can't: "
+            f"{', '.join(non_additive)}."
+        )
+    if "metric_filter" in request:
+        raise ValueError(
+            "A metric_filter applies to each shard rather than the whole "
+            "date range, so reports with a metric_filter can only be sharded "
+            "if they include a date dimension."
+        )
+
+
+def _has_date_dimension(request: data_v1beta.RunReportRequest) -> bool:
+    return any(
+        dimension.name in DATE_DIMENSIONS for dimension in request.dimensions
+    )
+
+
+def _decimal_places(value: str) -> int:
+    """Returns the number of decimal places of a metric value."""
+    exponent = decimal.Decimal(value).as_tuple().exponent
+    return max(0, -exponent) if isinstance(exponent, int) else 0
+
+
+def _sum_metric_values(
+    totals: List[Any],
+    row,
+    integer_columns: List[bool],
+    decimal_places: List[int],
+):
+    """Adds the metric values of a row protobuf to running totals.
+
+    Integer metrics are summed as they're added. The values of the other
+    metrics are collected in lists, to be summed by `_float_total`, and
+    `decimal_places` keeps the most decimal places of each metric's values.
+    """
+    for index, value in enumerate(row.metric_values):
+        if not value.value:
+            continue
+        if not integer_columns[index]:
+            totals[index].append(float(value.value))
+            decimal_places[index] = max(
+                decimal_places[index], _decimal_places(value.value)
+            )
+            continue
+        try:
+            totals[index] += int(value.value)
+        except ValueError:
+            totals[index] += float(value.value)
+
+
+def _float_total(values: List[float], decimal_places: int) -> float:
+    """Returns the sum of float metric values.
+
+    The sum is rounded to the values' decimal places, so that, as in the
+    API's own totals, 0.1 + 0.2 is 0.3 rather than 0.30000000000000004.
+    """
+    return round(math.fsum(values), decimal_places)
+
+
+def _sort_key(order_by, dimension_index: Dict[str, int], metric_index):
+    """Returns a sort key function for a single OrderBy protobuf."""
+    if order_by.HasField("metric"):
+        index = metric_index[order_by.metric.metric_name]
+        return lambda row: float(row.metric_values[index].value or 0)
+
+    index = dimension_index[order_by.dimension.dimension_name]
+    order_type = data_v1beta.OrderBy.DimensionOrderBy.OrderType
+    if (
+        order_by.dimension.order_type
+        == order_type.CASE_INSENSITIVE_ALPHANUMERIC
+    ):
+        return lambda row: row.dimension_values[index].value.lower()
+    if order_by.dimension.order_type == order_type.NUMERIC:
+
+        def numeric(row):
+            try:
+                return (0, float(row.dimension_values[index].value))
+            except ValueError:
+                return (1, 0.0)
+
+        return numeric
+    return lambda row: row.dimension_values[index].value
+
+
+def sort_rows(rows: List[Any], request, response_pb) -> None:
+    """Sorts merged row protobufs in place according to the `order_bys`."""
+    dimension_index = {
+        header.name: index
+        for index, header in enumerate(response_pb.dimension_headers)
+    }
+    metric_index = {
+        header.name: index
+        for index, header in enumerate(response_pb.metric_headers)
+    }
+    # Stable sorts from the last order by to the first apply them in order.
+    for order_by in reversed(
+        data_v1beta.RunReportRequest.pb(request).order_bys
+    ):
+        rows.sort(
+            key=_sort_key(order_by, dimension_index, metric_index),
+            reverse=order_by.desc,
+        )
+
+
+async def run_report_sharded(
+    run_page: RunPage,
+    request: data_v1beta.RunReportRequest,
+    granularity: str,
+    today: datetime.date,
+    max_rows: int | None = None,
+    max_concurrency: int = MAX_CONCURRENT_SHARDS,
+) -> Tuple[data_v1beta.RunReportResponse, Dict[str, Any]]:
+    """Runs a report as date-range shards and merges their rows.
+
+    Every row of each shard is fetched, as bulk calls, up to `MAX_TOTAL_ROWS`
+    rows for all the shards together. If the report has a date dimension, the
+    rows of the shards are concatenated, and otherwise the metric values of
+    rows with the same dimension values are summed. The merged rows are sorted
+    according to the request's `order_bys`, and its `offset` and `limit` apply
+    to the merged rows.
+
+    Args:
+        run_page: Async function that runs a single page of the report.
+        request: The report request.
+        granularity: One of `day`, `week` or `month`.
+        today: The current date in the property's time zone.
+        max_rows: The maximum number of merged rows to return. Capped at
+          `MAX_TOTAL_ROWS`.
+        max_concurrency: The maximum number of shards run concurrently.
+
+    Returns:
+        The merged response, and a summary of the shards that includes the
+        sampling metadata of each sampled shard.
+
+    Raises:
+        ValueError: If the report can't be sharded, has too many shards, or
+          its shards have more than `MAX_TOTAL_ROWS` rows.
+    """
+    check_shardable(request, granularity)
+    if max_concurrency < 1:
+        raise ValueError(
+            f"Invalid max_concurrency: {max_concurrency}. "
+            "Must be a positive integer."
+        )
+
+    # The shards of each date range, and the name of the range.
+    ranges = []
+    for index, date_range in enumerate(request.date_ranges):
+        start = resolve_date(date_range.start_date, today)
+        end = resolve_date(date_range.end_date, today)
+        ranges.append(
+            (
+                date_range.name or f"date_range_{index}",
+                split_date_range(start, end, granularity),
+            )
+        )
+    shard_count = sum(len(shards) for _, shards in ranges)
+    if not shard_count:
+        raise ValueError("The date ranges of the report are empty.")
+    if shard_count > MAX_SHARDS:
+        raise ValueError(
+            f"Sharding the report by {granularity} requires {shard_count} "
+            f"shards, more than the maximum of {MAX_SHARDS}. Use a longer "
+            "shard or a shorter date range."
+        )
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # The rows that the shards can still fetch. Shared by all the shards, so
+    # that they don't each fetch up to MAX_TOTAL_ROWS rows.
+    row_budget = MAX_TOTAL_ROWS
+
+    def check_row_budget() -> None:
+        if row_budget < 0:
+            raise ValueError(
+                f"The shards of the report have more than {MAX_TOTAL_ROWS} "
+                "rows. Use a shorter date range, fewer dimensions or a "
+                "dimension_filter."
+            )
+
+    async def run_budgeted_page(
+        page_request: data_v1beta.RunReportRequest,
+    ) -> data_v1beta.RunReportResponse:
+        nonlocal row_budget
+        check_row_budget()
+        response = await run_page(page_request)
+        row_budget -= len(response.rows)
+        check_row_budget()
+        return response
+
+    async def run_shard(
+        start: datetime.date, end: datetime.date
+    ) -> data_v1beta.RunReportResponse:
+        shard_request = data_v1beta.RunReportRequest(request)
+        shard_request.date_ranges = [
+            data_v1beta.DateRange(
+                start_date=start.isoformat(), end_date=end.isoformat()
+            )
+        ]
+        shard_request.offset = 0
+        shard_request.limit = 0
+        async with semaphore:
+            check_row_budget()
+            with bulk():
+                response = await run_report_all_pages(
+                    run_budgeted_page, shard_request
+                )
+        if response.row_count > len(response.rows):
+            raise ValueError(
+                f"A shard of the report has more than {MAX_TOTAL_ROWS} rows. "
+                "Use a shorter shard or a shorter date range."
+            )
+        return response
+
+    tasks = [
+        asyncio.ensure_future(run_shard(start, end))
+        for _, shards in ranges
+        for start, end in shards
+    ]
+    try:
+        shard_responses = await asyncio.gather(*tasks)
+    finally:
+        # Stops the other shards if one of them failed.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    merged = data_v1beta.RunReportResponse()
+    merged_pb = data_v1beta.RunReportResponse.pb(merged)
+    first_pb = data_v1beta.RunReportResponse.pb(shard_responses[0])
+    merged_pb.dimension_headers.extend(first_pb.dimension_headers)
+    merged_pb.metric_headers.extend(first_pb.metric_headers)
+    merged_pb.metadata.currency_code = first_pb.metadata.currency_code
+    merged_pb.metadata.time_zone = first_pb.metadata.time_zone
+    # Like the Data API, adds a `dateRange` dimension to reports with more
+    # than one date range.
+    add_range_name = len(ranges) > 1
+    if add_range_name:
+        merged_pb.dimension_headers.add(name="dateRange")
+
+    concatenate = _has_date_dimension(request)
+    integer_columns = [
+        header.type_ == data_v1beta.MetricType.TYPE_INTEGER
+        for header in first_pb.metric_headers
+    ]
+    decimal_places = [0] * len(integer_columns)
+    rows = []
+    sums: Dict[Tuple[str, ...], List[Any]] = {}
+    sampled_shards = []
+    thresholded_shards = 0
+    responses = iter(shard_responses)
+    for name, shards in ranges:
+        for start, end in shards:
+            shard_pb = data_v1beta.RunReportResponse.pb(next(responses))
+            metadata = shard_pb.metadata
+            thresholded_shards += metadata.subject_to_thresholding
+            if metadata.data_loss_from_other_row:
+                merged_pb.metadata.data_loss_from_other_row = True
+            for sampling in metadata.sampling_metadatas:
+                sampled_shards.append(
+                    {
+                        "start_date": start.isoformat(),
+                        "end_date": end.isoformat(),
+                        "samples_read_count": sampling.samples_read_count,
+                        "sampling_space_size": sampling.sampling_space_size,
+                    }
+                )
+            for row in shard_pb.rows:
+                if concatenate:
+                    merged_row = data_v1beta.Row.pb()()
+                    merged_row.CopyFrom(row)
+                    if add_range_name:
+                        merged_row.dimension_values.add(value=name)
+                    rows.append(merged_row)
+                    continue
+                key = tuple(value.value for value in row.dimension_values)
+                if add_range_name:
+                    key += (name,)
+                totals = sums.get(key)
+                if totals is None:
+                    totals = sums[key] = [
+                        0 if integer else [] for integer in integer_columns
+                    ]
+                _sum_metric_values(totals, row, integer_columns, decimal_places)
+
+    for key, totals in sums.items():
+        merged_row = data_v1beta.Row.pb()()
+        for value in key:
+            merged_row.dimension_values.add(value=value)
+        for index, total in enumerate(totals):
+            if isinstance(total, list):
+                total = _float_total(total, decimal_places[index])
+            merged_row.metric_values.add(
+                value=str(total) if isinstance(total, int) else repr(total)
+            )
+        rows.append(merged_row)
+
+    if thresholded_shards:
+        merged_pb.metadata.subject_to_thresholding = True
+    sort_rows(rows, request, merged_pb)
+    merged_pb.row_count = len(rows)
+    if max_rows is None:
+        max_rows = MAX_TOTAL_ROWS
+    row_limit = min(max_rows, MAX_TOTAL_ROWS)
+    if request.limit:
+        row_limit = min(row_limit, request.limit)
+    merged_pb.rows.extend(rows[request.offset : request.offset + row_limit])
+
+    summary = {
+        "granularity": granularity,
+        "shard_count": shard_count,
+        "sampled_shard_count": len(sampled_shards),
+        "thresholded_shard_count": thresholded_shards,
+        "sampled_shards": sampled_shards,
+    }
+    return merged, summary
@@ -0,0 +1,408 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared polling of realtime reports for subscribers.
+
+Each distinct realtime report that has subscribers is polled by a single
+background task, however many subscribers it has. Every poll that changes the
+report's rows increments the report's version, and each row records the
+version in which it last changed. A subscriber's cursor is the version it last
+read, so each read returns only the rows that changed or disappeared since. A
+new subscriber starts with every row of the report's current version.
+
+A subscription that isn't read for `IDLE_SECONDS` expires, and a poller stops
+when its last subscription is gone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from analytics_mcp import config, stats
+from analytics_mcp.coordinator import on_shutdown
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.calls import DEFAULT_DEADLINE_SECONDS, deadline
+from analytics_mcp.tools.reporting import data_api
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+
+_logger = logging.getLogger(__name__)
+
+# How often each subscribed realtime report is polled.
+POLL_INTERVAL_SECONDS = config.get_float("REALTIME_POLL_INTERVAL_SECONDS", 10.0)
+
+# How long a subscription lasts without being read.
+IDLE_SECONDS = config.get_float("REALTIME_SUBSCRIPTION_IDLE_SECONDS", 300.0)
+
+RunRealtimeReport = Callable[
+    ["data_v1beta.RunRealtimeReportRequest"],
+    Awaitable["data_v1beta.RunRealtimeReportResponse"],
+]
+
+_RowKey = Tuple[str, ...]
+
+
+class UnknownSubscriptionError(ValueError):
+    """Raised when a subscription doesn't exist or has expired."""
+
+
+def query_key(request: data_v1beta.RunRealtimeReportRequest) -> bytes:
+    """Returns a key that's identical for identical realtime reports."""
+    pb = data_v1beta.RunRealtimeReportRequest.pb()()
+    pb.CopyFrom(data_v1beta.RunRealtimeReportRequest.pb(request))
+    pb.ClearField("return_property_quota")
+    return pb.SerializeToString(deterministic=True)
+
+
+class _Subscription:
+    """A subscriber's cursor into a polled report."""
+
+    def __init__(
+        self, subscription_id: str, now: float, cursor: int = 0
+    ) -> None:
+        self.subscription_id = subscription_id
+        self.cursor = cursor
+        self.last_read = now
+
+
+class RealtimePoller:
+    """Polls a realtime report and tracks the version of each row."""
+
+    def __init__(
+        self,
+        request: data_v1beta.RunRealtimeReportRequest,
+        run: RunRealtimeReport,
+        interval_seconds: float,
+        idle_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.request = request
+        self._run = run
+        self._interval_seconds = interval_seconds
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        self.subscriptions: Dict[str, _Subscription] = {}
+        self.version = 0
+        self.polls = 0
+        self.error: Exception | None = None
+        self.polled_at: str | None = None
+        self._headers: List[str] = []
+        # Metric values of each row, keyed by the row's dimension values.
+        self._rows: Dict[_RowKey, Tuple[str, ...]] = {}
+        # The version in which each row last changed.
+        self._row_versions: Dict[_RowKey, int] = {}
+        # The version in which each row disappeared, until every subscriber
+        # has read it.
+        self._removed: Dict[_RowKey, int] = {}
+        self._first_poll = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(
+        self,
+        on_expire: Callable[[List[str]], None],
+        on_stop: Callable[["RealtimePoller"], None],
+    ) -> None:
+        """Starts polling in the background.
+
+        Args:
+            on_expire: Called with the IDs of expired subscriptions.
+            on_stop: Called when the poller stops.
+        """
+        self._task = asyncio.create_task(
+            self._poll_until_idle(on_expire, on_stop)
+        )
+
+    async def stop(self) -> None:
+        """Stops polling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def wait_for_first_poll(self) -> None:
+        """Waits until the report has been polled once, even if it failed."""
+        await self._first_poll.wait()
+
+    def _expire_idle_subscriptions(self) -> List[str]:
+        """Removes and returns the subscriptions that haven't been read."""
+        now = self._clock()
+        expired = [
+            subscription_id
+            for subscription_id, subscription in self.subscriptions.items()
+            if now - subscription.last_read > self._idle_seconds
+        ]
+        for subscription_id in expired:
+            del self.subscriptions[subscription_id]
+        return expired
+
+    async def _poll_until_idle(
+        self,
+        on_expire: Callable[[List[str]], None],
+        on_stop: Callable[["RealtimePoller"], None],
+    ) -> None:
+        try:
+            while True:
+                expired = self._expire_idle_subscriptions()
+                if expired:
+                    on_expire(expired)
+                if not self.subscriptions:
+                    return
+                await self.poll()
+                if not self.polls:
+                    # Every subscriber is waiting for the first poll and
+                    # fails with its error, so a new subscriber starts a new
+                    # poller rather than getting this poller's error.
+                    return
+                await asyncio.sleep(self._interval_seconds)
+        finally:
+            on_stop(self)
+
+    async def poll(self) -> None:
+        """Runs the report once and records the rows that changed.
+
+        A failed poll is recorded in `error` and leaves the rows unchanged.
+        """
+        try:
+            with deadline(DEFAULT_DEADLINE_SECONDS):
+                response = await self._run(self.request)
+        except Exception as e:
+            _logger.warning("Realtime poll failed: %s", e)
+            self.error = e
+            self._first_poll.set()
+            return
+        self.polls += 1
+        self.error = None
+        self.polled_at = datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec="seconds"
+        )
+
+        pb = data_v1beta.RunRealtimeReportResponse.pb(response)
+        headers = [header.name for header in pb.dimension_headers] + [
+            header.name for header in pb.metric_headers
+        ]
+        rows = {
+            tuple(value.value for value in row.dimension_values): tuple(
+                value.value for value in row.metric_values
+            )
+            for row in pb.rows
+        }
+        version = self.version + 1
+        changed = headers != self._headers
+        self._headers = headers
+        for key, values in rows.items():
+            if self._rows.get(key) != values:
+                self._row_versions[key] = version
+                self._removed.pop(key, None)
+                changed = True
+        for key in self._rows.keys() - rows.keys():
+            del self._row_versions[key]
+            self._removed[key] = version
+            changed = True
+        self._rows = rows
+        if changed:
+            self.version = version
+        self._prune_removed()
+        self._first_poll.set()
+
+    def _prune_removed(self) -> None:
+        """Forgets removed rows that every subscriber has read."""
+        if not self.subscriptions:
+            return
+        oldest_cursor = min(
+            subscription.cursor for subscription in self.subscriptions.values()
+        )
+        self._removed = {
+            key: version
+            for key, version in self._removed.items()
+            if version > oldest_cursor
+        }
+
+    def read(
+        self, subscription_id: str, snapshot: bool = False
+    ) -> Dict[str, Any]:
+        """Returns the rows that changed since the subscriber's last read.
+
+        If `snapshot` is true, returns every row as changed since version 0,
+        and no removed rows.
+        """
+        subscription = self.subscriptions[subscription_id]
+        since = 0 if snapshot else subscription.cursor
+        result = {
+            "subscription_id": subscription_id,
+            "since_version": since,
+            "version": self.version,
+            "headers": self._headers,
+            "changed_rows": [
+                list(key) + list(self._rows[key])
+                for key, version in self._row_versions.items()
+                if version > since
+            ],
+            "removed_rows": [
+                list(key)
+                for key, version in self._removed.items()
+                if version > since and not snapshot
+            ],
+            "row_count": len(self._rows),
+            "polled_at": self.polled_at,
+        }
+        if self.error is not None:
+            result["error"] = str(self.error)
+        subscription.cursor = self.version
+        subscription.last_read = self._clock()
+        return result
+
+
+class SubscriptionManager:
+    """Shares a poller between the subscribers of each realtime report."""
+
+    def __init__(
+        self,
+        run: RunRealtimeReport,
+        interval_seconds: float,
+        idle_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._run = run
+        self._interval_seconds = interval_seconds
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        self._pollers: Dict[bytes, RealtimePoller] = {}
+        self._subscriptions: Dict[str, RealtimePoller] = {}
+        self._reads = 0
+        self._stopped_polls = 0
+
+    def _on_expire(self, subscription_ids: List[str]) -> None:
+        for subscription_id in subscription_ids:
+            self._subscriptions.pop(subscription_id, None)
+
+    def _on_stop(self, poller: RealtimePoller) -> None:
+        key = query_key(poller.request)
+        if self._pollers.get(key) is poller:
+            del self._pollers[key]
+        self._on_expire(
+            [
+                subscription_id
+                for subscription_id, owner in self._subscriptions.items()
+                if owner is poller
+            ]
+        )
+        self._stopped_polls += poller.polls
+
+    async def subscribe(
+        self, request: data_v1beta.RunRealtimeReportRequest
+    ) -> Dict[str, Any]:
+        """Subscribes to a realtime report and returns its current rows.
+
+        A subscriber to a report that's already polled starts from the
+        report's current version, so later reads don't return rows that
+        disappeared before it subscribed.
+
+        Raises:
+            Exception: Any error raised by the report's first poll.
+        """
+        request = data_v1beta.RunRealtimeReportRequest(request)
+        request.return_property_quota = False
+        key = query_key(request)
+        poller = self._pollers.get(key)
+        subscription_id = uuid.uuid4().hex
+        subscription = _Subscription(
+            subscription_id,
+            self._clock(),
+            cursor=poller.version if poller is not None else 0,
+        )
+        if poller is None:
+            poller = RealtimePoller(
+                request,
+                self._run,
+                self._interval_seconds,
+                self._idle_seconds,
+                self._clock,
+            )
+            poller.subscriptions[subscription_id] = subscription
+            self._pollers[key] = poller
+            poller.start(self._on_expire, self._on_stop)
+        else:
+            poller.subscriptions[subscription_id] = subscription
+        self._subscriptions[subscription_id] = poller
+
+        await poller.wait_for_first_poll()
+        if poller.polls == 0:
+            self.unsubscribe(subscription_id)
+            raise poller.error
+        return self.read(subscription_id, snapshot=True)
+
+    def read(
+        self, subscription_id: str, snapshot: bool = False
+    ) -> Dict[str, Any]:
+        """Returns the rows that changed since the subscriber's last read.
+
+        If `snapshot` is true, returns every row instead. See
+        `RealtimePoller.read`.
+
+        Raises:
+            UnknownSubscriptionError: If the subscription doesn't exist.
+        """
+        poller = self._subscriptions.get(subscription_id)
+        if poller is None or subscription_id not in poller.subscriptions:
+            raise UnknownSubscriptionError(
+                f"Unknown subscription: {subscription_id!r}. It may have "
+                "expired after not being read for "
+                f"{self._idle_seconds:g} seconds."
+            )
+        self._reads += 1
+        return poller.read(subscription_id, snapshot)
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        """Ends a subscription. Returns whether the subscription existed."""
+        poller = self._subscriptions.pop(subscription_id, None)
+        if poller is None:
+            return False
+        return poller.subscriptions.pop(subscription_id, None) is not None
+
+    async def close(self) -> None:
+        """Stops every poller."""
+        await asyncio.gather(
+            *(poller.stop() for poller in list(self._pollers.values()))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of pollers, subscriptions, polls and reads."""
+        return {
+            "pollers": len(self._pollers),
+            "subscriptions": len(self._subscriptions),
+            "polls": self._stopped_polls
+            + sum(poller.polls for poller in self._pollers.values()),
+            "reads": self._reads,
+        }
+
+
+subscription_manager = SubscriptionManager(
+    data_api.run_realtime_report, POLL_INTERVAL_SECONDS, IDLE_SECONDS
+)
+stats.register_stats_provider(
+    "realtime_subscriptions", subscription_manager.stats
+)
+
+
+@on_shutdown
+async def stop_pollers() -> None:
+    """Stops polling subscribed realtime reports."""
+    await subscription_manager.close()
@@ -0,0 +1,314 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local validation of report requests before they're sent to the Data API.
+
+Validation rejects requests that are certain to fail, such as a request with
+an unknown dimension or an `order_bys` entry for a metric that isn't in the
+report, without a round trip to the API.
+"""
+
+from __future__ import annotations
+
+import difflib
+import logging
+from typing import Iterator, List, Tuple
+
+from analytics_mcp import config
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.reporting import data_api
+from analytics_mcp.tools.reporting.metadata_cache import (
+    DIMENSION,
+    METRIC,
+    PropertyMetadata,
+    metadata_cache,
+)
+
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+exceptions = lazy_import("google.api_core.exceptions")
+
+_logger = logging.getLogger(__name__)
+
+# Whether to validate requests before sending them to the Data API.
+_ENABLED = config.get_bool("VALIDATE_REQUESTS", True)
+
+# Prefixes of custom dimension and metric API names.
+_CUSTOM_PREFIXES = ("customEvent:", "customUser:", "customItem:")
+
+# Filter types that only apply to string values.
+_STRING_FILTERS = ("string_filter", "in_list_filter")
+
+
+class InvalidReportRequestError(ValueError):
+    """Raised when a report request is certain to be rejected by the API."""
+
+    def __init__(self, problems: List[str]) -> None:
+        self.problems = problems
+        super().__init__(
+            "Invalid report request:\n"
+            + "\n".join(f"  - {problem}" for problem in problems)
+        )
+
+
+def _filter_fields(
+    expression: data_v1beta.FilterExpression,
+) -> Iterator[Tuple[str, str]]:
+    """Yields the (field name, filter type) of every filter in an expression."""
+    pb = data_v1beta.FilterExpression.pb(expression)
+    pending = [pb]
+    while pending:
+        current = pending.pop()
+        kind = current.WhichOneof("expr")
+        if kind in ("and_group", "or_group"):
+            pending.extend(getattr(current, kind).expressions)
+        elif kind == "not_expression":
+            pending.append(current.not_expression)
+        elif kind == "filter":
+            yield (
+                current.filter.field_name,
+                current.filter.WhichOneof("one_filter"),
+            )
+
+
+def _order_by_problems(request) -> List[str]:
+    """Returns problems with the request's `order_bys`.
+
+    Dimensions and metrics in `order_bys` must also be in the request's
+    `dimensions` and `metrics`, respectively.
+    """
+    dimensions = {dimension.name for dimension in request.dimensions}
+    metrics = {metric.name for metric in request.metrics}
+    problems = []
+    for order_by in request.order_bys:
+        if "dimension" in order_by:
+            name = order_by.dimension.dimension_name
+            if name not in dimensions:
+                problems.append(
+                    f"order_bys references dimension '{name}', which isn't in "
+                    f"the report's dimensions {sorted(dimensions)}. Add it "
+                    "to `dimensions` or remove it from `order_bys`."
+                )
+        elif "metric" in order_by:
+            name = order_by.metric.metric_name
+            if name not in metrics:
+                problems.append(
+                    f"order_bys references metric '{name}', which isn't in "
+                    f"the report's metrics {sorted(metrics)}. Add it to "
+                    "`metrics` or remove it from `order_bys`."
+                )
+    return problems
+
+
+def _suggestion(metadata: PropertyMetadata, name: str, kind: str) -> str:
+    """Returns a hint naming the closest known fields of the given kind."""
+    candidates = [field["api_name"] for field in metadata.search(kind=kind)]
+    matches = difflib.get_close_matches(name, candidates, n=3)
+    if not matches:
+        return (
+            "Use the `search_dimensions_and_metrics` tool to find valid "
+            f"{kind}s."
+        )
+    return f"Did you mean {' or '.join(repr(m) for m in matches)}?"
+
+
+def _field_problems(
+    metadata: PropertyMetadata, request
+) -> Tuple[List[str], List[str]]:
+    """Checks the request's fields against the property's metadata.
+
+    Returns:
+        A tuple of the problems found, and the names of fields that aren't in
+        the metadata. Unknown fields may have been created after the metadata
+        was cached, so they're checked by the API.
+    """
+    problems = []
+    unknown = []
+
+    def check(name: str, expected: str, context: str) -> None:
+        kind = metadata.kind_of(name)
+        if kind is None:
+            unknown.append(name)
+        elif kind != expected:
+            problems.append(
+                f"'{name}' in {context} is a {kind}, not a {expected}. "
+                f"{_suggestion(metadata, name, expected)}"
+            )
+
+    for dimension in request.dimensions:
+        check(dimension.name, DIMENSION, "dimensions")
+    for metric in request.metrics:
+        # Metrics defined by an expression don't need to exist.
+        if not metric.expression:
+            check(metric.name, METRIC, "metrics")
+    if "dimension_filter" in request:
+        for name, _ in _filter_fields(request.dimension_filter):
+            check(name, DIMENSION, "dimension_filter")
+    if "metric_filter" in request:
+        for name, filter_type in _filter_fields(request.metric_filter):
+            check(name, METRIC, "metric_filter")
+            if filter_type in _STRING_FILTERS:
+                problems.append(
+                    f"metric_filter uses a {filter_type} for metric "
+                    f"'{name}'. Metrics only support numeric_filter, "
+                    "between_filter and empty_filter."
+                )
+    return problems, unknown
+
+
+async def _check_compatibility(request) -> List[str] | None:
+    """Returns problems reported by the Data API's compatibility check.
+
+    Returns None if the check itself fails, in which case the API validates
+    the request when it runs.
+    """
+    compatibility_request = data_v1beta.CheckCompatibilityRequest(
+        property=request.property,
+        dimensions=request.dimensions,
+        metrics=request.metrics,
+    )
+    if "dimension_filter" in request:
+        compatibility_request.dimension_filter = request.dimension_filter
+    if "metric_filter" in request:
+        compatibility_request.metric_filter = request.metric_filter
+    try:
+        await data_api.check_compatibility(compatibility_request)
+    except exceptions.InvalidArgument as e:
+        return [e.message]
+    except exceptions.GoogleAPICallError:
+        _logger.debug("Skipping compatibility check", exc_info=True)
+        return None
+    return []
+
+
+def _pivot_problems(request: data_v1beta.RunPivotReportRequest) -> List[str]:
+    """Returns problems with the request's `pivots`.
+
+    A pivot's `field_names` must be dimensions of the report, and its
+    `order_bys` may only reference the report's dimensions and metrics.
+    """
+    dimensions = [dimension.name for dimension in request.dimensions]
+    problems = []
+    if not request.pivots:
+        problems.append("A pivot report must have at least one pivot.")
+    for index, pivot in enumerate(request.pivots):
+        for name in pivot.field_names:
+            if name not in dimensions:
+                problems.append(
+                    f"pivots[{index}] references dimension '{name}', which "
+                    f"isn't in the report's dimensions {sorted(dimensions)}. "
+                    "Add it to `dimensions`."
+                )
+        problems.extend(
+            f"pivots[{index}]: {problem}"
+            for problem in _order_by_problems(
+                data_v1beta.RunReportRequest(
+                    dimensions=request.dimensions,
+                    metrics=request.metrics,
+                    order_bys=pivot.order_bys,
+                )
+            )
+        )
+    return problems
+
+
+async def validate_report_request(
+    request: data_v1beta.RunReportRequest,
+) -> None:
+    """Validates a core report request against the property's metadata.
+
+    Fields that aren't in the cached metadata are checked with the Data
+    API's compatibility check instead. If the metadata can't be retrieved,
+    validation is skipped and the API validates the request.
+
+    Raises:
+        InvalidReportRequestError: If the request is invalid.
+    """
+    if not _ENABLED:
+        return
+    await _validate_fields(request, _order_by_problems(request))
+
+
+async def validate_pivot_report_request(
+    request: data_v1beta.RunPivotReportRequest,
+) -> None:
+    """Validates a pivot report request against the property's metadata.
+
+    Checks the request's pivots, then its fields as in
+    `validate_report_request`.
+
+    Raises:
+        InvalidReportRequestError: If the request is invalid.
+    """
+    if not _ENABLED:
+        return
+    await _validate_fields(request, _pivot_problems(request))
+
+
+async def _validate_fields(request, problems: List[str]) -> None:
+    """Checks a report request's fields and raises any problems found.
+
+    Args:
+        request: A `RunReportRequest` or `RunPivotReportRequest`.
+        problems: Problems already found with the request.
+    """
+    try:
+        metadata = await metadata_cache.get(request.property)
+    except exceptions.GoogleAPICallError:
+        _logger.debug("Skipping metadata validation", exc_info=True)
+        metadata = None
+    if metadata is not None:
+        field_problems, unknown = _field_problems(metadata, request)
+        problems.extend(field_problems)
+        if unknown and not problems:
+            compatibility_problems = await _check_compatibility(request)
+            if compatibility_problems is not None:
+                problems.extend(compatibility_problems)
+                if not problems:
+                    # The fields exist, so the cached metadata is out of date.
+                    metadata_cache.invalidate(request.property)
+    if problems:
+        raise InvalidReportRequestError(problems)
+
+
+def validate_realtime_report_request(
+    request: data_v1beta.RunRealtimeReportRequest,
+) -> None:
+    """Validates a realtime report request.
+
+    Realtime reports can't use custom metrics, and can only use user-scoped
+    custom dimensions.
+
+    Raises:
+        InvalidReportRequestError: If the request is invalid.
+    """
+    if not _ENABLED:
+        return
+    problems = _order_by_problems(request)
+    for metric in request.metrics:
+        if metric.name.startswith(_CUSTOM_PREFIXES):
+            problems.append(
+                f"Realtime reports can't use custom metrics such as "
+                f"'{metric.name}'. Use a realtime standard metric instead."
+            )
+    for dimension in request.dimensions:
+        if dimension.name.startswith(_CUSTOM_PREFIXES) and not (
+            dimension.name.startswith("customUser:")
+        ):
+            problems.append(
+                f"Realtime reports can only use user-scoped custom "
+                f"dimensions, whose names begin with 'customUser:', but "
+                f"'{dimension.name}' isn't user-scoped."
+            )
+    if problems:
+        raise InvalidReportRequestError(problems)
@@ -0,0 +1,110 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deduplication of identical concurrent calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+ResultT = TypeVar("ResultT")
+
+
+class _Flight:
+    """A shared call and the number of callers waiting for it."""
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Shares the result of a call with identical calls made while it runs.
+
+    The first caller for a key starts the call in its own task. Callers that
+    arrive with the same key while the call is in flight await the same task
+    instead of starting another call. Once the call finishes, the next call
+    for the key starts a new call.
+
+    A caller that's cancelled stops waiting without cancelling the shared
+    call, unless it was the last caller waiting for it.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._calls = 0
+        self._shared = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[ResultT]],
+        copy: Callable[[ResultT], ResultT] | None = None,
+    ) -> ResultT:
+        """Returns the result of `call`, sharing it with identical calls.
+
+        Args:
+            key: Identifies calls that return the same result.
+            call: Async function that makes the call.
+            copy: Optional function that copies the result. If provided,
+              callers never share a result object, so that they can't see
+              each other's modifications: every caller but the last one to
+              resume receives its own copy, and the last one receives the
+              original.
+
+        Raises:
+            Any exception raised by `call`, which is raised to every caller
+            waiting for it.
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        joined = flight is not None and flight.task.get_loop() is loop
+        if joined:
+            self._shared += 1
+        else:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            self._calls += 1
+            flight.task.add_done_callback(
+                lambda task: self._forget(key, flight)
+            )
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+            # Once the call is done, no new caller can join it, so the last
+            # waiter to resume is the only one left that can see the result.
+            if copy is not None and flight.waiters > 1:
+                result = copy(result)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                # No other caller is waiting, so the call is no longer needed.
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        return result
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        """Removes a finished call so that the next call for its key runs."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of calls made and the number of calls shared."""
+        return {
+            "in_flight": len(self._flights),
+            "calls": self._calls,
+            "shared": self._shared,
+        }
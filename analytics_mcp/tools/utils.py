@@ -14,13 +14,26 @@
 
 """Common utilities used by the MCP server."""
 
-from typing import Any, Dict
+from __future__ import annotations
 
-from google.analytics import admin_v1beta, data_v1beta
-from google.api_core.gapic_v1.client_info import ClientInfo
+import functools
+import logging
+from typing import Any, Callable, Dict
+
+from analytics_mcp import config, stats
+from analytics_mcp.coordinator import on_shutdown
+from analytics_mcp.lazy import lazy_import
+from analytics_mcp.tools.client_pool import ClientPool
+from analytics_mcp.tools.credentials import CredentialsManager
 from importlib import metadata
 import google.auth
-import proto
+
+# The client libraries are loaded when the first client is created.
+admin_v1beta = lazy_import("google.analytics.admin_v1beta")
+data_v1beta = lazy_import("google.analytics.data_v1beta")
+proto = lazy_import("proto")
+
+_logger = logging.getLogger(__name__)
 
 
 def _get_package_version_with_fallback():
@@ -34,10 +47,16 @@ def _get_package_version_with_fallback():
         return "unknown"
 
 
-# Client information that adds a custom user agent to all API requests.
-_CLIENT_INFO = ClientInfo(
-    user_agent=f"analytics-mcp/{_get_package_version_with_fallback()}"
-)
+@functools.cache
+def _client_info():
+    """Returns client info that adds a custom user agent to API requests."""
+    # Imported here because importing `gapic_v1` loads the gRPC stack.
+    from google.api_core.gapic_v1.client_info import ClientInfo
+
+    return ClientInfo(
+        user_agent=f"analytics-mcp/{_get_package_version_with_fallback()}"
+    )
+
 
 # Read-only scope for Analytics Admin API and Analytics Data API.
 _READ_ONLY_ANALYTICS_SCOPE = (
@@ -45,34 +64,131 @@ _READ_ONLY_ANALYTICS_SCOPE = (
 )
 
 
+_credentials_manager = CredentialsManager(
+    scopes=[_READ_ONLY_ANALYTICS_SCOPE],
+    refresh_margin_seconds=config.get_float(
+        "TOKEN_REFRESH_MARGIN_SECONDS", 300.0
+    ),
+)
+stats.register_stats_provider("credentials", _credentials_manager.stats)
+on_shutdown(_credentials_manager.stop)
+
+
 def _create_credentials() -> google.auth.credentials.Credentials:
-    """Returns Application Default Credentials with read-only scope."""
-    (credentials, _) = google.auth.default(scopes=[_READ_ONLY_ANALYTICS_SCOPE])
+    """Returns Application Default Credentials with read-only scope.
+
+    The credentials are resolved once per process and shared by all clients.
+    If called from a running event loop, also starts the background task that
+    refreshes the access token ahead of expiry.
+    """
+    credentials = _credentials_manager.get()
+    _credentials_manager.start_background_refresh()
     return credentials
 
 
-def create_admin_api_client() -> admin_v1beta.AnalyticsAdminServiceAsyncClient:
-    """Returns a properly configured Google Analytics Admin API async client.
+async def resolve_credentials() -> None:
+    """Resolves the credentials in a worker thread, ahead of the first client.
 
-    Uses Application Default Credentials with read-only scope.
+    Clients are created on the event loop, which would otherwise be blocked
+    while the credentials are looked up. A failure is only logged, since it's
+    raised again when the first client is created.
     """
+    try:
+        await _credentials_manager.resolve()
+    except Exception:
+        _logger.debug("Failed to resolve credentials", exc_info=True)
+
+
+def _new_admin_api_client() -> admin_v1beta.AnalyticsAdminServiceAsyncClient:
+    """Returns a new Google Analytics Admin API async client."""
     return admin_v1beta.AnalyticsAdminServiceAsyncClient(
-        client_info=_CLIENT_INFO, credentials=_create_credentials()
+        client_info=_client_info(), credentials=_create_credentials()
+    )
+
+
+def _new_data_api_client() -> data_v1beta.BetaAnalyticsDataAsyncClient:
+    """Returns a new Google Analytics Data API async client."""
+    return data_v1beta.BetaAnalyticsDataAsyncClient(
+        client_info=_client_info(), credentials=_create_credentials()
     )
 
 
+# The maximum number of clients, and therefore gRPC channels, kept open for
+# each API.
+_CLIENT_POOL_SIZE = config.get_int("CLIENT_POOL_SIZE", 2)
+
+_admin_api_client_pool = ClientPool(
+    "admin_api_clients", _new_admin_api_client, _CLIENT_POOL_SIZE
+)
+_data_api_client_pool = ClientPool(
+    "data_api_clients", _new_data_api_client, _CLIENT_POOL_SIZE
+)
+
+stats.register_stats_provider(
+    _admin_api_client_pool.name, _admin_api_client_pool.stats
+)
+stats.register_stats_provider(
+    _data_api_client_pool.name, _data_api_client_pool.stats
+)
+
+
+@on_shutdown
+async def close_api_clients() -> None:
+    """Closes the pooled Admin API and Data API clients."""
+    await _admin_api_client_pool.close()
+    await _data_api_client_pool.close()
+
+
+def create_admin_api_client() -> admin_v1beta.AnalyticsAdminServiceAsyncClient:
+    """Returns a properly configured Google Analytics Admin API async client.
+
+    Uses Application Default Credentials with read-only scope. The client is
+    shared with other tool calls through a pool of long-lived clients, so
+    callers must not close it.
+    """
+    return _admin_api_client_pool.get()
+
+
 def create_data_api_client() -> data_v1beta.BetaAnalyticsDataAsyncClient:
     """Returns a properly configured Google Analytics Data API async client.
 
-    Uses Application Default Credentials with read-only scope.
+    Uses Application Default Credentials with read-only scope. The client is
+    shared with other tool calls through a pool of long-lived clients, so
+    callers must not close it.
     """
-    return data_v1beta.BetaAnalyticsDataAsyncClient(
-        client_info=_CLIENT_INFO, credentials=_create_credentials()
+    return _data_api_client_pool.get()
+
+
+# Resolves property display names to resource names, if registered.
+_property_name_resolver: Callable[[str], str] | None = None
+
+
+def register_property_name_resolver(resolver: Callable[[str], str]) -> None:
+    """Registers the function `construct_property_rn` uses to resolve names.
+
+    The resolver receives a display name and returns the property's resource
+    name, or raises a ValueError.
+    """
+    global _property_name_resolver
+    _property_name_resolver = resolver
+
+
+def is_property_id(property_value: int | str) -> bool:
+    """Returns whether the value is a property ID rather than a name."""
+    if isinstance(property_value, int):
+        return True
+    property_value = property_value.strip()
+    return property_value.isdigit() or (
+        property_value.startswith("properties/")
+        and property_value.split("/")[-1].isdigit()
     )
 
 
 def construct_property_rn(property_value: int | str) -> str:
-    """Returns a property resource name in the format required by APIs."""
+    """Returns a property resource name in the format required by APIs.
+
+    Property display names are resolved with the registered resolver.
+    """
     property_num = None
     if isinstance(property_value, int):
         property_num = property_value
@@ -84,6 +200,8 @@ def construct_property_rn(property_value: int | str) -> str:
             numeric_part = property_value.split("/")[-1]
             if numeric_part.isdigit():
                 property_num = int(numeric_part)
+        elif property_value and _property_name_resolver is not None:
+            return _property_name_resolver(property_value)
     if property_num is None:
         raise ValueError(
             (
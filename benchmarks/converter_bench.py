@@ -0,0 +1,42 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares `proto_to_dict` with the specialized report response converter.
+
+Run with `python -m benchmarks.converter_bench`.
+"""
+
+from analytics_mcp.tools.reporting.formatting import response_to_dict
+from analytics_mcp.tools.utils import proto_to_dict
+from benchmarks.fixtures import make_report_response, print_table, time_call
+
+ROW_COUNTS = (1_000, 10_000, 100_000)
+
+
+def main() -> None:
+    results = {}
+    for row_count in ROW_COUNTS:
+        response = make_report_response(row_count)
+        generic_ms = time_call(lambda: proto_to_dict(response), repeat=3)
+        direct_ms = time_call(lambda: response_to_dict(response), repeat=3)
+        results[f"{row_count} rows"] = {
+            "proto_to_dict_ms": round(generic_ms, 1),
+            "response_to_dict_ms": round(direct_ms, 1),
+            "speedup": f"{generic_ms / direct_ms:.1f}x",
+        }
+    print_table("Verbose conversion of RunReportResponse", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""An in-process fake of the Data API and Admin API gRPC services.
+
+Serves `RunReport`, `RunRealtimeReport`, `GetMetadata` and
+`CheckCompatibility` of the Data API, and `ListAccountSummaries` of the Admin
+API, on a local port. Each call waits for a configurable latency, and a
+configurable fraction of calls fail with an injected error. Reports have
+synthetic rows for whichever dimensions and metrics they request.
+
+The fake runs its own event loop in a background thread, so building its
+responses doesn't block the event loop of the tools being measured.
+`FakeAnalyticsApi.install_clients` points the server's pooled API clients at
+the fake, so tools run unchanged against it.
+"""
+
+import asyncio
+import collections
+import random
+import threading
+from typing import Any, Callable, Dict
+
+import grpc
+from google.analytics import admin_v1beta, data_v1beta
+from google.analytics.admin_v1beta.services.analytics_admin_service.transports import (
+    AnalyticsAdminServiceGrpcAsyncIOTransport,
+)
+from google.analytics.data_v1beta.services.beta_analytics_data.transports import (
+    BetaAnalyticsDataGrpcAsyncIOTransport,
+)
+
+from analytics_mcp.tools import utils
+from analytics_mcp.tools.client_pool import ClientPool
+
+_DATA_SERVICE = "google.analytics.data.v1beta.BetaAnalyticsData"
+_ADMIN_SERVICE = "google.analytics.admin.v1beta.AnalyticsAdminService"
+
+# The dimensions and metrics returned by `GetMetadata`.
+DIMENSIONS = (
+    "date",
+    "country",
+    "city",
+    "eventName",
+    "pagePath",
+    "unifiedScreenName",
+    "customEvent:plan",
+)
+METRICS = (
+    ("activeUsers", data_v1beta.MetricType.TYPE_INTEGER),
+    ("eventCount", data_v1beta.MetricType.TYPE_INTEGER),
+    ("screenPageViews", data_v1beta.MetricType.TYPE_INTEGER),
+    ("sessions", data_v1beta.MetricType.TYPE_INTEGER),
+    ("averageSessionDuration", data_v1beta.MetricType.TYPE_SECONDS),
+    ("customEvent:revenue", data_v1beta.MetricType.TYPE_CURRENCY),
+)
+_METRIC_TYPES = dict(METRICS)
+
+# Quota remaining in each window of every response's property quota, large
+# enough that the quota scheduler never delays a call.
+_QUOTA_REMAINING = 1_000_000_000
+
+
+class FakeApiSettings:
+    """How the fake API behaves."""
+
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 5.0,
+        report_rows: int = 100_000,
+        realtime_rows: int = 50,
+        accounts: int = 20,
+        properties_per_account: int = 5,
+        error_rate: float = 0.0,
+        error_code: grpc.StatusCode = grpc.StatusCode.UNAVAILABLE,
+        seed: int = 0,
+    ) -> None:
+        """Initializes the settings.
+
+        Args:
+            latency_ms: The minimum time each call takes.
+            jitter_ms: The maximum random time added to each call's latency.
+            report_rows: The total number of rows of every report. A
+              response has at most the request's `limit` rows.
+            realtime_rows: The total number of rows of every realtime report.
+            accounts: The number of accounts in `ListAccountSummaries`.
+            properties_per_account: The number of properties of each account.
+            error_rate: The fraction of calls that fail with `error_code`.
+            error_code: The status code of injected errors.
+            seed: Seeds the random latencies and errors.
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.report_rows = report_rows
+        self.realtime_rows = realtime_rows
+        self.accounts = accounts
+        self.properties_per_account = properties_per_account
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the settings, for comparing benchmark runs."""
+        result = dict(vars(self))
+        result["error_code"] = self.error_code.name
+        return result
+
+
+def _property_quota() -> data_v1beta.PropertyQuota:
+    status = {"consumed": 1, "remaining": _QUOTA_REMAINING}
+    return data_v1beta.PropertyQuota(
+        tokens_per_day=status,
+        tokens_per_hour=status,
+        concurrent_requests=status,
+        server_errors_per_project_per_hour=status,
+        potentially_thresholded_requests_per_hour=status,
+        tokens_per_project_per_hour=status,
+    )
+
+
+def _fill_rows(pb, request, total_rows: int, limit: int, offset: int) -> None:
+    """Adds synthetic headers and rows for a report request to `pb`."""
+    for dimension in request.dimensions:
+        pb.dimension_headers.add(name=dimension.name)
+    for metric in request.metrics:
+        pb.metric_headers.add(
+            name=metric.name,
+            type_=_METRIC_TYPES.get(
+                metric.name, data_v1beta.MetricType.TYPE_INTEGER
+            ),
+        )
+    dimension_names = [dimension.name for dimension in request.dimensions]
+    metric_count = len(request.metrics)
+    end = min(total_rows, offset + limit) if limit else total_rows
+    for index in range(offset, end):
+        row = pb.rows.add()
+        for name in dimension_names:
+            row.dimension_values.add(
+                value=(
+                    f"2025{index % 12 + 1:02d}{index % 28 + 1:02d}"
+                    if name == "date"
+                    else f"{name} {index}"
+                )
+            )
+        for position in range(metric_count):
+            row.metric_values.add(value=str((index * 7 + position) % 10_000))
+    pb.row_count = total_rows
+
+
+class FakeAnalyticsApi:
+    """A local gRPC server that fakes the Data API and Admin API."""
+
+    def __init__(self, settings: FakeApiSettings | None = None) -> None:
+        self.settings = settings or FakeApiSettings()
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.injected_errors = 0
+        self._random = random.Random(self.settings.seed)
+        self._server: grpc.aio.Server | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self.address: str | None = None
+
+    async def _respond(
+        self,
+        method: str,
+        context: grpc.aio.ServicerContext,
+        build: Callable[[], Any],
+    ) -> Any:
+        """Waits for the call's latency, then fails or returns `build()`."""
+        self.calls[method] += 1
+        settings = self.settings
+        await asyncio.sleep(
+            (settings.latency_ms + self._random.random() * settings.jitter_ms)
+            / 1000
+        )
+        if self._random.random() < settings.error_rate:
+            self.injected_errors += 1
+            await context.abort(settings.error_code, "Injected error.")
+        return build()
+
+    async def _run_report(self, request, context):
+        def build():
+            pb = data_v1beta.RunReportResponse.pb()()
+            _fill_rows(
+                pb,
+                request,
+                self.settings.report_rows,
+                request.limit or 10_000,
+                request.offset,
+            )
+            if request.return_property_quota:
+                pb.property_quota.CopyFrom(
+                    data_v1beta.PropertyQuota.pb(_property_quota())
+                )
+            pb.metadata.currency_code = "USD"
+            pb.metadata.time_zone = "Etc/UTC"
+            return data_v1beta.RunReportResponse.wrap(pb)
+
+        return await self._respond("RunReport", context, build)
+
+    async def _run_realtime_report(self, request, context):
+        def build():
+            pb = data_v1beta.RunRealtimeReportResponse.pb()()
+            _fill_rows(
+                pb,
+                request,
+                self.settings.realtime_rows,
+                request.limit or 10_000,
+                0,
+            )
+            if request.return_property_quota:
+                pb.property_quota.CopyFrom(
+                    data_v1beta.PropertyQuota.pb(_property_quota())
+                )
+            return data_v1beta.RunRealtimeReportResponse.wrap(pb)
+
+        return await self._respond("RunRealtimeReport", context, build)
+
+    async def _get_metadata(self, request, context):
+        def build():
+            return data_v1beta.Metadata(
+                name=request.name,
+                dimensions=[
+                    {
+                        "api_name": name,
+                        "ui_name": name,
+                        "custom_definition": name.startswith("custom"),
+                        "category": "Fake",
+                    }
+                    for name in DIMENSIONS
+                ],
+                metrics=[
+                    {
+                        "api_name": name,
+                        "ui_name": name,
+                        "type_": metric_type,
+                        "custom_definition": name.startswith("custom"),
+                        "category": "Fake",
+                    }
+                    for name, metric_type in METRICS
+                ],
+            )
+
+        return await self._respond("GetMetadata", context, build)
+
+    async def _check_compatibility(self, request, context):
+        return await self._respond(
+            "CheckCompatibility",
+            context,
+            data_v1beta.CheckCompatibilityResponse,
+        )
+
+    async def _list_account_summaries(self, request, context):
+        def build():
+            settings = self.settings
+            page_size = request.page_size or 50
+            start = int(request.page_token or 0)
+            end = min(settings.accounts, start + page_size)
+            response = admin_v1beta.ListAccountSummariesResponse(
+                account_summaries=[
+                    {
+                        "name": f"accountSummaries/{account}",
+                        "account": f"accounts/{account}",
+                        "display_name": f"Account {account}",
+                        "property_summaries": [
+                            {
+                                "property": (
+                                    f"properties/{account * 1000 + number}"
+                                ),
+                                "display_name": (
+                                    f"Property {account}-{number}"
+                                ),
+                                "parent": f"accounts/{account}",
+                            }
+                            for number in range(settings.properties_per_account)
+                        ],
+                    }
+                    for account in range(start + 1, end + 1)
+                ],
+            )
+            if end < settings.accounts:
+                response.next_page_token = str(end)
+            return response
+
+        return await self._respond("ListAccountSummaries", context, build)
+
+    def _handlers(self):
+        def unary(handler, request_type, response_type):
+            return grpc.unary_unary_rpc_method_handler(
+                handler,
+                request_deserializer=request_type.deserialize,
+                response_serializer=response_type.serialize,
+            )
+
+        return (
+            grpc.method_handlers_generic_handler(
+                _DATA_SERVICE,
+                {
+                    "RunReport": unary(
+                        self._run_report,
+                        data_v1beta.RunReportRequest,
+                        data_v1beta.RunReportResponse,
+                    ),
+                    "RunRealtimeReport": unary(
+                        self._run_realtime_report,
+                        data_v1beta.RunRealtimeReportRequest,
+                        data_v1beta.RunRealtimeReportResponse,
+                    ),
+                    "GetMetadata": unary(
+                        self._get_metadata,
+                        data_v1beta.GetMetadataRequest,
+                        data_v1beta.Metadata,
+                    ),
+                    "CheckCompatibility": unary(
+                        self._check_compatibility,
+                        data_v1beta.CheckCompatibilityRequest,
+                        data_v1beta.CheckCompatibilityResponse,
+                    ),
+                },
+            ),
+            grpc.method_handlers_generic_handler(
+                _ADMIN_SERVICE,
+                {
+                    "ListAccountSummaries": unary(
+                        self._list_account_summaries,
+                        admin_v1beta.ListAccountSummariesRequest,
+                        admin_v1beta.ListAccountSummariesResponse,
+                    ),
+                },
+            ),
+        )
+
+    async def _start_server(self) -> int:
+        self._server = grpc.aio.server()
+        self._server.add_generic_rpc_handlers(self._handlers())
+        port = self._server.add_insecure_port("localhost:0")
+        await self._server.start()
+        return port
+
+    def start(self) -> str:
+        """Starts the server on a free local port and returns its address."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="fake-analytics-api"
+        )
+        self._thread.start()
+        port = asyncio.run_coroutine_threadsafe(
+            self._start_server(), self._loop
+        ).result()
+        self.address = f"localhost:{port}"
+        return self.address
+
+    def stop(self) -> None:
+        """Stops the server and its thread."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(
+            self._server.stop(None), self._loop
+        ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def install_clients(self) -> None:
+        """Replaces the server's API client pools with clients of the fake.
+
+        Must be called after `start`. The clients don't use credentials.
+        """
+        address = self.address
+
+        def new_data_api_client():
+            return data_v1beta.BetaAnalyticsDataAsyncClient(
+                transport=BetaAnalyticsDataGrpcAsyncIOTransport(
+                    channel=grpc.aio.insecure_channel(address)
+                )
+            )
+
+        def new_admin_api_client():
+            return admin_v1beta.AnalyticsAdminServiceAsyncClient(
+                transport=AnalyticsAdminServiceGrpcAsyncIOTransport(
+                    channel=grpc.aio.insecure_channel(address)
+                )
+            )
+
+        utils._data_api_client_pool = ClientPool(
+            "data_api_clients", new_data_api_client, utils._CLIENT_POOL_SIZE
+        )
+        utils._admin_api_client_pool = ClientPool(
+            "admin_api_clients", new_admin_api_client, utils._CLIENT_POOL_SIZE
+        )
@@ -0,0 +1,84 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Synthetic Data API responses used by the benchmarks."""
+
+import random
+import time
+from typing import Callable, Dict
+
+from google.analytics import data_v1beta
+
+DIMENSIONS = ("date", "country", "eventName")
+METRICS = (
+    ("eventCount", data_v1beta.MetricType.TYPE_INTEGER),
+    ("activeUsers", data_v1beta.MetricType.TYPE_INTEGER),
+    ("averageSessionDuration", data_v1beta.MetricType.TYPE_SECONDS),
+)
+
+
+def make_report_response(
+    row_count: int, seed: int = 0
+) -> data_v1beta.RunReportResponse:
+    """Returns a report response with `row_count` rows of random values."""
+    rng = random.Random(seed)
+    pb = data_v1beta.RunReportResponse.pb()()
+    for name in DIMENSIONS:
+        pb.dimension_headers.add(name=name)
+    for name, metric_type in METRICS:
+        pb.metric_headers.add(name=name, type_=metric_type)
+    for i in range(row_count):
+        row = pb.rows.add()
+        row.dimension_values.add(
+            value=f"2025{(i % 12) + 1:02d}{(i % 28) + 1:02d}"
+        )
+        row.dimension_values.add(value=f"Country {rng.randrange(200)}")
+        row.dimension_values.add(value=f"event_{rng.randrange(50)}")
+        row.metric_values.add(value=str(rng.randrange(100_000)))
+        row.metric_values.add(value=str(rng.randrange(10_000)))
+        row.metric_values.add(value=repr(rng.random() * 600))
+    pb.row_count = row_count
+    return data_v1beta.RunReportResponse.wrap(pb)
+
+
+def time_call(function: Callable[[], object], repeat: int = 5) -> float:
+    """Returns the best wall time of `repeat` calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, object]]) -> None:
+    """Prints benchmark results as an aligned table."""
+    print(f"\n{title}")
+    columns = list(next(iter(rows.values())).keys())
+    widths = [max(len(column) + 2, 12) for column in columns]
+    name_width = max(len(name) for name in rows)
+    print(
+        " " * name_width
+        + "".join(
+            f"{column:>{width}}" for column, width in zip(columns, widths)
+        )
+    )
+    for name, values in rows.items():
+        print(
+            f"{name:<{name_width}}"
+            + "".join(
+                f"{values[column]:>{width}}"
+                for column, width in zip(columns, widths)
+            )
+        )
@@ -0,0 +1,52 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares the size and speed of the verbose and compact output formats.
+
+Run with `python -m benchmarks.output_format_bench`.
+"""
+
+import json
+
+from analytics_mcp.tools.reporting.formatting import (
+    OUTPUT_FORMATS,
+    format_response,
+)
+from benchmarks.fixtures import make_report_response, print_table, time_call
+
+ROW_COUNTS = (1_000, 10_000, 100_000)
+
+
+def main() -> None:
+    for row_count in ROW_COUNTS:
+        response = make_report_response(row_count)
+        results = {}
+        for output_format in OUTPUT_FORMATS:
+            result = format_response(response, output_format)
+            payload = json.dumps(result)
+            results[output_format] = {
+                "bytes": len(payload.encode()),
+                "convert_ms": round(
+                    time_call(lambda: format_response(response, output_format)),
+                    1,
+                ),
+                "json_dumps_ms": round(
+                    time_call(lambda: json.dumps(result)), 1
+                ),
+            }
+        print_table(f"{row_count} rows", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the time from launching the server to its first tools/list.
+
+Starts the server over stdio the way MCP clients do, sends `initialize` and
+`tools/list`, and times the `tools/list` response. For comparison, also
+starts the server after eagerly importing the Google client libraries, which
+is what importing the server cost before they were loaded lazily.
+
+Run with `python -m benchmarks.startup_bench`.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.fixtures import print_table
+
+RUNS = 5
+
+_SERVER = "from analytics_mcp.server import run_server; run_server()"
+
+_EAGER_SERVER = (
+    "import google.analytics.admin_v1beta, google.analytics.data_v1beta, "
+    "google.auth.transport.requests; " + _SERVER
+)
+
+_MESSAGES = (
+    {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "startup-bench", "version": "0"},
+        },
+    },
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+)
+
+
+def time_to_tools_list(code: str) -> float:
+    """Returns the milliseconds from launch to the tools/list response."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        for message in _MESSAGES:
+            process.stdin.write(json.dumps(message) + "\n")
+        process.stdin.flush()
+        for line in process.stdout:
+            response = json.loads(line)
+            if response.get("id") == 2:
+                elapsed = time.perf_counter() - start
+                if not response.get("result", {}).get("tools"):
+                    raise RuntimeError(f"Unexpected response: {response}")
+                return elapsed * 1000
+        raise RuntimeError("The server exited before responding.")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main() -> None:
+    results = {}
+    for name, code in (
+        ("lazy imports", _SERVER),
+        ("eager imports", _EAGER_SERVER),
+    ):
+        times = [time_to_tools_list(code) for _ in range(RUNS)]
+        results[name] = {
+            "min_ms": round(min(times), 1),
+            "median_ms": round(statistics.median(times), 1),
+        }
+    print_table(f"Time to first tools/list response ({RUNS} runs)", results)
+
+
+if __name__ == "__main__":
+    main()
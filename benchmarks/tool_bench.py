@@ -0,0 +1,363 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the server's tools against a fake Data API and Admin API.
+
+Calls each tool through the MCP server, as a client would, with the API
+served by `benchmarks.fake_api`. For each tool, measures:
+
+  - `p50_ms` and `p99_ms`: The latency of calls made one at a time.
+  - `calls_per_s`: The throughput of `--concurrency` concurrent callers.
+  - `peak_kb`: The peak memory allocated by a burst of concurrent calls.
+  - `loop_lag_ms`: The longest the event loop was blocked while the
+    concurrent calls ran.
+
+Compares the results with the baseline in `benchmarks/baseline.json`, and
+reports each result that's worse than the baseline by more than the
+tolerance. Results vary between machines, so the comparison is advisory:
+pass `--strict` to exit with status 1 if there are regressions, against a
+baseline recorded on the same machine. Run with `nox -s bench`, or
+`python -m benchmarks.tool_bench`. Pass `--update-baseline` to record the
+results as the new baseline.
+"""
+
+import os
+
+# Caching would hide the cost of calling the API, so it's disabled. Must be
+# set before the server's modules are imported.
+os.environ.setdefault("ANALYTICS_MCP_REPORT_CACHE_MAX_BYTES", "0")
+# Hides gRPC's log of the fake API's connections closing at the end.
+os.environ.setdefault("GRPC_VERBOSITY", "ERROR")
+
+import argparse
+import asyncio
+import itertools
+import json
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from analytics_mcp import server  # noqa: F401
+from analytics_mcp.coordinator import mcp
+from analytics_mcp.tools.utils import close_api_clients
+from analytics_mcp.tools.reporting.results import result_store
+from benchmarks.fake_api import FakeAnalyticsApi, FakeApiSettings
+from benchmarks.fixtures import print_table
+
+BASELINE_PATH = pathlib.Path(__file__).with_name("baseline.json")
+
+# How often the event loop lag monitor wakes up.
+_LAG_INTERVAL_SECONDS = 0.005
+
+# For each result, whether larger values are better, and the absolute change
+# that's always tolerated because it's within the noise of a run.
+_CHECKS = {
+    "p50_ms": (False, 2.0),
+    "p99_ms": (False, 5.0),
+    "calls_per_s": (True, 5.0),
+    "peak_kb": (False, 256.0),
+    "loop_lag_ms": (False, 10.0),
+}
+
+_property_numbers = itertools.count(1)
+
+
+def _new_property_id() -> str:
+    """Returns a property ID that hasn't been used, so it isn't cached."""
+    return f"properties/{next(_property_numbers)}"
+
+
+def _report(limit: int, output_format: str) -> Callable[[], Dict[str, Any]]:
+    def arguments():
+        return {
+            "property_id": "properties/1",
+            "date_ranges": [{"start_date": "28daysAgo", "end_date": "today"}],
+            "dimensions": ["date", "country", "eventName"],
+            "metrics": ["activeUsers", "eventCount", "sessions"],
+            "limit": limit,
+            "output_format": output_format,
+        }
+
+    return arguments
+
+
+def _realtime_report() -> Dict[str, Any]:
+    return {
+        "property_id": "properties/1",
+        "dimensions": ["country", "unifiedScreenName"],
+        "metrics": ["activeUsers"],
+    }
+
+
+def _custom_dimensions_and_metrics() -> Dict[str, Any]:
+    return {"property_id": _new_property_id()}
+
+
+# The tool and the function that returns its arguments, for each scenario.
+SCENARIOS = {
+    "run_report 100 rows": ("run_report", _report(100, "verbose")),
+    "run_report 10k rows": ("run_report", _report(10_000, "compact")),
+    "run_realtime_report": ("run_realtime_report", _realtime_report),
+    "get_custom_dimensions_and_metrics": (
+        "get_custom_dimensions_and_metrics",
+        _custom_dimensions_and_metrics,
+    ),
+    "get_account_summaries": (
+        "get_account_summaries",
+        lambda: {"refresh": True},
+    ),
+}
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping task."""
+
+    def __init__(self) -> None:
+        self.max_lag_seconds = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(_LAG_INTERVAL_SECONDS)
+            lag = time.perf_counter() - start - _LAG_INTERVAL_SECONDS
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    def __enter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._task.cancel()
+
+
+async def _call(tool: str, arguments: Dict[str, Any]) -> bool:
+    """Calls a tool and returns whether it succeeded."""
+    try:
+        await mcp.call_tool(tool, arguments)
+        return True
+    except Exception:
+        return False
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+async def run_scenario(
+    tool: str,
+    arguments: Callable[[], Dict[str, Any]],
+    iterations: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Benchmarks a tool and returns its results."""
+    result_store.clear()
+    errors = 0
+    # Warms up the clients, the directory and the tool's imports.
+    for _ in range(3):
+        await _call(tool, arguments())
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        errors += not await _call(tool, arguments())
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    remaining = iterations
+
+    async def caller():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            errors += not await _call(tool, arguments())
+
+    with LoopLagMonitor() as lag_monitor:
+        start = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        await asyncio.gather(
+            *(_call(tool, arguments()) for _ in range(concurrency))
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "calls_per_s": round(iterations / elapsed, 1),
+        "peak_kb": round((peak - before) / 1024, 1),
+        "loop_lag_ms": round(lag_monitor.max_lag_seconds * 1000, 2),
+        "errors": errors,
+    }
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """Returns a description of each result that's worse than the baseline.
+
+    Args:
+        results: The results of each scenario.
+        baseline: The baseline results of each scenario.
+        tolerance: The tolerated relative change, such as 0.5 for 50%.
+    """
+    regressions = []
+    for scenario, values in results.items():
+        expected = baseline.get(scenario)
+        if expected is None:
+            continue
+        for name, (higher_is_better, slack) in _CHECKS.items():
+            value, limit = values[name], expected[name]
+            if higher_is_better:
+                regressed = value < limit / (1 + tolerance) - slack
+            else:
+                regressed = value > limit * (1 + tolerance) + slack
+            if regressed:
+                regressions.append(
+                    f"{scenario}: {name} is {value}, baseline is {limit}"
+                )
+    return regressions
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--report-rows", type=int, default=100_000)
+    parser.add_argument("--realtime-rows", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Runs only this scenario. Can be repeated.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="The tolerated relative regression, such as 0.5 for 50%%.",
+    )
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Writes the results to the baseline instead of comparing them.",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help=(
+            "Exits with status 1 if there are regressions, or if the results "
+            "can't be compared with the baseline."
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    settings = FakeApiSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        report_rows=args.report_rows,
+        realtime_rows=args.realtime_rows,
+        error_rate=args.error_rate,
+    )
+    run_settings = {
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "fake_api": settings.to_dict(),
+    }
+    fake_api = FakeAnalyticsApi(settings)
+    fake_api.start()
+    fake_api.install_clients()
+    try:
+        results = {}
+        for scenario in args.scenario or SCENARIOS:
+            tool, arguments = SCENARIOS[scenario]
+            results[scenario] = await run_scenario(
+                tool, arguments, args.iterations, args.concurrency
+            )
+    finally:
+        await close_api_clients()
+        fake_api.stop()
+    print_table(
+        f"Tools against a fake API with {args.latency_ms:g} ms latency "
+        f"({args.iterations} calls, {args.concurrency} concurrent callers)",
+        results,
+    )
+
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps({"settings": run_settings, "results": results}, indent=2)
+            + "\n"
+        )
+        print(f"\nWrote the baseline to {args.baseline}.")
+        return 0
+
+    failed = 1 if args.strict else 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}. Run with --update-baseline.")
+        return failed
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["settings"] != run_settings:
+        print(
+            "\nThe baseline was recorded with different settings, so the "
+            "results can't be compared:\n"
+            f"  baseline: {json.dumps(baseline['settings'])}\n"
+            f"  this run: {json.dumps(run_settings)}"
+        )
+        return failed
+    regressions = find_regressions(results, baseline["results"], args.tolerance)
+    if not args.error_rate:
+        regressions.extend(
+            f"{scenario}: {values['errors']} calls failed"
+            for scenario, values in results.items()
+            if values["errors"]
+        )
+    if regressions:
+        print(f"\n{len(regressions)} regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if not args.strict:
+            print(
+                "\nThe baseline may have been recorded on a different "
+                "machine. Record one on this machine with --update-baseline "
+                "before making changes, and compare with --strict."
+            )
+        return failed
+    print("\nNo regressions.")
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    return asyncio.run(
+        _run(_parse_args(sys.argv[1:] if argv is None else argv))
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
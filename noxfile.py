@@ -85,3 +85,15 @@ def tests(session):
     session.run(
         *TEST_COMMAND,
     )
+
+
+@nox.session
+def bench(session):
+    """Benchmarks the tools against a fake API and reports regressions.
+
+    Pass `-- --update-baseline` to record the results as the new baseline,
+    and `-- --strict` to fail on regressions.
+    """
+    session.install(".")
+    session.run(*FREEZE_COMMAND)
+    session.run("python", "-m", "benchmarks.tool_bench", *session.posargs)
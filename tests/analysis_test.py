@@ -0,0 +1,190 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the analysis and results modules."""
+
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import analysis, results
+from google.analytics import data_v1beta
+
+_ROWS = [
+    ("France", "desktop", 10, 2, 0.5),
+    ("France", "mobile", 30, 3, 0.25),
+    ("Peru", "desktop", 5, 0, 1.0),
+    ("Peru", "mobile", 15, 5, ""),
+]
+
+
+def _response():
+    return data_v1beta.RunReportResponse(
+        dimension_headers=[{"name": "country"}, {"name": "deviceCategory"}],
+        metric_headers=[
+            {"name": "sessions", "type_": "TYPE_INTEGER"},
+            {"name": "keyEvents", "type_": "TYPE_INTEGER"},
+            {"name": "bounceRate", "type_": "TYPE_FLOAT"},
+        ],
+        rows=[
+            {
+                "dimension_values": [{"value": country}, {"value": device}],
+                "metric_values": [
+                    {"value": str(value)} for value in (sessions, events, rate)
+                ],
+            }
+            for country, device, sessions, events, rate in _ROWS
+        ],
+        row_count=len(_ROWS),
+    )
+
+
+class TestAnalysis(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the analyze_result tool."""
+
+    def setUp(self):
+        self.store = results.ResultStore(max_bytes=1_000_000, ttl_seconds=60)
+        patcher = mock.patch.object(analysis, "result_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handle = self.store.put(
+            results.ResultTable.from_response(_response())
+        )
+
+    async def test_groups_additive_metrics_and_derives_ratios(self):
+        """Tests grouping additive metrics and computing a ratio of sums."""
+        result = await analysis.analyze_result(
+            self.handle,
+            metrics=["sessions", "keyEvents"],
+            group_by_dimensions=["country"],
+            derived_metrics=[
+                {"name": "keyEventRate", "expression": "keyEvents / sessions"}
+            ],
+        )
+        self.assertEqual(
+            result["headers"],
+            ["country", "sessions", "keyEvents", "keyEventRate"],
+        )
+        self.assertEqual(
+            result["columns"],
+            [["France", "Peru"], [40, 20], [5, 5], [0.125, 0.25]],
+        )
+        # The new result can be analyzed further, but its derived ratio can't
+        # be summed.
+        with self.assertRaisesRegex(ValueError, "Can't sum keyEventRate"):
+            await analysis.analyze_result(
+                result["result_handle"], group_by_dimensions=[]
+            )
+        total = await analysis.analyze_result(
+            result["result_handle"],
+            metrics=["sessions", "keyEvents"],
+            group_by_dimensions=[],
+        )
+        self.assertEqual(total["columns"], [[60], [10]])
+
+    async def test_refuses_to_sum_ratios(self):
+        """Tests that non-additive metrics aren't summed across rows."""
+        with self.assertRaisesRegex(ValueError, "Can't sum bounceRate"):
+            await analysis.analyze_result(
+                self.handle, group_by_dimensions=["country"]
+            )
+        # Grouping by every dimension doesn't combine rows, so it's allowed.
+        result = await analysis.analyze_result(
+            self.handle, group_by_dimensions=["deviceCategory", "country"]
+        )
+        self.assertEqual(result["columns"][4], [0.5, 0.25, 1.0, None])
+
+    async def test_filters_and_returns_top_rows(self):
+        """Tests a filter followed by a top-N."""
+        result = await analysis.analyze_result(
+            self.handle,
+            conditions=[
+                {"field": "deviceCategory", "operator": "==", "value": "mobile"}
+            ],
+            order_bys=[{"field": "bounceRate", "desc": True}],
+            limit=1,
+        )
+        self.assertEqual(result["columns"][:2], [["France"], ["mobile"]])
+        self.assertEqual(result["row_count"], 1)
+
+    async def test_pivots_dimension_values_into_columns(self):
+        """Tests a pivot of an additive metric."""
+        result = await analysis.analyze_result(
+            self.handle,
+            pivot_dimension="deviceCategory",
+            pivot_metric="sessions",
+        )
+        self.assertEqual(
+            result["headers"],
+            ["country", "sessions[mobile]", "sessions[desktop]"],
+        )
+        self.assertEqual(
+            result["columns"], [["France", "Peru"], [30, 15], [10, 5]]
+        )
+
+    async def test_keeps_large_integers_exact(self):
+        """Tests that integer metrics above 2**53 aren't rounded."""
+        response = _response()
+        large = 2**53 + 1
+        response.rows[0].metric_values[0].value = str(large)
+        response.rows[1].metric_values[0].value = str(large)
+        handle = self.store.put(results.ResultTable.from_response(response))
+
+        result = await analysis.analyze_result(
+            handle,
+            conditions=[
+                {"field": "sessions", "operator": "==", "value": large}
+            ],
+            metrics=["sessions"],
+            group_by_dimensions=["country"],
+        )
+        self.assertEqual(result["columns"], [["France"], [2 * large]])
+
+    async def test_warns_about_truncated_results(self):
+        """Tests that a result with only some of the report's rows warns."""
+        self.assertNotIn("warning", await analysis.analyze_result(self.handle))
+        response = _response()
+        response.row_count = 100
+        handle = self.store.put(results.ResultTable.from_response(response))
+
+        result = await analysis.analyze_result(handle, limit=1)
+        self.assertIn("100 rows", result["warning"])
+        result = await analysis.analyze_result(result["result_handle"])
+        self.assertIn("100 rows", result["warning"])
+
+
+class TestResultStore(unittest.TestCase):
+    """Test cases for the ResultStore class."""
+
+    def test_evicts_least_recently_used_results(self):
+        """Tests that the store stays within its memory budget."""
+        table = results.ResultTable.from_response(_response())
+        store = results.ResultStore(
+            max_bytes=table.nbytes() * 2, ttl_seconds=60
+        )
+        first = store.put(table)
+        second = store.put(table)
+        store.get(first)
+        store.put(table)
+        store.get(first)
+        with self.assertRaises(results.UnknownResultError):
+            store.get(second)
+        self.assertEqual(store.stats()["evictions"], 1)
+
+    def test_expires_results(self):
+        """Tests that results expire after their TTL."""
+        store = results.ResultStore(max_bytes=1_000_000, ttl_seconds=0)
+        handle = store.put(results.ResultTable.from_response(_response()))
+        with self.assertRaises(results.UnknownResultError):
+            store.get(handle)
+        self.assertEqual(store.stats()["expirations"], 1)
@@ -0,0 +1,186 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the cache module."""
+
+import datetime
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import cache
+from google.analytics import data_v1beta
+
+_TODAY = datetime.date(2025, 6, 15)
+
+
+def _request(date_range, dimension_filter=None):
+    request = data_v1beta.RunReportRequest(
+        property="properties/1",
+        dimensions=[data_v1beta.Dimension(name="eventName")],
+        metrics=[data_v1beta.Metric(name="eventCount")],
+        date_ranges=[data_v1beta.DateRange(date_range)],
+    )
+    if dimension_filter:
+        request.dimension_filter = data_v1beta.FilterExpression(
+            dimension_filter
+        )
+    return request
+
+
+def _in_list(values):
+    return {
+        "filter": {
+            "field_name": "eventName",
+            "in_list_filter": {"values": values},
+        }
+    }
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the ResponseCache class."""
+
+    def test_evicts_least_recently_used_by_size(self):
+        """Tests that the cache stays within its byte budget."""
+        response_cache = cache.ResponseCache(max_bytes=10)
+        response_cache.put(b"a", b"1234", 60)
+        response_cache.put(b"b", b"1234", 60)
+        # Makes "b" the least recently used entry.
+        self.assertEqual(response_cache.get(b"a"), b"1234")
+        response_cache.put(b"c", b"1234", 60)
+
+        self.assertIsNone(response_cache.get(b"b"))
+        self.assertEqual(response_cache.get(b"c"), b"1234")
+        stats = response_cache.stats()
+        self.assertEqual(stats["bytes"], 8)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_skips_values_larger_than_budget(self):
+        """Tests that a value larger than the cache isn't stored."""
+        response_cache = cache.ResponseCache(max_bytes=3)
+        response_cache.put(b"a", b"1234", 60)
+        self.assertIsNone(response_cache.get(b"a"))
+
+    def test_expiry(self):
+        """Tests that entries expire after their TTL."""
+        response_cache = cache.ResponseCache(max_bytes=10)
+        with mock.patch.object(cache.time, "monotonic", return_value=100.0):
+            response_cache.put(b"a", b"1", 5)
+        with mock.patch.object(cache.time, "monotonic", return_value=104.0):
+            self.assertEqual(response_cache.get(b"a"), b"1")
+        with mock.patch.object(cache.time, "monotonic", return_value=105.0):
+            self.assertIsNone(response_cache.get(b"a"))
+        self.assertEqual(response_cache.stats()["expirations"], 1)
+
+
+class TestCanonicalRequestKey(unittest.TestCase):
+    """Test cases for canonical_request_key."""
+
+    def test_relative_dates_match_absolute_dates(self):
+        """Tests that relative dates are resolved using today's date."""
+        relative = _request(
+            {"start_date": "30daysAgo", "end_date": "yesterday"}
+        )
+        absolute = _request(
+            {"start_date": "2025-05-16", "end_date": "2025-06-14"}
+        )
+        self.assertEqual(
+            cache.canonical_request_key(relative, _TODAY),
+            cache.canonical_request_key(absolute, _TODAY),
+        )
+        self.assertNotEqual(
+            cache.canonical_request_key(relative, _TODAY),
+            cache.canonical_request_key(
+                relative, _TODAY + datetime.timedelta(days=1)
+            ),
+        )
+
+    def test_filter_operand_order_is_ignored(self):
+        """Tests that AND operands and IN list values are normalized."""
+        date_range = {"start_date": "today", "end_date": "today"}
+        first = _request(
+            date_range,
+            {
+                "and_group": {
+                    "expressions": [_in_list(["b", "a"]), _in_list(["c"])]
+                }
+            },
+        )
+        second = _request(
+            date_range,
+            {
+                "and_group": {
+                    "expressions": [_in_list(["c"]), _in_list(["a", "b"])]
+                }
+            },
+        )
+        self.assertEqual(
+            cache.canonical_request_key(first, _TODAY),
+            cache.canonical_request_key(second, _TODAY),
+        )
+        self.assertEqual(
+            list(
+                first.dimension_filter.and_group.expressions[
+                    0
+                ].filter.in_list_filter.values
+            ),
+            ["b", "a"],
+            "The original request must not be modified",
+        )
+
+    def test_is_historical(self):
+        """Tests that ranges ending before today are historical."""
+        self.assertTrue(
+            cache.is_historical(
+                _request({"start_date": "7daysAgo", "end_date": "yesterday"}),
+                _TODAY,
+            )
+        )
+        self.assertFalse(
+            cache.is_historical(
+                _request({"start_date": "7daysAgo", "end_date": "today"}),
+                _TODAY,
+            )
+        )
+
+
+class TestCachedRunReport(unittest.IsolatedAsyncioTestCase):
+    """Test cases for cached_run_report."""
+
+    async def test_second_call_is_served_from_cache(self):
+        """Tests that an equivalent request doesn't call the API again."""
+        run = mock.AsyncMock(
+            return_value=data_v1beta.RunReportResponse(row_count=3)
+        )
+        with (
+            mock.patch.object(
+                cache, "property_today", mock.AsyncMock(return_value=_TODAY)
+            ),
+            mock.patch.object(cache, "report_cache", cache.ResponseCache(1000)),
+        ):
+            first = await cache.cached_run_report(
+                _request({"start_date": "yesterday", "end_date": "yesterday"}),
+                run,
+            )
+            second = await cache.cached_run_report(
+                _request(
+                    {"start_date": "2025-06-14", "end_date": "2025-06-14"}
+                ),
+                run,
+            )
+
+        run.assert_awaited_once()
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the calls module."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools import calls
+from google.api_core import exceptions
+
+
+def _caller(**kwargs):
+    return calls.ApiCaller(
+        max_attempts=kwargs.pop("max_attempts", 3),
+        initial_backoff_seconds=0.001,
+        max_backoff_seconds=0.01,
+        **kwargs,
+    )
+
+
+class TestApiCaller(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ApiCaller class."""
+
+    async def test_retries_retryable_errors(self):
+        """Tests that UNAVAILABLE and RESOURCE_EXHAUSTED are retried."""
+        caller = _caller()
+        call = mock.AsyncMock(
+            side_effect=[
+                exceptions.ServiceUnavailable("unavailable"),
+                exceptions.ResourceExhausted("exhausted"),
+                "response",
+            ]
+        )
+        self.assertEqual(await caller.call("run_report", call), "response")
+        self.assertEqual(call.await_count, 3)
+        self.assertEqual(caller.stats()["retries"], 2)
+
+    async def test_gives_up_after_max_attempts(self):
+        """Tests that the last error is raised once attempts run out."""
+        caller = _caller(max_attempts=2)
+        call = mock.AsyncMock(
+            side_effect=exceptions.ServiceUnavailable("unavailable")
+        )
+        with self.assertRaises(exceptions.ServiceUnavailable):
+            await caller.call("run_report", call)
+        self.assertEqual(call.await_count, 2)
+        self.assertEqual(caller.stats()["failures"], 1)
+
+    async def test_does_not_retry_other_errors(self):
+        """Tests that errors such as INVALID_ARGUMENT are raised at once."""
+        caller = _caller()
+        call = mock.AsyncMock(side_effect=exceptions.InvalidArgument("bad"))
+        with self.assertRaises(exceptions.InvalidArgument):
+            await caller.call("run_report", call)
+        call.assert_awaited_once()
+
+    async def test_passes_remaining_time_as_timeout(self):
+        """Tests that calls receive the time left before the deadline."""
+        caller = _caller()
+        call = mock.AsyncMock(return_value="response")
+        await caller.call("run_report", call)
+        call.assert_awaited_once_with(None)
+
+        with calls.deadline(10):
+            with calls.deadline(30):
+                await caller.call("run_report", call)
+        timeout = call.await_args.args[0]
+        self.assertGreater(timeout, 9)
+        self.assertLessEqual(timeout, 10)
+
+    async def test_tool_deadline(self):
+        """Tests that a tool that runs past its deadline is stopped."""
+
+        @calls.with_deadline(0.01)
+        async def slow_tool():
+            """Sleeps."""
+            await asyncio.sleep(1)
+
+        self.assertEqual(slow_tool.__doc__, "Sleeps.")
+        with self.assertRaisesRegex(TimeoutError, "slow_tool"):
+            await slow_tool()
+
+    async def test_hedges_slow_calls(self):
+        """Tests that a call slower than the p95 latency is sent again."""
+        caller = _caller(hedging=True, hedge_min_samples=5)
+        fast = mock.AsyncMock(return_value="fast")
+        for _ in range(5):
+            await caller.call("get_metadata", fast)
+
+        delays = iter([1, 0])
+
+        async def sometimes_slow(timeout):
+            await asyncio.sleep(next(delays))
+            return "response"
+
+        self.assertEqual(
+            await asyncio.wait_for(
+                caller.call("get_metadata", sometimes_slow), 0.5
+            ),
+            "response",
+        )
+        stats = caller.stats()
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["hedge_wins"], 1)
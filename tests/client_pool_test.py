@@ -0,0 +1,138 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the client_pool module."""
+
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.client_pool import ClientPool
+
+
+def _fake_client():
+    """Returns a fake client whose transport can be closed."""
+    client = mock.Mock()
+    client.transport.close = mock.AsyncMock()
+    return client
+
+
+class TestClientPool(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ClientPool class."""
+
+    async def test_reuses_clients_once_full(self):
+        """Tests that the pool creates `size` clients, then reuses them."""
+        pool = ClientPool("test", _fake_client, size=2)
+        clients = [pool.get() for _ in range(5)]
+
+        self.assertEqual(len({id(client) for client in clients}), 2)
+        self.assertIs(clients[2], clients[0])
+        self.assertIs(clients[3], clients[1])
+        self.assertEqual(pool.stats()["created"], 2)
+        self.assertEqual(pool.stats()["reused"], 3)
+
+    async def test_concurrent_tasks_share_clients(self):
+        """Tests that concurrent tasks don't create more than `size` clients."""
+        factory = mock.Mock(side_effect=_fake_client)
+        pool = ClientPool("test", factory, size=3)
+
+        async def use_client():
+            await asyncio.sleep(0)
+            return pool.get()
+
+        await asyncio.gather(*(use_client() for _ in range(50)))
+        self.assertEqual(factory.call_count, 3)
+
+    def test_creates_clients_outside_the_lock(self):
+        """Tests that a slow factory doesn't block callers reusing clients."""
+        created = threading.Event()
+        release = threading.Event()
+        clients = []
+
+        def factory():
+            if clients:
+                created.set()
+                release.wait(5)
+            clients.append(_fake_client())
+            return clients[-1]
+
+        pool = ClientPool("test", factory, size=2)
+        first = pool.get()
+        thread = threading.Thread(target=pool.get)
+        thread.start()
+        self.assertTrue(created.wait(5))
+
+        # Reuses the first client while the second is being created.
+        self.assertIs(pool.get(), first)
+        self.assertEqual(pool.stats()["open_clients"], 1)
+        release.set()
+        thread.join()
+        self.assertEqual(pool.stats()["open_clients"], 2)
+
+    async def test_close(self):
+        """Tests that close closes every client and the pool can be reused."""
+        pool = ClientPool("test", _fake_client, size=2)
+        first = pool.get()
+        second = pool.get()
+
+        await pool.close()
+
+        first.transport.close.assert_awaited_once()
+        second.transport.close.assert_awaited_once()
+        self.assertEqual(pool.stats()["open_clients"], 0)
+        self.assertIsNot(pool.get(), first)
+
+    def test_invalid_size(self):
+        """Tests that a non-positive size raises a ValueError."""
+        with self.assertRaises(ValueError):
+            ClientPool("test", _fake_client, size=0)
+
+    def test_discards_clients_from_another_event_loop(self):
+        """Tests that clients created on another event loop aren't reused."""
+        pool = ClientPool("test", _fake_client, size=1)
+
+        async def get_client():
+            return pool.get()
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+        self.assertIsNot(first, second)
+        first.transport.close.assert_awaited_once()
+        second.transport.close.assert_not_awaited()
+
+    def test_closes_clients_on_their_running_event_loop(self):
+        """Tests that discarded clients are closed on their own event loop."""
+        pool = ClientPool("test", _fake_client, size=1)
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever)
+        thread.start()
+        self.addCleanup(other_loop.close)
+        self.addCleanup(thread.join)
+        self.addCleanup(other_loop.call_soon_threadsafe, other_loop.stop)
+
+        async def get_client():
+            return pool.get()
+
+        first = asyncio.run_coroutine_threadsafe(
+            get_client(), other_loop
+        ).result()
+        closed_on = []
+        first.transport.close.side_effect = lambda: closed_on.append(
+            asyncio.get_running_loop()
+        )
+
+        asyncio.run(get_client())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), other_loop).result()
+        self.assertEqual(closed_on, [other_loop])
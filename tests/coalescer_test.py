@@ -0,0 +1,160 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the coalescer module."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting.coalescer import ReportCoalescer
+from google.analytics import data_v1beta
+from google.api_core import exceptions
+
+
+def _request(property_rn, limit):
+    return data_v1beta.RunReportRequest(property=property_rn, limit=limit)
+
+
+def _response_for(request):
+    """Returns a response that identifies the request it answers."""
+    return data_v1beta.RunReportResponse(row_count=request.limit)
+
+
+async def _run_batch(batch_request):
+    return data_v1beta.BatchRunReportsResponse(
+        reports=[_response_for(request) for request in batch_request.requests]
+    )
+
+
+class TestReportCoalescer(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the ReportCoalescer class."""
+
+    def setUp(self):
+        self.run_report = mock.AsyncMock(side_effect=_response_for)
+        self.run_batch = mock.AsyncMock(side_effect=_run_batch)
+
+    async def test_concurrent_reports_share_batches(self):
+        """Tests that reports are batched per property and sliced per caller."""
+        coalescer = ReportCoalescer(
+            self.run_report, self.run_batch, window_seconds=0.01
+        )
+
+        responses = await asyncio.gather(
+            *(
+                coalescer.run_report(_request("properties/1", limit))
+                for limit in range(1, 8)
+            ),
+            coalescer.run_report(_request("properties/2", 100)),
+        )
+
+        self.assertEqual(
+            [response.row_count for response in responses],
+            [1, 2, 3, 4, 5, 6, 7, 100],
+        )
+        # 7 reports for property 1 fill one batch of 5 and one batch of 2.
+        self.assertEqual(self.run_batch.await_count, 2)
+        # The only report for property 2 runs on its own.
+        self.run_report.assert_awaited_once()
+        self.assertEqual(
+            coalescer.stats(),
+            {
+                "reports": 8,
+                "batch_calls": 2,
+                "single_calls": 1,
+                "split_batches": 0,
+            },
+        )
+
+    async def test_errors_reach_every_caller(self):
+        """Tests that a failed batch fails every report in it."""
+        self.run_batch.side_effect = RuntimeError("failed")
+        coalescer = ReportCoalescer(
+            self.run_report, self.run_batch, window_seconds=0.01
+        )
+
+        results = await asyncio.gather(
+            coalescer.run_report(_request("properties/1", 1)),
+            coalescer.run_report(_request("properties/1", 2)),
+            return_exceptions=True,
+        )
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+    async def test_invalid_report_only_fails_its_caller(self):
+        """Tests that a batch rejected as invalid runs each report alone."""
+
+        def run_report(request):
+            if request.limit == 2:
+                raise exceptions.InvalidArgument("Invalid field.")
+            return _response_for(request)
+
+        self.run_report.side_effect = run_report
+        self.run_batch.side_effect = exceptions.InvalidArgument(
+            "Invalid field."
+        )
+        coalescer = ReportCoalescer(
+            self.run_report, self.run_batch, window_seconds=0.01
+        )
+
+        results = await asyncio.gather(
+            *(
+                coalescer.run_report(_request("properties/1", limit))
+                for limit in (1, 2, 3)
+            ),
+            return_exceptions=True,
+        )
+
+        self.assertEqual(results[0].row_count, 1)
+        self.assertIsInstance(results[1], exceptions.InvalidArgument)
+        self.assertEqual(results[2].row_count, 3)
+        self.run_batch.assert_awaited_once()
+        self.assertEqual(self.run_report.await_count, 3)
+        self.assertEqual(coalescer.stats()["split_batches"], 1)
+
+    async def test_cancelled_report_is_dropped(self):
+        """Tests that a report cancelled before its batch is sent is dropped."""
+        coalescer = ReportCoalescer(
+            self.run_report, self.run_batch, window_seconds=0.01
+        )
+
+        cancelled = asyncio.create_task(
+            coalescer.run_report(_request("properties/1", 1))
+        )
+        kept = asyncio.create_task(
+            coalescer.run_report(_request("properties/1", 2))
+        )
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        self.assertEqual((await kept).row_count, 2)
+        self.run_report.assert_awaited_once()
+        self.run_batch.assert_not_awaited()
+
+    async def test_cancelling_every_report_stops_the_window(self):
+        """Tests that a window without reports doesn't keep its timer."""
+        coalescer = ReportCoalescer(
+            self.run_report, self.run_batch, window_seconds=60
+        )
+
+        cancelled = asyncio.create_task(
+            coalescer.run_report(_request("properties/1", 1))
+        )
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+
+        self.assertEqual(coalescer._timers, {})
+        self.assertEqual(coalescer._pending, {})
+        self.run_report.assert_not_awaited()
@@ -0,0 +1,138 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the credentials module."""
+
+import asyncio
+import datetime
+import threading
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.credentials import CredentialsManager
+
+
+class _FakeCredentials:
+    """Fake credentials whose refresh blocks until released."""
+
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+        self.refresh_calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def refresh(self, request):
+        self.refresh_calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("refresh failed")
+        self.token = f"token-{self.refresh_calls}"
+        self.expiry = datetime.datetime.now(datetime.timezone.utc).replace(
+            tzinfo=None
+        ) + datetime.timedelta(hours=1)
+
+
+def _manager(credentials):
+    loader = mock.Mock(return_value=(credentials, "project"))
+    manager = CredentialsManager(
+        scopes=["scope"],
+        refresh_margin_seconds=300,
+        loader=loader,
+        request_factory=mock.Mock,
+    )
+    return manager, loader
+
+
+class TestCredentialsManager(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the CredentialsManager class."""
+
+    async def test_resolves_credentials_once(self):
+        """Tests that credentials are only loaded on the first call to get."""
+        credentials = _FakeCredentials()
+        manager, loader = _manager(credentials)
+
+        self.assertIs(manager.get(), credentials)
+        self.assertIs(manager.get(), credentials)
+        loader.assert_called_once_with(scopes=["scope"])
+
+    async def test_resolves_credentials_in_a_worker_thread(self):
+        """Tests that resolve loads the credentials off the event loop."""
+        credentials = _FakeCredentials()
+        manager, loader = _manager(credentials)
+        threads = []
+        loader.side_effect = lambda scopes: (
+            threads.append(threading.current_thread())
+            or (credentials, "project")
+        )
+
+        self.assertIs(await manager.resolve(), credentials)
+        self.assertIs(await manager.resolve(), credentials)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    async def test_concurrent_refreshes_collapse(self):
+        """Tests that concurrent refreshes share a single refresh call."""
+        credentials = _FakeCredentials()
+        credentials.release.clear()
+        manager, _ = _manager(credentials)
+
+        refreshes = [asyncio.create_task(manager.refresh()) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        credentials.release.set()
+        await asyncio.gather(*refreshes)
+
+        self.assertEqual(credentials.refresh_calls, 1)
+        self.assertEqual(manager.stats()["refreshes"], 1)
+        self.assertEqual(manager.stats()["collapsed_refreshes"], 4)
+
+    async def test_refresh_does_not_block_event_loop(self):
+        """Tests that a slow refresh lets other tasks run."""
+        credentials = _FakeCredentials()
+        credentials.release.clear()
+        manager, _ = _manager(credentials)
+
+        refresh = asyncio.create_task(manager.refresh())
+        # Completes while the refresh is still blocked in its worker thread.
+        await asyncio.wait_for(asyncio.sleep(0.01), timeout=1)
+        self.assertFalse(refresh.done())
+        credentials.release.set()
+        await refresh
+
+    async def test_refresh_failure_is_counted(self):
+        """Tests that failed refreshes raise and are counted."""
+        credentials = _FakeCredentials()
+        credentials.fail = True
+        manager, _ = _manager(credentials)
+
+        with self.assertRaises(RuntimeError):
+            await manager.refresh()
+        self.assertEqual(manager.stats()["refresh_failures"], 1)
+
+    async def test_background_refresh(self):
+        """Tests that the background task fetches a token and can be stopped."""
+        credentials = _FakeCredentials()
+        manager, _ = _manager(credentials)
+
+        manager.start_background_refresh()
+        for _ in range(100):
+            if credentials.token:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(credentials.token, "token-1")
+        self.assertTrue(manager.stats()["background_refresh_running"])
+
+        await manager.stop()
+        self.assertFalse(manager.stats()["background_refresh_running"])
@@ -0,0 +1,137 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the directory module."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools import utils
+from analytics_mcp.tools.admin import directory
+
+
+def _summary(account_id, display_name, properties):
+    return {
+        "name": f"accountSummaries/{account_id}",
+        "account": f"accounts/{account_id}",
+        "display_name": display_name,
+        "property_summaries": [
+            {
+                "property": f"properties/{property_id}",
+                "display_name": property_name,
+                "property_type": "PROPERTY_TYPE_ORDINARY",
+                "parent": f"accounts/{account_id}",
+            }
+            for property_id, property_name in properties
+        ],
+    }
+
+
+_SUMMARIES = [
+    _summary(
+        1,
+        "Shop",
+        [(11, "Café Store – Web"), (12, "Café Store App"), (13, "Blog")],
+    ),
+    _summary(2, "Agency", [(21, "Blog"), (22, "Client Portal")]),
+]
+
+
+class TestDirectory(unittest.TestCase):
+    """Test cases for the Directory class."""
+
+    def setUp(self):
+        self.directory = directory.Directory(_SUMMARIES)
+
+    def test_indexes_by_id_and_account(self):
+        """Tests lookups by property ID and by parent account."""
+        self.assertEqual(
+            self.directory.properties["22"]["account"], "accounts/2"
+        )
+        self.assertEqual(
+            [
+                p["id"]
+                for p in self.directory.properties_of_account("accounts/1")
+            ],
+            ["11", "12", "13"],
+        )
+        self.assertEqual(self.directory.accounts["2"]["display_name"], "Agency")
+
+    def test_finds_exact_prefix_and_fuzzy_matches(self):
+        """Tests that name matching ignores case, accents and punctuation."""
+        matches = self.directory.find_properties("cafe store")
+        self.assertEqual(
+            [(kind, entry["id"]) for kind, entry in matches],
+            [(directory.PREFIX, "12"), (directory.PREFIX, "11")],
+        )
+        matches = self.directory.find_properties("CAFÉ STORE - WEB")
+        self.assertEqual(matches[0], (directory.EXACT, matches[0][1]))
+        self.assertEqual(matches[0][1]["id"], "11")
+        matches = self.directory.find_properties("client portl")
+        self.assertEqual(
+            [(kind, entry["id"]) for kind, entry in matches],
+            [(directory.FUZZY, "22")],
+        )
+
+    def test_resolves_unique_names_only(self):
+        """Tests that ambiguous and unknown names aren't resolved."""
+        self.assertEqual(
+            self.directory.resolve_property("client portal"), "properties/22"
+        )
+        with self.assertRaisesRegex(ValueError, "More than one property"):
+            self.directory.resolve_property("Blog")
+        with self.assertRaisesRegex(ValueError, "Client Portal"):
+            self.directory.resolve_property("Client Portl")
+
+
+class TestPropertyDirectory(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the PropertyDirectory class."""
+
+    def setUp(self):
+        self.list_summaries = mock.AsyncMock(return_value=_SUMMARIES)
+        self.property_directory = directory.PropertyDirectory(
+            refresh_seconds=3600, list_summaries=self.list_summaries
+        )
+
+    async def asyncTearDown(self):
+        await self.property_directory.stop()
+
+    async def test_loads_once(self):
+        """Tests that concurrent and later lookups share a single load."""
+        results = await asyncio.gather(
+            *(self.property_directory.get() for _ in range(5))
+        )
+        await self.property_directory.get()
+        self.assertTrue(all(result is results[0] for result in results))
+        self.list_summaries.assert_awaited_once()
+        self.assertEqual(self.property_directory.stats()["properties"], 5)
+
+    async def test_tools_accept_display_names(self):
+        """Tests that construct_property_rn resolves names once loaded."""
+
+        @directory.accepts_property_names
+        async def tool(property_id):
+            return utils.construct_property_rn(property_id)
+
+        with mock.patch.object(
+            directory, "property_directory", self.property_directory
+        ):
+            with self.assertRaisesRegex(ValueError, "search_properties"):
+                utils.construct_property_rn("Client Portal")
+            self.assertEqual(await tool("42"), "properties/42")
+            self.list_summaries.assert_not_awaited()
+            self.assertEqual(
+                await tool(property_id="client portal"), "properties/22"
+            )
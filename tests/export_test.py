@@ -0,0 +1,158 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the export module."""
+
+import asyncio
+import hashlib
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import export
+from google.analytics import data_v1beta
+from tests import fakes
+
+
+class _FakeReport(fakes.FakeReport):
+    """Serves pages of a report whose row values are the row numbers."""
+
+    def __init__(self, row_count):
+        super().__init__()
+        self.row_count = row_count
+
+    @property
+    def pages(self):
+        return [(request.offset, request.limit) for request in self.requests]
+
+    def report_rows(self, request):
+        return [
+            ((f"/page,{row}",), (str(row),)) for row in range(self.row_count)
+        ]
+
+
+def _request():
+    return data_v1beta.RunReportRequest(
+        property="properties/1",
+        dimensions=[{"name": "pagePath"}],
+        metrics=[{"name": "screenPageViews"}],
+    )
+
+
+class TestExport(unittest.IsolatedAsyncioTestCase):
+    """Test cases for iter_report_pages and export_pages."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = pathlib.Path(directory.name)
+
+    async def _export(self, report, file_format, max_rows=1000):
+        pages = export.iter_report_pages(
+            report.run_page,
+            _request(),
+            page_size=4,
+            max_rows=max_rows,
+        )
+        return await export.export_pages(
+            pages, self.directory / f"report.{file_format}", file_format
+        )
+
+    async def test_writes_ndjson_page_by_page(self):
+        """Tests that every page is fetched once and written in order."""
+        report = _FakeReport(row_count=10)
+        result = await self._export(report, export.NDJSON)
+
+        self.assertEqual(report.pages, [(0, 4), (4, 4), (8, 2)])
+        data = pathlib.Path(result["path"]).read_bytes()
+        lines = [json.loads(line) for line in data.decode().splitlines()]
+        self.assertEqual(
+            lines[9], {"pagePath": "/page,9", "screenPageViews": 9}
+        )
+        self.assertEqual(result["row_count"], 10)
+        self.assertEqual(result["bytes"], len(data))
+        self.assertEqual(result["sha256"], hashlib.sha256(data).hexdigest())
+        self.assertEqual(
+            list(self.directory.iterdir()), [self.directory / "report.ndjson"]
+        )
+
+    async def test_writes_csv_up_to_max_rows(self):
+        """Tests the CSV format and the max_rows limit."""
+        report = _FakeReport(row_count=10)
+        result = await self._export(report, export.CSV, max_rows=5)
+
+        self.assertEqual(report.pages, [(0, 4), (4, 1)])
+        self.assertEqual(
+            pathlib.Path(result["path"]).read_text().splitlines()[:3],
+            ["pagePath,screenPageViews", '"/page,0",0', '"/page,1",1'],
+        )
+        self.assertEqual(
+            (result["row_count"], result["total_row_count"]), (5, 10)
+        )
+
+    async def test_failed_export_leaves_no_file(self):
+        """Tests that a failure removes the partial file."""
+        report = _FakeReport(row_count=10)
+        run_page = report.run_page
+
+        async def fail_second_page(request):
+            if request.offset:
+                raise RuntimeError("Server error")
+            return await run_page(request)
+
+        report.run_page = fail_second_page
+        with self.assertRaisesRegex(RuntimeError, "Server error"):
+            await self._export(report, export.NDJSON)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    async def test_failed_write_stops_fetching(self):
+        """Tests that a failed write cancels the page fetched ahead."""
+        report = _FakeReport(row_count=10)
+        run_page = report.run_page
+        cancelled = asyncio.Event()
+
+        async def block_second_page(request):
+            if request.offset:
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            return await run_page(request)
+
+        pages = export.iter_report_pages(
+            block_second_page,
+            _request(),
+            page_size=4,
+        )
+        with mock.patch.object(
+            export._NdjsonWriter,
+            "write_page",
+            side_effect=OSError("No space left on device"),
+        ):
+            with self.assertRaisesRegex(OSError, "No space left"):
+                await export.export_pages(
+                    pages, self.directory / "report.ndjson", export.NDJSON
+                )
+        # The pages were closed, rather than left waiting for the next page.
+        self.assertIsNone(pages.ag_frame)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_rejects_directories_in_file_names(self):
+        """Tests that exports can't be written outside the export directory."""
+        with self.assertRaisesRegex(ValueError, "Invalid file_name"):
+            export._export_path("../report.csv", export.CSV)
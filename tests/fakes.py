@@ -0,0 +1,166 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fake Data API responses and reports shared by the test cases."""
+
+import abc
+import asyncio
+import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+from google.analytics import data_v1beta
+
+
+def make_report_response(row_count: int) -> data_v1beta.RunReportResponse:
+    """Returns a report response with `row_count` rows of varied values."""
+    pb = data_v1beta.RunReportResponse.pb()()
+    for name in ("date", "country", "eventName"):
+        pb.dimension_headers.add(name=name)
+    pb.metric_headers.add(
+        name="eventCount", type_=data_v1beta.MetricType.TYPE_INTEGER
+    )
+    pb.metric_headers.add(
+        name="averageSessionDuration",
+        type_=data_v1beta.MetricType.TYPE_SECONDS,
+    )
+    for i in range(row_count):
+        row = pb.rows.add()
+        row.dimension_values.add(
+            value=f"2025{(i % 12) + 1:02d}{(i % 28) + 1:02d}"
+        )
+        row.dimension_values.add(value=f"Country {i % 200}")
+        row.dimension_values.add(value=f"event_{i % 50}")
+        row.metric_values.add(value=str(i * 7 % 100_000))
+        row.metric_values.add(value=repr(i % 600 / 7))
+    pb.row_count = row_count
+    return data_v1beta.RunReportResponse.wrap(pb)
+
+
+def fake_metadata():
+    """Returns a small Metadata response with standard and custom fields."""
+    return data_v1beta.Metadata(
+        dimensions=[
+            data_v1beta.DimensionMetadata(
+                api_name="eventName", category="Event"
+            ),
+            data_v1beta.DimensionMetadata(
+                api_name="sessionSource",
+                category="Traffic source",
+                deprecated_api_names=["source"],
+            ),
+            data_v1beta.DimensionMetadata(
+                api_name="customEvent:plan",
+                category="Custom",
+                custom_definition=True,
+            ),
+        ],
+        metrics=[
+            data_v1beta.MetricMetadata(
+                api_name="eventCount",
+                category="Event",
+                type_=data_v1beta.MetricType.TYPE_INTEGER,
+            ),
+            data_v1beta.MetricMetadata(
+                api_name="sessions",
+                category="Session",
+                type_=data_v1beta.MetricType.TYPE_INTEGER,
+            ),
+            data_v1beta.MetricMetadata(
+                api_name="averageSessionDuration",
+                category="Session",
+                type_=data_v1beta.MetricType.TYPE_SECONDS,
+            ),
+            data_v1beta.MetricMetadata(
+                api_name="customEvent:price",
+                category="Custom",
+                custom_definition=True,
+                type_=data_v1beta.MetricType.TYPE_CURRENCY,
+            ),
+        ],
+    )
+
+
+def date_range(request) -> Tuple[datetime.date, datetime.date]:
+    """Returns the start and end dates of a request's only date range."""
+    (single_range,) = request.date_ranges
+    return (
+        datetime.date.fromisoformat(single_range.start_date),
+        datetime.date.fromisoformat(single_range.end_date),
+    )
+
+
+class FakeReport(abc.ABC):
+    """Serves the pages of a fake report, and records each page's request.
+
+    Subclasses return the report's rows from `report_rows`. Each page holds
+    the rows from the request's `offset`, up to its `limit` if it has one,
+    and its `row_count` is the number of rows in the report. The headers
+    are the request's dimensions and metrics, all of them integers.
+    """
+
+    def __init__(self, **metadata) -> None:
+        self.metadata = metadata
+        self.requests: List[data_v1beta.RunReportRequest] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rows_served = 0
+
+    @abc.abstractmethod
+    def report_rows(self, request) -> List[Tuple[Sequence[str], Sequence[str]]]:
+        """Returns the dimension values and metric values of each row."""
+
+    def response_metadata(self, request) -> Dict[str, Any]:
+        """Returns the metadata of each page of the report."""
+        return self.metadata
+
+    def delay_seconds(self, request) -> float:
+        """Returns how long the page takes to run."""
+        return 0.0
+
+    async def run_page(self, request) -> data_v1beta.RunReportResponse:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay_seconds(request))
+        finally:
+            self.in_flight -= 1
+
+        rows = self.report_rows(request)
+        page = rows[request.offset :]
+        if request.limit:
+            page = page[: request.limit]
+        self.rows_served += len(page)
+        return data_v1beta.RunReportResponse(
+            dimension_headers=[
+                {"name": dimension.name} for dimension in request.dimensions
+            ],
+            metric_headers=[
+                {"name": metric.name, "type_": "TYPE_INTEGER"}
+                for metric in request.metrics
+            ],
+            rows=[
+                {
+                    "dimension_values": [
+                        {"value": value} for value in dimension_values
+                    ],
+                    "metric_values": [
+                        {"value": value} for value in metric_values
+                    ],
+                }
+                for dimension_values, metric_values in page
+            ],
+            row_count=len(rows),
+            metadata=self.response_metadata(request),
+        )
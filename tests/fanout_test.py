@@ -0,0 +1,123 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the fanout module."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.admin import directory
+from analytics_mcp.tools.reporting import fanout, quota
+
+_SUMMARIES = [
+    {
+        "name": "accountSummaries/1",
+        "account": "accounts/1",
+        "display_name": "Agency",
+        "property_summaries": [
+            {
+                "property": f"properties/{property_id}",
+                "display_name": f"Client {property_id}",
+                "property_type": "PROPERTY_TYPE_ORDINARY",
+                "parent": "accounts/1",
+            }
+            for property_id in (11, 12, 13)
+        ],
+    }
+]
+
+
+class TestFanout(unittest.IsolatedAsyncioTestCase):
+    """Test cases for resolve_properties and run_for_properties."""
+
+    async def asyncSetUp(self):
+        self.property_directory = directory.PropertyDirectory(
+            refresh_seconds=3600,
+            list_summaries=mock.AsyncMock(return_value=_SUMMARIES),
+        )
+        patcher = mock.patch.object(
+            fanout, "property_directory", self.property_directory
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.property_directory.stop()
+
+    async def test_resolves_accounts_and_removes_duplicates(self):
+        """Tests that account properties are added after listed ones."""
+        with mock.patch.object(
+            directory, "property_directory", self.property_directory
+        ):
+            property_rns = await fanout.resolve_properties(
+                [99, "Client 12"], account_id="accounts/1"
+            )
+        self.assertEqual(
+            property_rns,
+            [
+                "properties/99",
+                "properties/12",
+                "properties/11",
+                "properties/13",
+            ],
+        )
+        with self.assertRaisesRegex(ValueError, "has no properties"):
+            await fanout.resolve_properties(account_id=2)
+        with self.assertRaisesRegex(ValueError, "must be provided"):
+            await fanout.resolve_properties()
+
+    async def test_limits_concurrency_and_reports_failures(self):
+        """Tests that failed properties don't stop the others."""
+        running = 0
+        max_running = 0
+        priorities = []
+
+        async def run(property_rn):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            priorities.append(quota._priority.get())
+            await asyncio.sleep(0.01)
+            running -= 1
+            if property_rn == "properties/12":
+                raise ValueError("Invalid dimension")
+            return {"row_count": 1}
+
+        await self.property_directory.get()
+        result = await fanout.run_for_properties(
+            run,
+            [f"properties/{property_id}" for property_id in range(10, 16)],
+            max_concurrency=2,
+        )
+
+        self.assertEqual(max_running, 2)
+        self.assertEqual(set(priorities), {quota.BULK})
+        self.assertEqual((result["succeeded"], result["failed"]), (5, 1))
+        self.assertEqual(
+            result["results"][2],
+            {
+                "property_id": "properties/12",
+                "display_name": "Client 12",
+                "error": "Invalid dimension",
+            },
+        )
+        self.assertEqual(
+            result["results"][0],
+            {
+                "property_id": "properties/10",
+                "display_name": None,
+                "report": {"row_count": 1},
+            },
+        )
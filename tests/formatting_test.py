@@ -0,0 +1,247 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the formatting module."""
+
+import json
+import unittest
+import warnings
+from unittest import mock
+
+from analytics_mcp.tools import utils
+from analytics_mcp.tools.reporting import formatting, results
+from google.analytics import data_v1beta
+
+
+def _response(response_type=data_v1beta.RunReportResponse, **kwargs):
+    return response_type(
+        dimension_headers=[{"name": "country"}],
+        metric_headers=[
+            {"name": "activeUsers", "type_": "TYPE_INTEGER"},
+            {"name": "averageSessionDuration", "type_": "TYPE_SECONDS"},
+        ],
+        rows=[
+            {
+                "dimension_values": [{"value": "France"}],
+                "metric_values": [{"value": "12"}, {"value": "30.5"}],
+            },
+            {
+                "dimension_values": [{"value": "Japan"}],
+                "metric_values": [{"value": "7"}, {"value": ""}],
+            },
+        ],
+        row_count=2,
+        **kwargs,
+    )
+
+
+class TestFormatting(unittest.TestCase):
+    """Test cases for the formatting module."""
+
+    def test_compact_format(self):
+        """Tests that compact output has typed columns."""
+        response = _response(
+            totals=[{"metric_values": [{"value": "19"}, {"value": "20.1"}]}]
+        )
+        result = formatting.format_response(response, formatting.COMPACT)
+        self.assertEqual(
+            result,
+            {
+                "headers": [
+                    "country",
+                    "activeUsers",
+                    "averageSessionDuration",
+                ],
+                "metric_types": ["TYPE_INTEGER", "TYPE_SECONDS"],
+                "columns": [["France", "Japan"], [12, 7], [30.5, None]],
+                "row_count": 2,
+                "totals": [[19, 20.1]],
+                "fingerprint": formatting.response_fingerprint(response),
+            },
+        )
+
+    def test_compact_realtime_format(self):
+        """Tests compact output for realtime responses with quota."""
+        result = formatting.format_response(
+            _response(
+                data_v1beta.RunRealtimeReportResponse,
+                property_quota={"tokens_per_day": {"consumed": 1}},
+            ),
+            formatting.COMPACT,
+        )
+        self.assertEqual(result["columns"][1], [12, 7])
+        self.assertEqual(
+            result["property_quota"], {"tokens_per_day": {"consumed": 1}}
+        )
+
+    def test_verbose_format(self):
+        """Tests that verbose output is unchanged."""
+        response = _response()
+        self.assertEqual(
+            formatting.format_response(response),
+            {
+                **utils.proto_to_dict(response),
+                "fingerprint": formatting.response_fingerprint(response),
+            },
+        )
+
+    def test_fingerprint(self):
+        """Tests that fingerprints only depend on the response's content."""
+        response = _response()
+        fingerprint = formatting.response_fingerprint(response)
+        self.assertRegex(fingerprint, "^[0-9a-f]{32}$")
+        for output_format in formatting.OUTPUT_FORMATS:
+            self.assertEqual(
+                formatting.format_response(response, output_format)[
+                    "fingerprint"
+                ],
+                fingerprint,
+            )
+        self.assertEqual(
+            results.ResultTable.from_response(response).fingerprint,
+            fingerprint,
+        )
+        self.assertEqual(
+            formatting.response_fingerprint(
+                _response(property_quota={"tokens_per_day": {"consumed": 1}})
+            ),
+            fingerprint,
+        )
+
+        changed = _response()
+        changed.rows[1].metric_values[0].value = "8"
+        reordered = _response()
+        reordered.rows[:] = list(reversed(reordered.rows))
+        for other in (
+            changed,
+            reordered,
+            _response(metadata={"currency_code": "USD"}),
+            _response(totals=[{"metric_values": [{"value": "19"}]}]),
+        ):
+            with self.subTest(other=other):
+                self.assertNotEqual(
+                    formatting.response_fingerprint(other), fingerprint
+                )
+
+    def test_fingerprint_without_deprecation_warnings(self):
+        """Tests that fingerprints don't use deprecated protobuf APIs."""
+        response = _response(totals=[{"metric_values": [{"value": "19"}]}])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            formatting.response_fingerprint(response)
+
+    def test_known_fingerprint_isnt_recomputed(self):
+        """Tests that a given fingerprint is returned without hashing rows."""
+        response = _response()
+        with mock.patch.object(formatting, "Fingerprint") as fingerprint:
+            for output_format in formatting.OUTPUT_FORMATS:
+                result = formatting.format_response(
+                    response, output_format, fingerprint="abc"
+                )
+                self.assertEqual(result["fingerprint"], "abc")
+        fingerprint.assert_not_called()
+
+    def test_response_to_dict_matches_proto_to_dict(self):
+        """Tests that the direct converter matches the generic conversion."""
+        responses = [
+            data_v1beta.RunReportResponse(),
+            _response(),
+            _response(
+                metadata={"currency_code": "USD", "time_zone": "Etc/UTC"},
+                property_quota={"tokens_per_day": {"consumed": 1}},
+                totals=[
+                    {
+                        "dimension_values": [{"value": "RESERVED_TOTAL"}],
+                        "metric_values": [{"value": "19"}, {}],
+                    }
+                ],
+                kind="analyticsData#runReport",
+            ),
+            data_v1beta.RunReportResponse(
+                metric_headers=[{"type_": "TYPE_FLOAT"}, {"name": "x"}],
+                rows=[
+                    {"metric_values": [{"value": ""}]},
+                    {"dimension_values": [{}]},
+                    {},
+                ],
+            ),
+            _response(
+                data_v1beta.RunRealtimeReportResponse,
+                maximums=[{"metric_values": [{"value": "12"}]}],
+            ),
+        ]
+        for response in responses:
+            with self.subTest(response=response):
+                # Compares the JSON to also check the order of keys.
+                self.assertEqual(
+                    json.dumps(formatting.response_to_dict(response)),
+                    json.dumps(utils.proto_to_dict(response)),
+                )
+
+    def test_invalid_format(self):
+        """Tests that an unknown format raises a ValueError."""
+        with self.assertRaises(ValueError):
+            formatting.format_response(_response(), "csv")
+
+    def test_pivot_grid(self):
+        """Tests that pivot responses are converted to a grid."""
+        response = data_v1beta.RunPivotReportResponse(
+            pivot_headers=[
+                {
+                    "pivot_dimension_headers": [
+                        {"dimension_values": [{"value": "Chrome"}]},
+                        {"dimension_values": [{"value": "Safari"}]},
+                    ],
+                    "row_count": 7,
+                },
+                {
+                    "pivot_dimension_headers": [
+                        {"dimension_values": [{"value": "Japan"}]},
+                        {"dimension_values": [{"value": "France"}]},
+                    ],
+                    "row_count": 2,
+                },
+            ],
+            dimension_headers=[{"name": "country"}, {"name": "browser"}],
+            metric_headers=[{"name": "sessions", "type_": "TYPE_INTEGER"}],
+            rows=[
+                {
+                    "dimension_values": [
+                        {"value": country},
+                        {"value": browser},
+                    ],
+                    "metric_values": [{"value": sessions}],
+                }
+                for country, browser, sessions in [
+                    ("France", "Chrome", "10"),
+                    ("Japan", "Chrome", "4"),
+                    ("France", "Safari", "3"),
+                ]
+            ],
+        )
+        result = formatting.format_pivot_response(
+            response, [["browser"], ["country"]]
+        )
+        self.assertEqual(
+            result,
+            {
+                "row_headers": ["browser"],
+                "column_headers": ["country"],
+                "metric_headers": ["sessions"],
+                "metric_types": ["TYPE_INTEGER"],
+                "columns": [["Japan"], ["France"]],
+                "rows": [["Chrome", [4, 10]], ["Safari", [None, 3]]],
+                "row_count": 7,
+            },
+        )
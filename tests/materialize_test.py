@@ -0,0 +1,181 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the materialize module."""
+
+import datetime
+import os
+import tempfile
+import unittest
+
+from analytics_mcp.tools.reporting import materialize
+from google.analytics import data_v1beta
+from tests import fakes
+
+_TODAY = datetime.date(2025, 3, 1)
+
+
+class _FakeReport(fakes.FakeReport):
+    """Serves a report with one row per day, whose value is the day number."""
+
+    @property
+    def date_ranges(self):
+        return [fakes.date_range(request) for request in self.requests]
+
+    def report_rows(self, request):
+        start, end = fakes.date_range(request)
+        days = [
+            start + datetime.timedelta(days=offset)
+            for offset in range((end - start).days + 1)
+        ]
+        return [((day.strftime("%Y%m%d"),), (str(day.day),)) for day in days]
+
+
+def _request(start_date, end_date, **kwargs):
+    return data_v1beta.RunReportRequest(
+        property="properties/1",
+        dimensions=[{"name": "date"}],
+        metrics=[{"name": "sessions"}],
+        date_ranges=[{"start_date": start_date, "end_date": end_date}],
+        **kwargs,
+    )
+
+
+def _sessions(response):
+    return [int(row.metric_values[0].value) for row in response.rows]
+
+
+class TestRunReportMaterialized(unittest.IsolatedAsyncioTestCase):
+    """Test cases for run_report_materialized."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = materialize.MaterializedStore(
+            os.path.join(directory.name, "reports.db"), max_bytes=1_000_000
+        )
+        self.addCleanup(self.store.close)
+
+    async def _run(self, report, request, max_rows=None):
+        return await materialize.run_report_materialized(
+            report.run_page,
+            request,
+            _TODAY,
+            max_rows=max_rows,
+            store=self.store,
+        )
+
+    async def test_fetches_only_missing_and_recent_days(self):
+        """Tests that stored final days aren't fetched again."""
+        report = _FakeReport()
+        await self._run(report, _request("2025-02-10", "2025-02-20"))
+        self.assertEqual(
+            report.date_ranges,
+            [(datetime.date(2025, 2, 10), datetime.date(2025, 2, 20))],
+        )
+
+        report = _FakeReport()
+        response = await self._run(
+            report,
+            _request(
+                "2025-02-01",
+                "today",
+                order_bys=[
+                    {"metric": {"metric_name": "sessions"}, "desc": True}
+                ],
+            ),
+        )
+        self.assertEqual(
+            report.date_ranges,
+            [
+                (datetime.date(2025, 2, 1), datetime.date(2025, 2, 9)),
+                (datetime.date(2025, 2, 21), datetime.date(2025, 3, 1)),
+            ],
+        )
+        self.assertEqual(response.row_count, 29)
+        self.assertEqual(_sessions(response), list(range(28, 0, -1)) + [1])
+
+        report = _FakeReport()
+        await self._run(report, _request("2025-02-01", "today"))
+        # Only the days within FINAL_AFTER_DAYS of today are fetched.
+        self.assertEqual(
+            report.date_ranges,
+            [(datetime.date(2025, 2, 27), datetime.date(2025, 3, 1))],
+        )
+        self.assertEqual(self.store.stats()["days"], 26)
+
+    def test_query_shape_ignores_dates_and_order(self):
+        """Tests that reports that differ only in dates share stored days."""
+        first = _request("2025-01-01", "2025-01-31", limit=10)
+        second = _request(
+            "7daysAgo",
+            "yesterday",
+            order_bys=[{"dimension": {"dimension_name": "date"}}],
+        )
+        self.assertEqual(
+            materialize.query_shape(first), materialize.query_shape(second)
+        )
+        second.metrics.append(data_v1beta.Metric(name="eventCount"))
+        self.assertNotEqual(
+            materialize.query_shape(first), materialize.query_shape(second)
+        )
+
+    async def test_removes_least_recently_used_days_when_full(self):
+        """Tests that the store is compacted when it exceeds its size."""
+        report = _FakeReport()
+        await self._run(report, _request("2025-01-01", "2025-01-31"))
+        size = self.store.stats()["bytes"]
+        self.store._max_bytes = size * 3 // 2
+
+        await self._run(report, _request("2024-12-01", "2024-12-31"))
+
+        stats = self.store.stats()
+        self.assertLessEqual(stats["bytes"], size * 3 // 2)
+        self.assertEqual(stats["compactions"], 1)
+        stored = self.store.load(
+            "properties/1",
+            materialize.query_shape(_request("today", "today")),
+            [datetime.date(2024, 12, 31), datetime.date(2025, 1, 1)],
+        )
+        self.assertEqual(list(stored), [datetime.date(2024, 12, 31)])
+
+    async def test_fetches_only_the_rows_needed(self):
+        """Tests that a small limit doesn't fetch or store every row."""
+        report = _FakeReport()
+        response = await self._run(
+            report, _request("2025-01-01", "2025-01-31", offset=2), max_rows=3
+        )
+        self.assertEqual(_sessions(response), [3, 4, 5])
+        self.assertEqual(response.row_count, 31)
+        self.assertEqual(report.rows_served, 5)
+        # The range was fetched only in part, so none of its days are stored.
+        self.assertEqual(self.store.stats()["days"], 0)
+
+    async def test_doesnt_store_days_with_data_loss(self):
+        """Tests that days whose rows lost data aren't stored."""
+        report = _FakeReport(data_loss_from_other_row=True)
+        response = await self._run(report, _request("2025-01-01", "2025-01-31"))
+        self.assertTrue(response.metadata.data_loss_from_other_row)
+        self.assertEqual(self.store.stats()["days"], 0)
+
+    async def test_returns_metadata_of_stored_days(self):
+        """Tests that a report of stored days only keeps its metadata."""
+        report = _FakeReport(currency_code="EUR", time_zone="Europe/Paris")
+        await self._run(report, _request("2025-01-01", "2025-01-31"))
+
+        report = _FakeReport()
+        response = await self._run(report, _request("2025-01-10", "2025-01-20"))
+        self.assertEqual(report.date_ranges, [])
+        self.assertEqual(response.metadata.currency_code, "EUR")
+        self.assertEqual(response.metadata.time_zone, "Europe/Paris")
@@ -0,0 +1,93 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the metadata_cache module."""
+
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import metadata_cache
+from tests.fakes import fake_metadata
+
+
+def _names(fields):
+    return [field["api_name"] for field in fields]
+
+
+class TestPropertyMetadata(unittest.TestCase):
+    """Test cases for the PropertyMetadata class."""
+
+    def setUp(self):
+        self.metadata = metadata_cache.PropertyMetadata(fake_metadata())
+
+    def test_lookup_by_api_name(self):
+        """Tests lookups by current and deprecated API names."""
+        self.assertEqual(self.metadata.kind_of("eventName"), "dimension")
+        self.assertEqual(self.metadata.kind_of("eventCount"), "metric")
+        self.assertEqual(
+            self.metadata.get("source")["api_name"], "sessionSource"
+        )
+        self.assertIsNone(self.metadata.get("unknown"))
+
+    def test_prefix_search(self):
+        """Tests that prefix search is case-insensitive."""
+        self.assertEqual(
+            _names(self.metadata.search(prefix="SESS")),
+            ["sessions", "sessionSource"],
+        )
+        self.assertEqual(
+            _names(self.metadata.search(prefix="customEvent:", kind="metric")),
+            ["customEvent:price"],
+        )
+
+    def test_filters(self):
+        """Tests filtering by category and custom/standard."""
+        self.assertEqual(
+            _names(self.metadata.search(category="Session")),
+            ["sessions", "averageSessionDuration"],
+        )
+        self.assertEqual(
+            _names(self.metadata.search(custom=True)),
+            ["customEvent:plan", "customEvent:price"],
+        )
+        self.assertEqual(
+            self.metadata.search(prefix="eventN")[0]["kind"], "dimension"
+        )
+
+    def test_categories(self):
+        """Tests the number of fields in each category."""
+        self.assertEqual(
+            self.metadata.categories()["Event"],
+            {"dimension": 1, "metric": 1},
+        )
+
+
+class TestMetadataCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the MetadataCache class."""
+
+    async def test_caches_until_invalidated(self):
+        """Tests that metadata is fetched once until invalidated."""
+        get_metadata = mock.AsyncMock(return_value=fake_metadata())
+        cache = metadata_cache.MetadataCache(ttl_seconds=60)
+        with mock.patch.object(
+            metadata_cache.data_api, "get_metadata", get_metadata
+        ):
+            first = await cache.get("properties/1")
+            second = await cache.get("properties/1")
+            cache.invalidate("properties/1")
+            await cache.get("properties/1")
+
+        self.assertIs(first, second)
+        self.assertEqual(get_metadata.await_count, 2)
+        get_metadata.assert_awaited_with("properties/1/metadata")
@@ -0,0 +1,35 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the metadata module."""
+
+import pathlib
+import unittest
+
+from analytics_mcp.tools.reporting import hint_text, metadata
+
+
+class TestMetadata(unittest.TestCase):
+    """Test cases for the metadata module."""
+
+    def test_hint_text_is_up_to_date(self):
+        """Tests that the precomputed hints match the hint builders.
+
+        If this fails, regenerate the hints with
+        `python -m analytics_mcp.tools.reporting.metadata`.
+        """
+        self.assertEqual(
+            pathlib.Path(hint_text.__file__).read_text(),
+            metadata.generate_hint_text_module(),
+        )
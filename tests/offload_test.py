@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the offload module."""
+
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import formatting, offload
+from tests.fakes import make_report_response
+
+
+class TestOffload(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the offload module."""
+
+    async def asyncTearDown(self):
+        await offload.shutdown_executor()
+
+    async def test_small_responses_are_converted_inline(self):
+        """Tests that responses below the threshold skip the pool."""
+        response = make_report_response(10)
+        with mock.patch.object(offload, "_get_executor") as get_executor:
+            result = await offload.format_response_async(
+                response, formatting.COMPACT
+            )
+        get_executor.assert_not_called()
+        self.assertEqual(
+            result, formatting.format_response(response, formatting.COMPACT)
+        )
+
+    async def test_large_responses_are_converted_in_pool(self):
+        """Tests that the pool returns the same result as inline conversion."""
+        response = make_report_response(200)
+        offloaded = offload._stats()["offloaded_conversions"]
+        with mock.patch.object(offload, "_MIN_ROWS", 100):
+            result = await offload.format_response_async(
+                response, formatting.VERBOSE
+            )
+        self.assertEqual(
+            offload._stats()["offloaded_conversions"], offloaded + 1
+        )
+        self.assertEqual(result, formatting.format_response(response))
+
+    def test_convert_serialized(self):
+        """Tests the function that runs in process pool workers."""
+        response = make_report_response(20)
+        result = offload._convert_serialized(
+            formatting.format_response,
+            "RunReportResponse",
+            type(response).serialize(response),
+            formatting.COMPACT,
+        )
+        self.assertEqual(
+            result, formatting.format_response(response, formatting.COMPACT)
+        )
+
+    async def test_event_loop_stays_responsive(self):
+        """Tests that small calls run while a large response is converted."""
+        large = make_report_response(2_000)
+        small = make_report_response(5)
+        convert_serialized = offload._convert_serialized
+        worker_threads = []
+        small_call_done = threading.Event()
+
+        def convert_after_small_call(*args):
+            worker_threads.append(threading.current_thread())
+            # Only converts the large response once the event loop has run a
+            # small call, which it couldn't do if the conversion blocked it.
+            if not small_call_done.wait(timeout=10):
+                raise TimeoutError("The small call didn't run.")
+            return convert_serialized(*args)
+
+        patch_convert = mock.patch.object(
+            offload, "_convert_serialized", convert_after_small_call
+        )
+        with mock.patch.object(offload, "_MIN_ROWS", 1_000), patch_convert:
+            conversion = asyncio.ensure_future(
+                offload.format_response_async(large, formatting.VERBOSE)
+            )
+            while not worker_threads:
+                await asyncio.sleep(0.001)
+            await offload.format_response_async(small, formatting.VERBOSE)
+            small_call_done.set()
+            result = await conversion
+
+        self.assertIsNot(worker_threads[0], threading.main_thread())
+        self.assertEqual(result, formatting.format_response(large))
@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the pagination module."""
+
+import unittest
+
+from analytics_mcp.tools.reporting import pagination
+from google.analytics import data_v1beta
+from tests import fakes
+
+
+class _FakeReport(fakes.FakeReport):
+    """Serves pages of a report whose rows are numbered 0 to row_count - 1."""
+
+    def __init__(self, row_count):
+        super().__init__()
+        self.row_count = row_count
+
+    def report_rows(self, request):
+        return [((str(i),), ()) for i in range(self.row_count)]
+
+    def delay_seconds(self, request):
+        # Finishes later pages first to check that rows are merged in order.
+        return 0.001 * (self.row_count - request.offset) / 100
+
+
+def _row_values(response):
+    return [int(row.dimension_values[0].value) for row in response.rows]
+
+
+class TestRunReportAllPages(unittest.IsolatedAsyncioTestCase):
+    """Test cases for run_report_all_pages."""
+
+    async def test_merges_all_pages_in_order(self):
+        """Tests that every row is returned in order."""
+        report = _FakeReport(row_count=1050)
+        request = data_v1beta.RunReportRequest(
+            property="properties/1", limit=100
+        )
+
+        response = await pagination.run_report_all_pages(
+            report.run_page, request, max_concurrency=3
+        )
+
+        self.assertEqual(_row_values(response), list(range(1050)))
+        self.assertEqual(response.row_count, 1050)
+        self.assertEqual(len(report.requests), 11)
+        self.assertLessEqual(report.max_in_flight, 3)
+        self.assertEqual(request.offset, 0, "Request must not be modified")
+
+    async def test_single_page(self):
+        """Tests that a report that fits in one page makes one request."""
+        report = _FakeReport(row_count=10)
+        request = data_v1beta.RunReportRequest(property="properties/1")
+
+        response = await pagination.run_report_all_pages(
+            report.run_page, request
+        )
+
+        self.assertEqual(_row_values(response), list(range(10)))
+        self.assertEqual(len(report.requests), 1)
+
+    async def test_max_rows_and_offset(self):
+        """Tests that fetching starts at the offset and stops at max_rows."""
+        report = _FakeReport(row_count=1000)
+        request = data_v1beta.RunReportRequest(
+            property="properties/1", limit=100, offset=50
+        )
+
+        response = await pagination.run_report_all_pages(
+            report.run_page, request, max_rows=250
+        )
+
+        self.assertEqual(_row_values(response), list(range(50, 300)))
+        self.assertEqual(response.row_count, 1000)
+
+    async def test_invalid_max_rows(self):
+        """Tests that a non-positive max_rows raises a ValueError."""
+        report = _FakeReport(row_count=10)
+        with self.assertRaises(ValueError):
+            await pagination.run_report_all_pages(
+                report.run_page, data_v1beta.RunReportRequest(), max_rows=0
+            )
@@ -0,0 +1,272 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the quota module."""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import data_api, quota
+from google.analytics import data_v1beta
+
+_PROPERTY = "properties/1"
+
+# The start of an hour, as seconds since the epoch.
+_HOUR_START = 1_750_000_000 // 3600 * 3600
+
+
+def _response(consumed, remaining):
+    return data_v1beta.RunReportResponse(
+        property_quota={
+            "tokens_per_hour": {"consumed": consumed, "remaining": remaining},
+            "concurrent_requests": {"consumed": 0, "remaining": 10},
+        }
+    )
+
+
+def _clock(start):
+    """Returns a clock that starts at `start` and advances in real time."""
+    offset = start - time.monotonic()
+    return lambda: time.monotonic() + offset
+
+
+class TestQuotaScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the QuotaScheduler class."""
+
+    def _scheduler(self, concurrent_requests=10, clock=None):
+        return quota.QuotaScheduler(
+            concurrent_requests=concurrent_requests,
+            reserve_fraction=0.1,
+            max_delay_seconds=1,
+            clock=clock or _clock(_HOUR_START),
+        )
+
+    async def test_limits_concurrent_calls(self):
+        """Tests that calls for a property share its concurrency limit."""
+        scheduler = self._scheduler(concurrent_requests=2)
+        running = 0
+        max_running = 0
+
+        async def call():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return _response(10, 1000)
+
+        await asyncio.gather(
+            *(scheduler.run(_PROPERTY, quota.CORE, call) for _ in range(6))
+        )
+        self.assertEqual(max_running, 2)
+        self.assertEqual(scheduler.stats()["calls"], 6)
+
+    async def test_interactive_calls_go_first(self):
+        """Tests that waiting interactive calls are admitted before bulk."""
+        scheduler = self._scheduler(concurrent_requests=1)
+        release = asyncio.Event()
+        order = []
+
+        def call(name):
+            async def run():
+                if name == "first":
+                    await release.wait()
+                order.append(name)
+                return _response(10, 1000)
+
+            return run
+
+        async def run_bulk(name):
+            with quota.bulk():
+                return await scheduler.run(_PROPERTY, quota.CORE, call(name))
+
+        tasks = [
+            asyncio.ensure_future(
+                scheduler.run(_PROPERTY, quota.CORE, call("first"))
+            )
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(run_bulk("bulk")))
+        await asyncio.sleep(0)
+        tasks.append(
+            asyncio.ensure_future(
+                scheduler.run(_PROPERTY, quota.CORE, call("interactive"))
+            )
+        )
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()["waiting"], 2)
+        release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["first", "interactive", "bulk"])
+
+    async def test_bulk_calls_wait_for_budget_to_refill(self):
+        """Tests that bulk calls leave a reserve until the window refills."""
+        scheduler = self._scheduler(clock=_clock(_HOUR_START - 0.05))
+        scheduler.record(
+            _PROPERTY, quota.CORE, _response(10, 990).property_quota
+        )
+        scheduler.record(
+            _PROPERTY, quota.CORE, _response(10, 50).property_quota
+        )
+        call = mock.AsyncMock(return_value=_response(10, 1000))
+
+        start = time.monotonic()
+        with quota.bulk():
+            await scheduler.run(_PROPERTY, quota.CORE, call)
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        self.assertEqual(scheduler.stats()["delayed"], 1)
+
+        status = scheduler.property_status(_PROPERTY)[quota.CORE]
+        self.assertEqual(status["quotas"]["tokens_per_hour"]["remaining"], 1000)
+
+    async def test_rejects_calls_that_would_wait_too_long(self):
+        """Tests that only interactive calls may use the reserve."""
+        scheduler = self._scheduler()
+        scheduler.record(
+            _PROPERTY, quota.CORE, _response(10, 990).property_quota
+        )
+        scheduler.record(
+            _PROPERTY, quota.CORE, _response(10, 50).property_quota
+        )
+        call = mock.AsyncMock(return_value=_response(10, 40))
+
+        with quota.bulk():
+            with self.assertRaises(quota.QuotaExhaustedError):
+                await scheduler.run(_PROPERTY, quota.CORE, call)
+        call.assert_not_awaited()
+
+        await scheduler.run(_PROPERTY, quota.CORE, call)
+        call.assert_awaited_once()
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    async def test_budget_is_checked_again_after_waiting_for_a_slot(self):
+        """Tests that a call admitted before the budget ran low waits."""
+        scheduler = self._scheduler(concurrent_requests=1)
+        scheduler.record(
+            _PROPERTY, quota.CORE, _response(10, 990).property_quota
+        )
+        release = asyncio.Event()
+
+        async def first_call():
+            await release.wait()
+            return _response(10, 50)
+
+        second_call = mock.AsyncMock(return_value=_response(10, 40))
+        with quota.bulk():
+            first = asyncio.ensure_future(
+                scheduler.run(_PROPERTY, quota.CORE, first_call)
+            )
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(
+                scheduler.run(_PROPERTY, quota.CORE, second_call)
+            )
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.stats()["waiting"], 1)
+        release.set()
+
+        await first
+        with self.assertRaises(quota.QuotaExhaustedError):
+            await second
+        second_call.assert_not_awaited()
+
+    async def test_data_api_requests_quota(self):
+        """Tests that the quota is requested but only returned if asked for."""
+        client = mock.Mock()
+        client.run_report = mock.AsyncMock(return_value=_response(10, 1000))
+        request = data_v1beta.RunReportRequest(property="properties/42")
+        with mock.patch.object(
+            data_api, "create_data_api_client", return_value=client
+        ):
+            response = await data_api.run_report(request)
+
+        self.assertTrue(
+            client.run_report.await_args.kwargs["request"].return_property_quota
+        )
+        self.assertFalse(request.return_property_quota)
+        self.assertNotIn("property_quota", response)
+        status = quota.quota_scheduler.property_status("properties/42")
+        self.assertEqual(
+            status[quota.CORE]["quotas"]["tokens_per_hour"]["remaining"], 1000
+        )
+
+    async def test_shared_calls_return_quota_to_callers_that_ask(self):
+        """Tests concurrent calls that share a call but differ in the quota."""
+        release = asyncio.Event()
+
+        async def run_report(**kwargs):
+            await release.wait()
+            return _response(10, 1000)
+
+        client = mock.Mock()
+        client.run_report = mock.AsyncMock(side_effect=run_report)
+        with mock.patch.object(
+            data_api, "create_data_api_client", return_value=client
+        ):
+            calls = [
+                asyncio.create_task(
+                    data_api.run_report(
+                        data_v1beta.RunReportRequest(
+                            property="properties/43",
+                            return_property_quota=wants_quota,
+                        )
+                    )
+                )
+                for wants_quota in (False, True, False)
+            ]
+            await asyncio.sleep(0.01)
+            release.set()
+            without_quota, with_quota, without_quota_too = await asyncio.gather(
+                *calls
+            )
+
+        client.run_report.assert_awaited_once()
+        self.assertIn("property_quota", with_quota)
+        self.assertNotIn("property_quota", without_quota)
+        self.assertNotIn("property_quota", without_quota_too)
+
+    async def test_shared_pivot_calls_return_quota_to_callers_that_ask(self):
+        """Tests concurrent pivot calls that differ in the quota."""
+        release = asyncio.Event()
+
+        async def run_pivot_report(**kwargs):
+            await release.wait()
+            return data_v1beta.RunPivotReportResponse(
+                property_quota=_response(10, 1000).property_quota
+            )
+
+        client = mock.Mock()
+        client.run_pivot_report = mock.AsyncMock(side_effect=run_pivot_report)
+        with mock.patch.object(
+            data_api, "create_data_api_client", return_value=client
+        ):
+            calls = [
+                asyncio.create_task(
+                    data_api.run_pivot_report(
+                        data_v1beta.RunPivotReportRequest(
+                            property="properties/44",
+                            return_property_quota=wants_quota,
+                        )
+                    )
+                )
+                for wants_quota in (False, True)
+            ]
+            await asyncio.sleep(0.01)
+            release.set()
+            without_quota, with_quota = await asyncio.gather(*calls)
+
+        client.run_pivot_report.assert_awaited_once()
+        self.assertIn("property_quota", with_quota)
+        self.assertNotIn("property_quota", without_quota)
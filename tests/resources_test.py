@@ -0,0 +1,164 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the resources module."""
+
+import json
+import unittest
+from unittest import mock
+
+from analytics_mcp.coordinator import mcp
+from analytics_mcp.tools.reporting import core, formatting, resources, results
+from google.analytics import data_v1beta
+
+
+def _response(row_count):
+    return data_v1beta.RunReportResponse(
+        dimension_headers=[{"name": "pagePath"}],
+        metric_headers=[{"name": "screenPageViews", "type_": "TYPE_INTEGER"}],
+        rows=[
+            {
+                "dimension_values": [{"value": f"/{row}"}],
+                "metric_values": [{"value": str(row)}],
+            }
+            for row in range(row_count)
+        ],
+        totals=[{"metric_values": [{"value": "45"}]}],
+        row_count=row_count,
+    )
+
+
+class TestResultResources(unittest.IsolatedAsyncioTestCase):
+    """Test cases for large results served as resources."""
+
+    def setUp(self):
+        store = results.ResultStore(max_bytes=1_000_000, ttl_seconds=60)
+        patches = [
+            mock.patch.object(resources, "result_store", store),
+            mock.patch.object(results, "result_store", store),
+            mock.patch.object(core, "result_store", store),
+            mock.patch.object(resources, "INLINE_MAX_ROWS", 5),
+            mock.patch.object(resources, "CHUNK_ROWS", 3),
+            mock.patch.object(resources, "PREVIEW_ROWS", 2),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def _read(self, uri):
+        (content,) = await mcp.read_resource(uri)
+        return json.loads(content.content)
+
+    async def test_small_results_are_inline(self):
+        """Tests that results up to INLINE_MAX_ROWS rows are returned."""
+        result = await core._format_report(_response(5), "compact")
+        self.assertEqual(len(result["columns"][0]), 5)
+        self.assertIsNotNone(result["result_handle"])
+
+    async def test_large_results_are_read_in_chunks(self):
+        """Tests the summary of a large result and reading its chunks."""
+        summary = await core._format_report(_response(10), "verbose")
+        self.assertEqual(
+            summary["rows"],
+            [
+                {
+                    "dimension_values": [{"value": f"/{row}"}],
+                    "metric_values": [{"value": str(row)}],
+                }
+                for row in range(2)
+            ],
+        )
+        self.assertEqual(summary["row_count"], 10)
+        compact = await core._format_report(_response(10), "compact")
+        self.assertEqual(compact["columns"], [["/0", "/1"], [0, 1]])
+        self.assertEqual(compact["totals"], [[45]])
+        self.assertEqual(compact["fingerprint"], summary["fingerprint"])
+        self.assertEqual(summary["chunk_count"], 4)
+
+        chunks_uri = summary["chunks_uri"]
+        chunk = await self._read(chunks_uri.replace("{chunks}", "1-3"))
+        self.assertEqual(chunk["first_row"], 3)
+        self.assertEqual(chunk["columns"][1], [3, 4, 5, 6, 7, 8, 9])
+        with self.assertRaisesRegex(Exception, "numbered from 0 to 3"):
+            await self._read(chunks_uri.replace("{chunks}", "4"))
+
+    async def test_results_too_large_for_the_store_are_truncated(self):
+        """Tests that a large result that isn't stored is only previewed."""
+        store = results.ResultStore(max_bytes=100, ttl_seconds=60)
+        with mock.patch.object(core, "result_store", store):
+            summary = await core._format_report(_response(10), "compact")
+        self.assertIsNone(summary["result_handle"])
+        self.assertEqual(summary["columns"], [["/0", "/1"], [0, 1]])
+        self.assertIn("more than the result store can hold", summary["warning"])
+        self.assertNotIn("chunks_uri", summary)
+
+    async def test_unchanged_results(self):
+        """Tests that an unchanged result is returned as a marker."""
+        for row_count in (5, 10):
+            with self.subTest(row_count=row_count):
+                first = await core._format_report(
+                    _response(row_count), "compact"
+                )
+                result = await core._format_report(
+                    _response(row_count), "compact", first["fingerprint"]
+                )
+                self.assertEqual(result["unchanged"], True)
+                self.assertEqual(result["fingerprint"], first["fingerprint"])
+                self.assertNotIn("columns", result)
+                self.assertIsNotNone(result["result_handle"])
+
+        changed = await core._format_report(
+            _response(4), "compact", first["fingerprint"]
+        )
+        self.assertNotIn("unchanged", changed)
+        self.assertEqual(len(changed["columns"][0]), 4)
+
+    async def test_tables_of_inline_results_are_built_when_read(self):
+        """Tests that an inline result's table is only built once read."""
+        with mock.patch.object(
+            results.ResultTable,
+            "from_response",
+            side_effect=results.ResultTable.from_response,
+        ) as from_response:
+            result = await core._format_report(_response(5), "compact")
+            from_response.assert_not_called()
+            table = await results.result_store.get_async(
+                result["result_handle"]
+            )
+            await results.result_store.get_async(result["result_handle"])
+        from_response.assert_called_once()
+        self.assertEqual(table.fingerprint, result["fingerprint"])
+        self.assertEqual(table.to_columns(), result["columns"])
+
+    async def test_results_without_store_are_hashed_once(self):
+        """Tests that rows are hashed once when the store is disabled."""
+        store = results.ResultStore(max_bytes=0, ttl_seconds=60)
+        response = _response(4)
+        with mock.patch.object(results, "result_store", store):
+            first = await core._format_report(response, "compact")
+            with mock.patch.object(
+                formatting.Fingerprint,
+                "add_row",
+                autospec=True,
+                side_effect=formatting.Fingerprint.add_row,
+            ) as add_row:
+                changed = await core._format_report(
+                    response, "compact", "0" * 32
+                )
+            unchanged = await core._format_report(
+                response, "compact", first["fingerprint"]
+            )
+        self.assertEqual(add_row.call_count, 4)
+        self.assertEqual(changed["fingerprint"], first["fingerprint"])
+        self.assertEqual(unchanged["unchanged"], True)
@@ -14,6 +14,8 @@
 
 """Test cases for the server module."""
 
+import subprocess
+import sys
 import unittest
 
 
@@ -29,3 +31,18 @@ class TestUtils(unittest.TestCase):
         from analytics_mcp import server
 
         self.assertIsNotNone(server.mcp, "MCP server instance not initialized")
+
+    def test_client_libraries_load_lazily(self):
+        """Tests that starting the server doesn't load the gRPC stack."""
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; import analytics_mcp.server; "
+                "print('grpc' in sys.modules)",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(output.strip(), "False")
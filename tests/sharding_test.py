@@ -0,0 +1,252 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the sharding module."""
+
+import datetime
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import sharding
+from google.analytics import data_v1beta
+from tests import fakes
+
+_TODAY = datetime.date(2025, 3, 1)
+
+
+class _FakeReport(fakes.FakeReport):
+    """Serves a report with one row per country and day.
+
+    Each country has 1 session per day in France and 2 per day in Japan.
+    Reports of more than 7 days are sampled.
+    """
+
+    def __init__(self, by_date):
+        super().__init__()
+        self.by_date = by_date
+
+    def delay_seconds(self, request):
+        return 0.001
+
+    def report_rows(self, request):
+        start, end = fakes.date_range(request)
+        days = (end - start).days + 1
+        rows = []
+        for country, sessions in (("France", 1), ("Japan", 2)):
+            if self.by_date:
+                for day in range(days):
+                    date = (start + datetime.timedelta(days=day)).strftime(
+                        "%Y%m%d"
+                    )
+                    rows.append(((date, country), (str(sessions),)))
+            else:
+                rows.append(((country,), (str(sessions * days),)))
+        return rows
+
+    def response_metadata(self, request):
+        start, end = fakes.date_range(request)
+        if (end - start).days + 1 > 7:
+            return {
+                "sampling_metadatas": [
+                    {"samples_read_count": 10, "sampling_space_size": 100}
+                ]
+            }
+        return {}
+
+
+def _request(dimensions, date_ranges, order_bys=None, **kwargs):
+    return data_v1beta.RunReportRequest(
+        property="properties/1",
+        dimensions=[{"name": dimension} for dimension in dimensions],
+        metrics=[{"name": "sessions"}],
+        date_ranges=date_ranges,
+        order_bys=order_bys or [],
+        **kwargs,
+    )
+
+
+def _rows(response):
+    return [
+        [value.value for value in row.dimension_values]
+        + [value.value for value in row.metric_values]
+        for row in response.rows
+    ]
+
+
+class TestSplitDateRange(unittest.TestCase):
+    """Test cases for split_date_range."""
+
+    def test_weeks_and_months(self):
+        """Tests that shards follow calendar weeks and months."""
+        start = datetime.date(2025, 1, 30)
+        end = datetime.date(2025, 3, 4)
+        self.assertEqual(
+            sharding.split_date_range(start, end, sharding.WEEK)[:2],
+            [
+                (datetime.date(2025, 1, 30), datetime.date(2025, 2, 2)),
+                (datetime.date(2025, 2, 3), datetime.date(2025, 2, 9)),
+            ],
+        )
+        self.assertEqual(
+            sharding.split_date_range(start, end, sharding.MONTH),
+            [
+                (datetime.date(2025, 1, 30), datetime.date(2025, 1, 31)),
+                (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28)),
+                (datetime.date(2025, 3, 1), datetime.date(2025, 3, 4)),
+            ],
+        )
+        self.assertEqual(
+            len(sharding.split_date_range(start, end, sharding.DAY)), 34
+        )
+
+
+class TestSumMetricValues(unittest.TestCase):
+    """Test cases for summing the metric values of rows."""
+
+    def test_float_sums_have_no_rounding_artifacts(self):
+        """Tests that float sums are rounded to the values' decimal places."""
+        integer_columns = [True, False]
+        totals = [0, []]
+        decimal_places = [0, 0]
+        for values in (("1", "0.1"), ("2", "0.2"), ("3", "")):
+            row = data_v1beta.Row.pb()(
+                metric_values=[{"value": value} for value in values]
+            )
+            sharding._sum_metric_values(
+                totals, row, integer_columns, decimal_places
+            )
+        self.assertEqual(totals[0], 6)
+        self.assertEqual(
+            repr(sharding._float_total(totals[1], decimal_places[1])), "0.3"
+        )
+
+
+class TestRunReportSharded(unittest.IsolatedAsyncioTestCase):
+    """Test cases for run_report_sharded."""
+
+    async def test_concatenates_rows_with_date_dimension(self):
+        """Tests that rows are merged and sorted by the order bys."""
+        report = _FakeReport(by_date=True)
+        request = _request(
+            ["date", "country"],
+            [{"start_date": "2025-01-01", "end_date": "2025-01-10"}],
+            order_bys=[
+                {"metric": {"metric_name": "sessions"}, "desc": True},
+                {"dimension": {"dimension_name": "date"}},
+            ],
+        )
+
+        response, summary = await sharding.run_report_sharded(
+            report.run_page,
+            request,
+            sharding.DAY,
+            _TODAY,
+            max_concurrency=3,
+        )
+
+        self.assertEqual(len(report.requests), 10)
+        self.assertLessEqual(report.max_in_flight, 3)
+        self.assertEqual(response.row_count, 20)
+        rows = _rows(response)
+        self.assertEqual(rows[0], ["20250101", "Japan", "2"])
+        self.assertEqual(rows[9], ["20250110", "Japan", "2"])
+        self.assertEqual(rows[10], ["20250101", "France", "1"])
+        self.assertEqual(summary["shard_count"], 10)
+        self.assertEqual(summary["sampled_shard_count"], 0)
+
+    async def test_sums_additive_metrics(self):
+        """Tests that metrics of rows in several shards are summed."""
+        report = _FakeReport(by_date=False)
+        request = _request(
+            ["country"],
+            [
+                {"start_date": "2025-01-01", "end_date": "2025-02-28"},
+                {"start_date": "2025-02-20", "end_date": "2025-02-28"},
+            ],
+            limit=3,
+        )
+
+        response, summary = await sharding.run_report_sharded(
+            report.run_page, request, sharding.MONTH, _TODAY
+        )
+
+        self.assertEqual(len(report.requests), 3)
+        self.assertEqual(
+            [header.name for header in response.dimension_headers],
+            ["country", "dateRange"],
+        )
+        self.assertEqual(response.row_count, 4)
+        self.assertEqual(
+            _rows(response),
+            [
+                ["France", "date_range_0", "59"],
+                ["Japan", "date_range_0", "118"],
+                ["France", "date_range_1", "9"],
+            ],
+        )
+        self.assertEqual(summary["sampled_shard_count"], 3)
+        self.assertEqual(
+            summary["sampled_shards"][0],
+            {
+                "start_date": "2025-01-01",
+                "end_date": "2025-01-31",
+                "samples_read_count": 10,
+                "sampling_space_size": 100,
+            },
+        )
+
+    async def test_rejects_non_additive_metrics(self):
+        """Tests that reports without a date dimension must be additive."""
+        request = _request(
+            ["country"],
+            [{"start_date": "2025-01-01", "end_date": "2025-01-31"}],
+        )
+        request.metrics.append(data_v1beta.Metric(name="activeUsers"))
+        with self.assertRaisesRegex(ValueError, "activeUsers"):
+            await sharding.run_report_sharded(
+                _FakeReport(by_date=False).run_page,
+                request,
+                sharding.WEEK,
+                _TODAY,
+            )
+
+        request.dimensions.append(data_v1beta.Dimension(name="date"))
+        sharding.check_shardable(request, sharding.WEEK)
+        with self.assertRaisesRegex(ValueError, "shard_by"):
+            sharding.check_shardable(request, "year")
+
+        request.metric_aggregations.append(data_v1beta.MetricAggregation.TOTAL)
+        with self.assertRaisesRegex(ValueError, "metric_aggregations"):
+            sharding.check_shardable(request, sharding.WEEK)
+
+    async def test_shares_row_budget_across_shards(self):
+        """Tests that the shards stop once they fetch too many rows."""
+        report = _FakeReport(by_date=True)
+        request = _request(
+            ["date", "country"],
+            [{"start_date": "2025-01-01", "end_date": "2025-01-10"}],
+        )
+
+        with mock.patch.object(sharding, "MAX_TOTAL_ROWS", 5):
+            with self.assertRaisesRegex(ValueError, "more than 5 rows"):
+                await sharding.run_report_sharded(
+                    report.run_page,
+                    request,
+                    sharding.DAY,
+                    _TODAY,
+                    max_concurrency=1,
+                )
+
+        # Each shard has 2 rows, so the third one exceeds the budget.
+        self.assertEqual(len(report.requests), 3)
@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the singleflight module."""
+
+import asyncio
+import unittest
+
+from analytics_mcp.tools.singleflight import SingleFlight
+
+
+class _SlowCall:
+    """An async call that finishes when released."""
+
+    def __init__(self, result="result"):
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the SingleFlight class."""
+
+    async def test_concurrent_calls_share_one_call(self):
+        """Tests that identical concurrent calls make a single call."""
+        flight = SingleFlight()
+        call = _SlowCall()
+
+        waiters = [
+            asyncio.create_task(flight.do("key", call)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        call.release.set()
+
+        self.assertEqual(await asyncio.gather(*waiters), ["result"] * 5)
+        self.assertEqual(call.calls, 1)
+        self.assertEqual(
+            flight.stats(), {"in_flight": 0, "calls": 1, "shared": 4}
+        )
+
+    async def test_sequential_calls_are_not_shared(self):
+        """Tests that a finished call isn't reused by later calls."""
+        flight = SingleFlight()
+        call = _SlowCall()
+        call.release.set()
+
+        await flight.do("key", call)
+        await flight.do("key", call)
+        self.assertEqual(call.calls, 2)
+
+    async def test_callers_receive_copies(self):
+        """Tests that callers sharing a call never share its result."""
+        flight = SingleFlight()
+        call = _SlowCall(result=[1])
+
+        async def leader():
+            result = await flight.do("key", call, copy=list)
+            # Modifies the result before the follower resumes.
+            result.append(2)
+            return result
+
+        leader_task = asyncio.create_task(leader())
+        follower = asyncio.create_task(flight.do("key", call, copy=list))
+        await asyncio.sleep(0)
+        call.release.set()
+
+        self.assertEqual(await leader_task, [1, 2])
+        self.assertEqual(await follower, [1])
+        self.assertIsNot(await leader_task, await follower)
+
+    async def test_single_caller_receives_result(self):
+        """Tests that a caller that doesn't share a call isn't copied."""
+        flight = SingleFlight()
+        call = _SlowCall(result=[1])
+        call.release.set()
+
+        self.assertIs(await flight.do("key", call, copy=list), call.result)
+
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Tests that cancelling one waiter leaves the others unaffected."""
+        flight = SingleFlight()
+        call = _SlowCall()
+
+        first = asyncio.create_task(flight.do("key", call))
+        second = asyncio.create_task(flight.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+
+        self.assertEqual(await second, "result")
+        self.assertTrue(first.cancelled())
+        self.assertFalse(call.cancelled)
+
+    async def test_last_cancelled_waiter_cancels_call(self):
+        """Tests that the call is cancelled when nobody is waiting for it."""
+        flight = SingleFlight()
+        call = _SlowCall()
+
+        waiter = asyncio.create_task(flight.do("key", call))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+        self.assertTrue(call.cancelled)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_errors_are_shared(self):
+        """Tests that every waiter receives the call's exception."""
+        flight = SingleFlight()
+        call = _SlowCall(result=ValueError("failed"))
+
+        waiters = [
+            asyncio.create_task(flight.do("key", call)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        call.release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(call.calls, 1)
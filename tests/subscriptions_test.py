@@ -0,0 +1,191 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the subscriptions module."""
+
+import asyncio
+import unittest
+
+from analytics_mcp.tools.reporting import subscriptions
+from google.analytics import data_v1beta
+
+
+def _response(rows):
+    return data_v1beta.RunRealtimeReportResponse(
+        dimension_headers=[{"name": "country"}],
+        metric_headers=[{"name": "activeUsers", "type_": "TYPE_INTEGER"}],
+        rows=[
+            {
+                "dimension_values": [{"value": country}],
+                "metric_values": [{"value": str(users)}],
+            }
+            for country, users in rows.items()
+        ],
+        row_count=len(rows),
+    )
+
+
+def _request(country_count=1):
+    return data_v1beta.RunRealtimeReportRequest(
+        property="properties/1",
+        dimensions=[{"name": "country"}],
+        metrics=[{"name": "activeUsers"}],
+        limit=country_count,
+    )
+
+
+class _FakeRealtime:
+    """Serves snapshots from a list, repeating the last one."""
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.calls = 0
+
+    async def run(self, request):
+        snapshot = self.snapshots[min(self.calls, len(self.snapshots) - 1)]
+        self.calls += 1
+        return _response(snapshot)
+
+
+class TestSubscriptionManager(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the SubscriptionManager class."""
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+
+    def _manager(self, realtime, idle_seconds=60):
+        self.manager = subscriptions.SubscriptionManager(
+            realtime.run, interval_seconds=0.01, idle_seconds=idle_seconds
+        )
+        return self.manager
+
+    async def test_subscribers_share_a_poller(self):
+        """Tests that subscribers to the same report share its polls."""
+        realtime = _FakeRealtime([{"France": 1}])
+        manager = self._manager(realtime)
+        subscribed = await asyncio.gather(
+            *(manager.subscribe(_request()) for _ in range(5))
+        )
+        await manager.subscribe(_request(country_count=2))
+
+        self.assertEqual(
+            [result["changed_rows"] for result in subscribed],
+            [[["France", "1"]]] * 5,
+        )
+        stats = manager.stats()
+        self.assertEqual(stats["pollers"], 2)
+        self.assertEqual(stats["subscriptions"], 6)
+        self.assertEqual(realtime.calls, 2)
+
+    async def test_reads_return_changes_since_last_read(self):
+        """Tests that each subscriber reads only what changed."""
+        realtime = _FakeRealtime(
+            [
+                {"France": 1, "Japan": 2},
+                {"France": 1, "Japan": 3},
+                {"France": 1, "Peru": 4},
+            ]
+        )
+        manager = self._manager(realtime)
+        first = await manager.subscribe(_request())
+        second = await manager.subscribe(_request())
+        self.assertEqual(len(first["changed_rows"]), 2)
+        self.assertEqual(second["version"], 1)
+
+        while realtime.calls < 2:
+            await asyncio.sleep(0.001)
+        read = manager.read(first["subscription_id"])
+        self.assertEqual(read["changed_rows"], [["Japan", "3"]])
+        self.assertEqual(read["removed_rows"], [])
+        self.assertEqual(
+            manager.read(first["subscription_id"])["changed_rows"], []
+        )
+
+        while realtime.calls < 4:
+            await asyncio.sleep(0.001)
+        read = manager.read(second["subscription_id"])
+        self.assertEqual(read["since_version"], 1)
+        self.assertEqual(read["version"], 3)
+        self.assertEqual(read["changed_rows"], [["Peru", "4"]])
+        self.assertEqual(read["removed_rows"], [["Japan"]])
+        self.assertEqual(read["row_count"], 2)
+
+    async def test_idle_pollers_stop(self):
+        """Tests that subscriptions expire and their poller stops."""
+        realtime = _FakeRealtime([{"France": 1}])
+        manager = self._manager(realtime, idle_seconds=0.02)
+        result = await manager.subscribe(_request())
+
+        for _ in range(100):
+            if not manager.stats()["pollers"]:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(manager.stats()["pollers"], 0)
+        with self.assertRaises(subscriptions.UnknownSubscriptionError):
+            manager.read(result["subscription_id"])
+        calls = realtime.calls
+        await asyncio.sleep(0.05)
+        self.assertEqual(realtime.calls, calls)
+
+    async def test_first_poll_errors_are_raised(self):
+        """Tests that a report that fails to run can't be subscribed to."""
+
+        async def fail(request):
+            raise ValueError("invalid report")
+
+        self.manager = subscriptions.SubscriptionManager(
+            fail, interval_seconds=0.01, idle_seconds=60
+        )
+        with self.assertRaisesRegex(ValueError, "invalid report"):
+            await self.manager.subscribe(_request())
+        self.assertEqual(self.manager.stats()["subscriptions"], 0)
+
+    async def test_first_poll_errors_arent_shared_with_new_subscribers(self):
+        """Tests that a report is polled again after its first poll fails."""
+        realtime = _FakeRealtime([{"France": 1}])
+        run = realtime.run
+
+        async def fail_first_call(request):
+            if not realtime.calls:
+                realtime.calls += 1
+                raise ValueError("unavailable")
+            return await run(request)
+
+        self.manager = subscriptions.SubscriptionManager(
+            fail_first_call, interval_seconds=60, idle_seconds=60
+        )
+        with self.assertRaisesRegex(ValueError, "unavailable"):
+            await self.manager.subscribe(_request())
+        self.assertEqual(self.manager.stats()["pollers"], 0)
+
+        result = await self.manager.subscribe(_request())
+        self.assertEqual(result["changed_rows"], [["France", "1"]])
+        self.assertNotIn("error", result)
+
+    async def test_new_subscribers_start_from_current_version(self):
+        """Tests that new subscribers don't read rows removed before."""
+        realtime = _FakeRealtime([{"France": 1, "Japan": 2}, {"France": 1}])
+        manager = self._manager(realtime)
+        first = await manager.subscribe(_request())
+        while manager._pollers[subscriptions.query_key(_request())].version < 2:
+            await asyncio.sleep(0.001)
+
+        second = await manager.subscribe(_request())
+        self.assertEqual(second["changed_rows"], [["France", "1"]])
+        self.assertEqual(second["removed_rows"], [])
+        read = manager.read(second["subscription_id"])
+        self.assertEqual(read["since_version"], 2)
+        self.assertEqual(read["removed_rows"], [])
+        read = manager.read(first["subscription_id"])
+        self.assertEqual(read["removed_rows"], [["Japan"]])
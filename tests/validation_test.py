@@ -0,0 +1,192 @@
+# Copyright 2025 Google LLC All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the validation module."""
+
+import unittest
+from unittest import mock
+
+from analytics_mcp.tools.reporting import validation
+from analytics_mcp.tools.reporting.metadata_cache import PropertyMetadata
+from google.analytics import data_v1beta
+from google.api_core import exceptions
+
+from tests.fakes import fake_metadata
+
+
+def _request(dimensions, metrics, **kwargs):
+    return data_v1beta.RunReportRequest(
+        property="properties/1",
+        dimensions=[data_v1beta.Dimension(name=name) for name in dimensions],
+        metrics=[data_v1beta.Metric(name=name) for name in metrics],
+        **kwargs,
+    )
+
+
+class TestValidateReportRequest(unittest.IsolatedAsyncioTestCase):
+    """Test cases for validate_report_request."""
+
+    def setUp(self):
+        self.check_compatibility = mock.AsyncMock()
+        patches = [
+            mock.patch.object(
+                validation.metadata_cache,
+                "get",
+                mock.AsyncMock(return_value=PropertyMetadata(fake_metadata())),
+            ),
+            mock.patch.object(
+                validation.data_api,
+                "check_compatibility",
+                self.check_compatibility,
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_valid_request(self):
+        """Tests that a valid request passes without an API call."""
+        await validation.validate_report_request(
+            _request(
+                ["eventName"],
+                ["eventCount"],
+                order_bys=[{"metric": {"metric_name": "eventCount"}}],
+                metric_filter={
+                    "filter": {
+                        "field_name": "eventCount",
+                        "numeric_filter": {
+                            "operation": "GREATER_THAN",
+                            "value": {"int64_value": 10},
+                        },
+                    }
+                },
+            )
+        )
+        self.check_compatibility.assert_not_awaited()
+
+    async def test_wrong_roles(self):
+        """Tests that dimensions used as metrics and vice versa are rejected."""
+        with self.assertRaises(validation.InvalidReportRequestError) as cm:
+            await validation.validate_report_request(
+                _request(["eventCount"], ["eventName"])
+            )
+        self.assertEqual(len(cm.exception.problems), 2)
+        self.assertIn(
+            "'eventCount' in dimensions is a metric", str(cm.exception)
+        )
+
+    async def test_order_bys_membership(self):
+        """Tests that order_bys fields must be in the report."""
+        with self.assertRaises(validation.InvalidReportRequestError) as cm:
+            await validation.validate_report_request(
+                _request(
+                    ["eventName"],
+                    ["eventCount"],
+                    order_bys=[{"metric": {"metric_name": "sessions"}}],
+                )
+            )
+        self.assertIn("metric 'sessions'", str(cm.exception))
+
+    async def test_string_filter_on_metric(self):
+        """Tests that string filters in metric_filter are rejected."""
+        with self.assertRaises(validation.InvalidReportRequestError):
+            await validation.validate_report_request(
+                _request(
+                    ["eventName"],
+                    ["eventCount"],
+                    metric_filter={
+                        "filter": {
+                            "field_name": "eventCount",
+                            "string_filter": {"value": "10"},
+                        }
+                    },
+                )
+            )
+
+    async def test_unknown_field_uses_compatibility_check(self):
+        """Tests that unknown fields are checked by the API."""
+        self.check_compatibility.side_effect = exceptions.InvalidArgument(
+            "Field eventNme is not a valid dimension."
+        )
+        with self.assertRaises(validation.InvalidReportRequestError) as cm:
+            await validation.validate_report_request(
+                _request(["eventNme"], ["eventCount"])
+            )
+        self.check_compatibility.assert_awaited_once()
+        self.assertIn("eventNme", str(cm.exception))
+
+    async def test_unknown_field_accepted_by_api(self):
+        """Tests that fields unknown locally but accepted by the API pass."""
+        await validation.validate_report_request(
+            _request(["customEvent:new"], ["eventCount"])
+        )
+        self.check_compatibility.assert_awaited_once()
+
+    async def test_failed_compatibility_check_is_skipped(self):
+        """Tests that the request passes if the check itself fails."""
+        self.check_compatibility.side_effect = exceptions.ServiceUnavailable(
+            "The service is unavailable."
+        )
+        with mock.patch.object(
+            validation.metadata_cache, "invalidate"
+        ) as invalidate:
+            await validation.validate_report_request(
+                _request(["customEvent:new"], ["eventCount"])
+            )
+        self.check_compatibility.assert_awaited_once()
+        invalidate.assert_not_called()
+
+    async def test_pivot_fields(self):
+        """Tests that pivots must use the report's dimensions and metrics."""
+        request = data_v1beta.RunPivotReportRequest(
+            property="properties/1",
+            dimensions=[{"name": "eventName"}, {"name": "country"}],
+            metrics=[{"name": "eventCount"}],
+            pivots=[
+                {"field_names": ["eventName"], "limit": 5},
+                {"field_names": ["country"], "limit": 5},
+            ],
+        )
+        await validation.validate_pivot_report_request(request)
+
+        request.pivots[1].field_names = ["city"]
+        request.pivots[1].order_bys = [{"metric": {"metric_name": "sessions"}}]
+        with self.assertRaises(validation.InvalidReportRequestError) as cm:
+            await validation.validate_pivot_report_request(request)
+        self.assertEqual(len(cm.exception.problems), 2)
+        self.assertIn(
+            "pivots[1] references dimension 'city'", str(cm.exception)
+        )
+        self.assertIn("pivots[1]: order_bys", str(cm.exception))
+
+
+class TestValidateRealtimeReportRequest(unittest.TestCase):
+    """Test cases for validate_realtime_report_request."""
+
+    def test_custom_fields(self):
+        """Tests the realtime rules for custom dimensions and metrics."""
+        validation.validate_realtime_report_request(
+            data_v1beta.RunRealtimeReportRequest(
+                dimensions=[{"name": "customUser:tier"}],
+                metrics=[{"name": "activeUsers"}],
+            )
+        )
+        with self.assertRaises(validation.InvalidReportRequestError) as cm:
+            validation.validate_realtime_report_request(
+                data_v1beta.RunRealtimeReportRequest(
+                    dimensions=[{"name": "customEvent:plan"}],
+                    metrics=[{"name": "customEvent:price"}],
+                )
+            )
+        self.assertEqual(len(cm.exception.problems), 2)